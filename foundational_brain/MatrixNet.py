@@ -0,0 +1,206 @@
+"""
+name: Nick Vaccarello
+language: Python
+Description: Matrix-backed engine for the foundational neural network. Each layer is stored as one contiguous
+             weight matrix plus a bias vector, and forward/backward passes run as NumPy matrix operations
+             instead of per-neuron Python loops. The function names mirror NeuralNet.py so either engine can be
+             imported, and the adapters below convert to and from NeuralNet's dict-of-neurons format.
+"""
+
+import numpy as np
+
+try:
+    from foundational_brain.NeuralNet import initialize_network as initialize_neuron_network
+except Exception:
+    from NeuralNet import initialize_network as initialize_neuron_network
+
+"""
+A matrix network is a list of layers. Each layer is a dict:
+    'weights': array of shape (n_outputs, n_inputs)  - row j holds neuron j's input weights
+    'bias':    array of shape (n_outputs,)            - neuron j's bias (the last weight in NeuralNet)
+"""
+
+"""
+Convert a NeuralNet dict-of-neurons network into matrix layers. The bias is the last entry of each
+neuron's weight list, exactly as NeuralNet.activate treats it.
+"""
+def from_neuron_network(network, dtype=np.float64):
+    layers = []
+    for layer in network:
+        rows = np.array([neuron['weights'] for neuron in layer], dtype=dtype)
+        layers.append({
+            'weights': np.ascontiguousarray(rows[:, :-1]),
+            'bias': np.ascontiguousarray(rows[:, -1]),
+        })
+    return layers
+
+"""
+Convert matrix layers back into NeuralNet's dict-of-neurons format (weights only, bias last) so the result
+can be saved with json.dump or passed to any NeuralNet function.
+"""
+def to_neuron_network(layers):
+    network = []
+    for layer in layers:
+        weights = np.asarray(layer['weights'], dtype=np.float64)
+        bias = np.asarray(layer['bias'], dtype=np.float64)
+        network.append([{'weights': weights[j].tolist() + [float(bias[j])]} for j in range(weights.shape[0])])
+    return network
+
+"""
+Repack a network in place so every layer's weights and bias are views into one contiguous 1-D buffer, and
+return that buffer. Updates made through the layer arrays (optimizers, training) land in the buffer, so the
+whole network can be snapshotted or restored with a single np.copyto. Pass out= to pack into an existing
+buffer (for example one backed by shared memory).
+"""
+def flatten_network(network, out=None):
+    size = sum(l['weights'].size + l['bias'].size for l in network)
+    flat = np.empty(size, dtype=network[0]['weights'].dtype) if out is None else out
+    offset = 0
+    for layer in network:
+        for key in ('weights', 'bias'):
+            view = flat[offset:offset + layer[key].size].reshape(layer[key].shape)
+            view[...] = layer[key]
+            layer[key] = view
+            offset += view.size
+    return flat
+
+"""
+Create a matrix network. Weights are drawn from the same random() stream and in the same order as
+NeuralNet.initialize_network, so seed(n) yields identical starting weights in both engines.
+"""
+def initialize_network(n_inputs, n_hidden, n_outputs):
+    return from_neuron_network(initialize_neuron_network(n_inputs, n_hidden, n_outputs))
+
+"""
+Activation for a whole layer: inputs @ W^T + b. Works for a single row (n_inputs,) or a batch (N, n_inputs).
+"""
+def activate(layer, inputs):
+    return inputs @ layer['weights'].T + layer['bias']
+
+"""
+Element-wise sigmoid. The clip keeps np.exp finite for extreme activations; sigmoid is already saturated
+to 0/1 in float64 long before |x| reaches 500.
+"""
+def transfer(activation):
+    return 1.0 / (1.0 + np.exp(-np.clip(activation, -500.0, 500.0)))
+
+def transfer_derivative(output):
+    return output * (1.0 - output)
+
+"""
+Inverted dropout masks for the hidden layers: each entry is 0 (dropped) or 1/(1-rate) (kept), so no rescaling
+is needed at inference time. The output layer never gets a mask (its entry is None).
+"""
+def dropout_masks(network, n_rows, rate, rng):
+    masks = []
+    for i, layer in enumerate(network):
+        if i == len(network) - 1 or rate <= 0.0:
+            masks.append(None)
+            continue
+        keep = rng.random((n_rows, layer['weights'].shape[0])) >= rate
+        masks.append(keep / (1.0 - rate))
+    return masks
+
+"""
+Forward propagate a row or a batch of rows. Returns the list of every layer's outputs (needed for
+backpropagation); the last entry is the network output. Nothing is written back into the layers, so the
+same network can be evaluated from several threads at once. With linear_output=True the final layer
+returns raw activations (logits) instead of sigmoid outputs. Optional dropout masks are applied to what each
+hidden layer feeds forward; the returned outputs stay unmasked.
+"""
+def forward_propagate(network, inputs, linear_output=False, masks=None):
+    outputs = []
+    x = np.asarray(inputs, dtype=network[0]['weights'].dtype)
+    last = len(network) - 1
+    for i, layer in enumerate(network):
+        a = activate(layer, x)
+        x = a if (linear_output and i == last) else transfer(a)
+        outputs.append(x)
+        if masks is not None and masks[i] is not None:
+            x = x * masks[i]
+    return outputs
+
+def forward_user_input(network, inputs):
+    return forward_propagate(network, inputs)[-1].tolist()
+
+"""
+Index of the largest output, first on ties, like NeuralNet.predict. Accepts a list or a 1-D array.
+"""
+def predict(outputs):
+    return int(np.argmax(outputs))
+
+"""
+Propagate an output-layer error signal back through the hidden layers. output_delta is the gradient of the
+loss with respect to the final layer's activation (for example probs - expected for softmax + cross-entropy).
+Returns one delta array per layer, shaped like that layer's outputs.
+"""
+def propagate_deltas(network, outputs, output_delta, masks=None):
+    deltas = [None] * len(network)
+    deltas[-1] = output_delta
+    for i in reversed(range(len(network) - 1)):
+        error = deltas[i + 1] @ network[i + 1]['weights']
+        if masks is not None and masks[i] is not None:
+            error = error * masks[i]
+        deltas[i] = error * transfer_derivative(outputs[i])
+    return deltas
+
+"""
+Squared-error deltas for a sigmoid output layer, matching NeuralNet.backward_propagate_error. Deltas here are
+loss gradients (output - expected), so update_weights subtracts them.
+"""
+def backward_propagate_error(network, outputs, expected):
+    output_delta = (outputs[-1] - expected) * transfer_derivative(outputs[-1])
+    return propagate_deltas(network, outputs, output_delta)
+
+"""
+Gradients of every layer's weights and bias. For a batch the gradients are summed over rows.
+"""
+def compute_gradients(network, inputs, outputs, deltas, masks=None):
+    grads = []
+    for i in range(len(network)):
+        layer_in = np.asarray(inputs) if i == 0 else outputs[i - 1]
+        if i > 0 and masks is not None and masks[i - 1] is not None:
+            layer_in = layer_in * masks[i - 1]
+        delta = deltas[i]
+        if delta.ndim == 1:
+            grads.append({'weights': np.outer(delta, layer_in), 'bias': delta})
+        else:
+            grads.append({'weights': delta.T @ layer_in, 'bias': delta.sum(axis=0)})
+    return grads
+
+"""
+Plain gradient descent step, in place.
+"""
+def update_weights(network, inputs, outputs, deltas, l_rate):
+    for layer, grad in zip(network, compute_gradients(network, inputs, outputs, deltas)):
+        layer['weights'] -= l_rate * grad['weights']
+        layer['bias'] -= l_rate * grad['bias']
+
+"""
+Same training loop and return value as NeuralNet.train_network (per-row SGD, squared error, early stop when
+error < 0.01), using the matrix engine.
+"""
+def train_network(network, train, l_rate, n_epoch, n_outputs, verbose=True):
+    data = np.asarray(train, dtype=np.float64)
+    features = data[:, :-1]
+    labels = data[:, -1].astype(int)
+    identity = np.eye(n_outputs)
+    errors = []
+    for epoch in range(n_epoch):
+        sum_error = 0.0
+        for row, label in zip(features, labels):
+            outputs = forward_propagate(network, row)
+            expected = identity[label]
+            sum_error += float(np.sum((expected - outputs[-1]) ** 2))
+            deltas = backward_propagate_error(network, outputs, expected)
+            update_weights(network, row, outputs, deltas, l_rate)
+        errors.append(sum_error)
+
+        if verbose and (epoch % 1000 == 0 or epoch == n_epoch - 1):
+            print('>epoch=%d, lrate=%.3f, error=%.3f' % (epoch, l_rate, sum_error))
+
+        if sum_error < 0.01:
+            print(f'Early stopping at epoch {epoch} with error {sum_error:.3f}')
+            break
+
+    return errors
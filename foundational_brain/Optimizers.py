@@ -0,0 +1,92 @@
+"""
+name: Nick Vaccarello
+language: Python
+Description: Pluggable optimizers for MatrixNet layers. Each optimizer takes the per-layer gradients returned by
+             MatrixNet.compute_gradients and updates the weights in place. L2 weight decay is added to the
+             weight gradients (biases are not decayed).
+"""
+
+import numpy as np
+
+
+class SGD:
+    """Plain gradient descent: w -= lr * (g + weight_decay * w)"""
+
+    def __init__(self, learning_rate, weight_decay=0.0):
+        self.learning_rate = learning_rate
+        self.weight_decay = weight_decay
+
+    def _decayed(self, layer, grad):
+        if self.weight_decay:
+            return grad['weights'] + self.weight_decay * layer['weights']
+        return grad['weights']
+
+    def step(self, network, grads):
+        for layer, grad in zip(network, grads):
+            layer['weights'] -= self.learning_rate * self._decayed(layer, grad)
+            layer['bias'] -= self.learning_rate * grad['bias']
+
+
+class Momentum(SGD):
+    """Heavy-ball momentum: v = momentum * v + g; w -= lr * v"""
+
+    def __init__(self, learning_rate, weight_decay=0.0, momentum=0.9):
+        super().__init__(learning_rate, weight_decay)
+        self.momentum = momentum
+        self.velocity = None
+
+    def step(self, network, grads):
+        if self.velocity is None:
+            self.velocity = [{'weights': np.zeros_like(l['weights']), 'bias': np.zeros_like(l['bias'])} for l in network]
+        for layer, grad, vel in zip(network, grads, self.velocity):
+            vel['weights'] *= self.momentum
+            vel['weights'] += self._decayed(layer, grad)
+            vel['bias'] *= self.momentum
+            vel['bias'] += grad['bias']
+            layer['weights'] -= self.learning_rate * vel['weights']
+            layer['bias'] -= self.learning_rate * vel['bias']
+
+
+class Adam(SGD):
+    """Adam with bias-corrected first/second moment estimates"""
+
+    def __init__(self, learning_rate, weight_decay=0.0, beta1=0.9, beta2=0.999, eps=1e-8):
+        super().__init__(learning_rate, weight_decay)
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.t = 0
+        self.moments = None
+
+    def step(self, network, grads):
+        if self.moments is None:
+            self.moments = [
+                {key: (np.zeros_like(l[key]), np.zeros_like(l[key])) for key in ('weights', 'bias')}
+                for l in network
+            ]
+        self.t += 1
+        lr_t = self.learning_rate * np.sqrt(1.0 - self.beta2 ** self.t) / (1.0 - self.beta1 ** self.t)
+        for layer, grad, moments in zip(network, grads, self.moments):
+            for key in ('weights', 'bias'):
+                g = self._decayed(layer, grad) if key == 'weights' else grad['bias']
+                m, v = moments[key]
+                m *= self.beta1
+                m += (1.0 - self.beta1) * g
+                v *= self.beta2
+                v += (1.0 - self.beta2) * (g * g)
+                layer[key] -= lr_t * m / (np.sqrt(v) + self.eps)
+
+
+OPTIMIZERS = {
+    'sgd': SGD,
+    'momentum': Momentum,
+    'adam': Adam,
+}
+
+
+def make_optimizer(name, learning_rate, weight_decay=0.0, **kwargs):
+    """Build an optimizer by name ('sgd', 'momentum' or 'adam')"""
+    key = (name or 'sgd').lower()
+    if key not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer '{name}' (expected one of: {', '.join(OPTIMIZERS)})")
+    return OPTIMIZERS[key](learning_rate, weight_decay=weight_decay, **kwargs)
@@ -1,12 +1,21 @@
 from fastapi import FastAPI, Header, HTTPException, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import time
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Match
+import hmac
+import json
+import math
 from pydantic import BaseModel
 import os
 import sys
+import threading
+import time
 import uuid
-from typing import Dict, List, Tuple
+from typing import AsyncIterator, Dict, List, Tuple
+
+import numpy as np
 
 # Ensure foundational_brain is importable
 MODEL_ROOT = os.path.dirname(os.path.dirname(__file__))
@@ -18,8 +27,16 @@ for p in (REPO_ROOT, MODEL_ROOT):
 from medical_diagnosis_model.versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
 from medical_diagnosis_model.pdf_exporter import PDFExporter
 from medical_diagnosis_model.backend.security.jwt_dep import verify_bearer
-from medical_diagnosis_model.versions.v2.medical_disease_schema_v2 import DISEASES_V2
-from medical_diagnosis_model.medical_symptom_schema import SYMPTOMS
+from medical_diagnosis_model.backend.security.rate_limit import RateLimiter
+from medical_diagnosis_model.versions.v2.medical_disease_schema_v2 import DISEASES_V2, compile_symptom_patterns
+from medical_diagnosis_model.backend.selector.eig_selector import rank_by_eig
+from medical_diagnosis_model.backend.selector.policy_tree import PolicyTree
+from medical_diagnosis_model.backend.sessions.session_store import session_store_from_env
+from medical_diagnosis_model.backend.cache.response_cache import ResponseCache
+from medical_diagnosis_model.backend.serving.batcher import InferenceBatcher
+from medical_diagnosis_model.backend.serving.model_manager import LoadedModel, ModelManager
+from medical_diagnosis_model.backend.metrics.registry import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsRegistry
+from medical_diagnosis_model.medical_symptom_schema import SYMPTOMS, find_symptom
 
 
 app = FastAPI(title="Medical Diagnosis API", version="0.1.0")
@@ -33,56 +50,228 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-model = ClinicalReasoningNetwork(hidden_neurons=25, learning_rate=0.3, epochs=1000)
+
+
+def _new_model() -> ClinicalReasoningNetwork:
+    # MDM_WEIGHTS_DTYPE=float32 halves resident weight memory when many models share a host
+    return ClinicalReasoningNetwork(hidden_neurons=25, learning_rate=0.3, epochs=1000,
+                                    weights_dtype=os.environ.get("MDM_WEIGHTS_DTYPE", "float64"))
+
+
 # Prefer v0.2 model if present; allow env override
 DEFAULT_MODEL = os.path.join(MODEL_ROOT, "models", "enhanced_medical_model.json")
 V02_MODEL = os.path.join(MODEL_ROOT, "models", "enhanced_medical_model_v02.json")
 MODEL_PATH = os.environ.get("MDM_MODEL_PATH") or (V02_MODEL if os.path.exists(V02_MODEL) else DEFAULT_MODEL)
+# save_model writes a memory-mappable .bin next to the JSON. The default model maps it only
+# while it records this JSON's hash; otherwise the JSON is parsed and the .bin rewritten.
+# MODEL_PATH (version hash, hot-reload watch) stays the JSON, so updating it is always seen.
+_MODEL_LOAD_OPTIONS = {} if os.environ.get("MDM_MODEL_PATH") else {"prefer_artifact": True}
 exporter = PDFExporter(export_dir=os.path.join(MODEL_ROOT, "exports"))
-_RATE_LIMIT_STORE: dict[str, dict[str, float | int]] = {}
-_ADAPTIVE_SESSIONS: Dict[str, Dict] = {}
+def _valid_api_key(api_key: str) -> bool:
+    required = os.environ.get("MDM_API_KEY")
+    return bool(required) and hmac.compare_digest(api_key.encode("utf-8"), required.encode("utf-8"))
+
+
+def _verified_claims(token: str) -> dict:
+    return verify_bearer(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+
+
+# Token buckets per client; MDM_RATE_LIMIT_SQLITE=/path shares them across workers.
+# API keys / bearer subjects only key a bucket once they verify; otherwise the IP does
+_RATE_LIMITER = RateLimiter.from_env(verify_api_key=_valid_api_key, verify_token=_verified_claims)
+# get/put/pop session store with TTL and size bounds; MDM_SESSION_SQLITE=/path shares it across workers
+_ADAPTIVE_SESSIONS = session_store_from_env()
+# Guards only the cold load/train path; inference on a loaded model is lock-free
+_MODEL_LOAD_LOCK = threading.Lock()
+# Hot reloads build a fresh model and swap it in; handlers hold one LoadedModel per request
+_MODELS = ModelManager(_new_model, MODEL_PATH, num_classes=len(DISEASES_V2), load_options=_MODEL_LOAD_OPTIONS)
+
+
+def _env_number(name: str, default, cast=int):
+    try:
+        return cast(os.environ.get(name, default))
+    except ValueError:
+        return cast(default)
+
+
+# Prometheus-style metrics at /metrics; hot-path updates are per-thread and take no lock
+_METRICS = MetricsRegistry()
+_HTTP_REQUESTS = _METRICS.counter("mdm_http_requests_total", "HTTP requests by route template and status",
+                                  ("method", "route", "status"))
+_HTTP_LATENCY = _METRICS.histogram("mdm_http_request_duration_seconds",
+                                   "Seconds until the response starts, by route template", ("method", "route"))
+_INFERENCE_SECONDS = _METRICS.histogram("mdm_inference_seconds",
+                                        "Seconds per model forward pass or clinical-rule pass (batch or single case)",
+                                        ("stage",))
+_RATE_LIMITED = _METRICS.counter("mdm_rate_limit_rejections_total", "Requests rejected with 429 by the rate limiter")
+
+
+def _observe_inference(stage: str, seconds: float) -> None:
+    _INFERENCE_SECONDS.labels(stage).observe(seconds)
+
+
+# Diagnose responses keyed by canonical features; MDM_DIAGNOSE_CACHE_SIZE=0 disables
+_DIAGNOSE_CACHE = ResponseCache(
+    max_entries=_env_number("MDM_DIAGNOSE_CACHE_SIZE", 1024),
+    ttl_s=_env_number("MDM_DIAGNOSE_CACHE_TTL_S", 300.0, float),
+)
+# 0-10 severities are rounded to this many decimals in the cache key only; scoring uses them as sent
+_DIAGNOSE_CACHE_DECIMALS = _env_number("MDM_DIAGNOSE_CACHE_DECIMALS", 1)
+# Concurrent single-case forward + rule passes run as one batch; MDM_BATCH_MAX_ROWS=1 disables
+_BATCHER = InferenceBatcher(
+    max_batch=_env_number("MDM_BATCH_MAX_ROWS", 64),
+    window_ms=_env_number("MDM_BATCH_WINDOW_MS", 2.0, float),
+    observer=_observe_inference,
+)
+# Adaptive (posterior, next question) per canonical answer set; MDM_ADAPTIVE_MEMO_SIZE=0 disables
+_ADAPTIVE_MEMO = ResponseCache(max_entries=_env_number("MDM_ADAPTIVE_MEMO_SIZE", 4096), ttl_s=0)
+# Prebuilt policy tree (tools/build_adaptive_policy.py); only used while its model version is active
+ADAPTIVE_POLICY_PATH = os.environ.get("MDM_ADAPTIVE_POLICY", os.path.join(MODEL_ROOT, "models", "adaptive_policy.json"))
+_ADAPTIVE_POLICY: Dict[str, PolicyTree | None] = {"tree": None}
+
+
+def _load_adaptive_policy(loaded: LoadedModel) -> None:
+    tree = None
+    if os.path.exists(ADAPTIVE_POLICY_PATH):
+        try:
+            tree = PolicyTree.load(ADAPTIVE_POLICY_PATH, _answers_key)
+        except Exception as exc:
+            print(f"Adaptive policy not loaded: {type(exc).__name__}: {exc}")
+        if tree is not None and tree.model_version != loaded.version:
+            print(f"Adaptive policy is for model {tree.model_version}, not {loaded.version}; ignoring it")
+            tree = None
+    _ADAPTIVE_POLICY["tree"] = tree
+
 
+# Cached responses belong to the model that computed them
+_MODELS.add_listener(lambda loaded: _DIAGNOSE_CACHE.clear())
+_MODELS.add_listener(lambda loaded: _ADAPTIVE_MEMO.clear())
+_MODELS.add_listener(_load_adaptive_policy)
 
-def _ensure_model_loaded():
+
+def _ensure_model_loaded() -> LoadedModel:
     quick_train = os.environ.get("MDM_QUICK_TRAIN") == "1"
+    with _MODEL_LOAD_LOCK:
+        if _MODELS.active is not None:
+            return _MODELS.active
+        try:
+            return _MODELS.load()
+        except Exception:
+            cases = 5 if quick_train else 50
+            fresh = _new_model()
+            fresh.train(cases_per_disease=cases, verbose=False)
+            fresh.save_model(MODEL_PATH)
+            return _MODELS.install(fresh)
+
+
+# Set once the first model is loaded (or trained) and warmed; until then model
+# endpoints answer 503 instead of loading or training inline
+_READY = threading.Event()
+_WARM_START: Dict[str, object] = {"state": "starting", "error": None, "thread": None}
+_WARM_START_LOCK = threading.Lock()
+
+
+def _warm_caches(loaded: LoadedModel) -> None:
+    # First calls pay for lazy numpy/BLAS setup and the compiled schema tables
+    _diagnose_symptoms(loaded, {"Fever": 6.0, "Cough": 6.0})
+    probs, _ = _session_posterior(loaded, {"answers": {0: {"answer": "yes", "severity": 6.0}}})
+    _select_next_symptom(probs, {0})
+
+
+def _warm_start() -> None:
     try:
-        model.load_model(MODEL_PATH)
-    except Exception:
-        cases = 5 if quick_train else 50
-        model.train(cases_per_disease=cases, verbose=False)
-        model.save_model(MODEL_PATH)
+        _warm_caches(_ensure_model_loaded())
+    except Exception as exc:
+        _WARM_START.update(state="failed", error=f"{type(exc).__name__}: {exc}")
+        return
+    _WARM_START.update(state="ready", error=None)
+    _READY.set()
+
+
+def _start_warm_start() -> None:
+    """Load (or fallback-train) and warm the model in a background thread; idempotent"""
+    with _WARM_START_LOCK:
+        thread = _WARM_START["thread"]
+        if _READY.is_set() or (thread is not None and thread.is_alive()):
+            return
+        _WARM_START["state"] = "starting"
+        thread = threading.Thread(target=_warm_start, name="model-warm-start", daemon=True)
+        _WARM_START["thread"] = thread
+        thread.start()
+
+
+def wait_until_ready(timeout: float | None = None) -> bool:
+    """Start the warm start if needed and block until ready (for in-process callers)"""
+    _start_warm_start()
+    return _READY.wait(timeout)
+
+
+def _active_model() -> LoadedModel:
+    loaded = _MODELS.active
+    if loaded is None or not _READY.is_set():
+        # A failed warm start is retried on demand; the caller gets a fast 503 either way
+        _start_warm_start()
+        raise HTTPException(status_code=503, detail="Model not ready", headers={"Retry-After": "1"})
+    return loaded
 
 
 @app.on_event("startup")
 def load_model():
-    _ensure_model_loaded()
+    _start_warm_start()
+    # MDM_MODEL_WATCH_S > 0 polls MODEL_PATH and hot-reloads it when it changes
+    watch_s = _env_number("MDM_MODEL_WATCH_S", 0.0, float)
+    if watch_s > 0:
+        _MODELS.start_watch(watch_s)
+
+
+@app.on_event("shutdown")
+def stop_model_watch():
+    _MODELS.stop_watch()
+
+
+# Probe and scrape endpoints skip rate limiting so orchestrator checks are never throttled
+_PROBE_PATHS = {"/healthz", "/readyz", "/metrics"}
+
+
+def _route_label(request: Request) -> str:
+    """Route template (not the raw path) so metric label cardinality stays bounded"""
+    route = request.scope.get("route")
+    if route is None:
+        # Rejected before routing (e.g. 429): match here; unknown paths share one label
+        for candidate in app.router.routes:
+            if candidate.matches(request.scope)[0] == Match.FULL:
+                route = candidate
+                break
+    return getattr(route, "path", "<unmatched>")
+
+
+def _record_request(request: Request, status: int, start: float) -> None:
+    route = _route_label(request)
+    _HTTP_LATENCY.labels(request.method, route).observe(time.perf_counter() - start)
+    _HTTP_REQUESTS.labels(request.method, route, status).inc()
 
 
 # Basic request logging (structured)
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
+    start = time.perf_counter()
     path = request.url.path
     method = request.method
-    # Basic rate limiting (dev): requests per window per client IP
-    try:
-        rpm = int(os.environ.get("MDM_RATE_LIMIT_RPM", "120"))
-    except ValueError:
-        rpm = 120
-    try:
-        window_s = int(os.environ.get("MDM_RATE_LIMIT_WINDOW_S", "60"))
-    except ValueError:
-        window_s = 60
-
-    if rpm > 0 and window_s > 0:
+    # Rate limiting: token bucket per client key (IP, API key or OIDC sub)
+    limiter = _RATE_LIMITER
+    if limiter.enabled and path not in _PROBE_PATHS:
         client_ip = (request.client.host if request.client else "unknown")
-        now = time.time()
-        rl = _RATE_LIMIT_STORE.get(client_ip)
-        if not rl or (now - rl["win_start"]) > window_s:
-            rl = {"win_start": now, "count": 0}
-        rl["count"] += 1
-        _RATE_LIMIT_STORE[client_ip] = rl
-        if rl["count"] > rpm:
-            return JSONResponse({"detail": "Too Many Requests"}, status_code=429)
+
+        def _check():
+            return limiter.check(limiter.client_key(request.headers, client_ip))
+
+        # SQLite transactions and token verification can block; keep them off the event loop
+        allowed, retry_after = await run_in_threadpool(_check) if limiter.blocking else _check()
+        if not allowed:
+            _RATE_LIMITED.inc()
+            _record_request(request, 429, start)
+            return JSONResponse({"detail": "Too Many Requests"}, status_code=429,
+                                headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
 
     response = await call_next(request)
     try:
@@ -90,11 +279,77 @@ async def log_requests(request: Request, call_next):
     except Exception:
         status = 500
     print(f"api_log method={method} path={path} status={status}")
+    _record_request(request, status, start)
     return response
 
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is serving requests"""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: a model is loaded and warmed"""
+    if not _READY.is_set():
+        return JSONResponse({"status": _WARM_START["state"], "detail": _WARM_START["error"]}, status_code=503)
+    active = _MODELS.active
+    return {"status": "ready", "model_version": active.version if active else None}
+
+
+def _cache_samples(field: str) -> Dict[tuple, float]:
+    stats = {"diagnose": _DIAGNOSE_CACHE.stats(), "adaptive_memo": _ADAPTIVE_MEMO.stats()}
+    if field == "hit_ratio":
+        # Lookups answered without computing (hits and coalesced followers), since startup
+        ratios = {}
+        for name, st in stats.items():
+            lookups = st["hits"] + st["misses"] + st["coalesced"]
+            ratios[(name,)] = (st["hits"] + st["coalesced"]) / lookups if lookups else None
+        return ratios
+    return {(name,): st[field] for name, st in stats.items()}
+
+
+def _model_info() -> Dict[tuple, float]:
+    active = _MODELS.active
+    return {(active.version, active.path): 1} if active is not None else {}
+
+
+# Sampled at scrape time from the components' own counters
+_METRICS.callback("mdm_model_info", "Active model version and file", _model_info, ("version", "path"))
+_METRICS.callback("mdm_model_ready", "1 once a model is loaded and warmed", lambda: int(_READY.is_set()))
+_METRICS.callback("mdm_model_loaded_timestamp_seconds", "Unix time the active model was installed",
+                  lambda: _MODELS.active.loaded_at if _MODELS.active is not None else None)
+_METRICS.callback("mdm_adaptive_sessions", "Live adaptive sessions in the session store",
+                  lambda: len(_ADAPTIVE_SESSIONS))
+_METRICS.callback("mdm_rate_limit_buckets", "Client token buckets tracked by the rate limiter",
+                  lambda: len(_RATE_LIMITER.store))
+for _field, _kind, _help in (
+    ("hits", "counter", "Cache lookups served from a stored entry"),
+    ("misses", "counter", "Cache lookups that computed the value"),
+    ("coalesced", "counter", "Cache lookups that waited on an in-flight compute"),
+    ("evictions", "counter", "Cache entries evicted by the LRU bound"),
+    ("size", "gauge", "Cache entries stored"),
+    ("hit_ratio", "gauge", "Share of cache lookups answered without computing"),
+):
+    _METRICS.callback(f"mdm_cache_{_field}" + ("_total" if _kind == "counter" else ""), _help,
+                      lambda field=_field: _cache_samples(field), ("cache",), kind=_kind)
+_METRICS.callback("mdm_batcher_batches_total", "Micro-batched forward passes",
+                  lambda: _BATCHER.stats()["batches"], kind="counter")
+_METRICS.callback("mdm_batcher_rows_total", "Rows scored through the micro-batcher",
+                  lambda: _BATCHER.stats()["rows"], kind="counter")
+_METRICS.callback("mdm_batcher_queued", "Rows waiting for the micro-batcher", lambda: _BATCHER.stats()["queued"])
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus text exposition (request, inference, rate-limit, session, cache and model metrics)"""
+    return Response(_METRICS.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 class Symptoms(BaseModel):
     data: dict
+    has_test_results: dict | None = None
 
 
 def _auth_check(x_api_key: str | None):
@@ -110,10 +365,144 @@ def diagnose(payload: Symptoms, x_api_key: str | None = Header(default=None), cl
     # If not in OIDC mode, fall back to API key header
     if os.environ.get("MDM_AUTH_MODE", "api_key").lower() != "oidc":
         _auth_check(x_api_key)
-    if model.network is None:
-        _ensure_model_loaded()
-    results = model.diagnose_with_reasoning(payload.data)
-    return results
+    loaded = _active_model()
+    symptom_vector, severity_vector, symptom_ids = loaded.model._encode_symptoms(payload.data)
+    tests = payload.has_test_results or None
+    key = (
+        loaded.version,
+        tuple(symptom_vector),
+        _cache_severities(severity_vector),
+        json.dumps(tests, sort_keys=True, default=str) if tests else None,
+    )
+    return _DIAGNOSE_CACHE.get_or_compute(
+        key, lambda: _diagnose_features(loaded, symptom_vector, severity_vector, symptom_ids, tests)
+    )
+
+
+def _diagnose_features(loaded: LoadedModel, symptom_vector: list[int], severity_vector: list[float],
+                       symptom_ids: list[int], has_test_results: dict | None = None) -> dict:
+    """diagnose_with_reasoning with the forward and rule passes micro-batched"""
+    adjusted = _BATCHER.submit(loaded.model, symptom_vector + severity_vector).tolist()
+    results = loaded.model._diagnosis_from_outputs(adjusted, symptom_ids, severity_vector, has_test_results)
+    return dict(results, model_version=loaded.version)
+
+
+def _diagnose_symptoms(loaded: LoadedModel, symptoms: dict, has_test_results: dict | None = None) -> dict:
+    return _diagnose_features(loaded, *loaded.model._encode_symptoms(symptoms), has_test_results)
+
+
+def _diagnose_rows(loaded: LoadedModel, rows: List[Tuple[dict, dict | None]]) -> List[dict]:
+    """Diagnose (symptoms, has_test_results) rows with one forward and one rule pass"""
+    model = loaded.model
+    encoded = [model._encode_symptoms(data) for data, _ in rows]
+    features = np.array([sv + sev for sv, sev, _ in encoded], dtype=np.float64).reshape(len(rows), -1)
+    start = time.perf_counter()
+    probs = model.predict_proba_batch(features)
+    ruled = time.perf_counter()
+    adjusted = model.apply_clinical_rules_batch(probs, features)
+    _observe_inference("forward", ruled - start)
+    _observe_inference("rules", time.perf_counter() - ruled)
+    return [
+        dict(model._diagnosis_from_outputs(probs.tolist(), ids, sev, tests), model_version=loaded.version)
+        for probs, (_, sev, ids), (_, tests) in zip(adjusted, encoded, rows)
+    ]
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _parse_batch_row(index: int, line: bytes) -> tuple:
+    """(output head, symptoms, has_test_results, error) for one NDJSON input line"""
+    head: Dict[str, object] = {"index": index}
+    try:
+        obj = json.loads(line)
+    except ValueError as exc:
+        return head, None, None, f"invalid JSON: {exc}"
+    if not isinstance(obj, dict):
+        return head, None, None, "expected a JSON object"
+    if "id" in obj:
+        head["id"] = obj["id"]
+    tests = obj.get("has_test_results")
+    if not isinstance(obj.get("data"), dict) or not (tests is None or isinstance(tests, dict)):
+        return head, None, None, "expected {\"data\": {symptom: severity}, \"has_test_results\": {...}?}"
+    return head, obj["data"], tests or None, None
+
+
+def _score_batch_rows(loaded: LoadedModel, pending: List[tuple]) -> bytes:
+    out = [dict(head, error=error) if error else dict(head) for head, _, _, error in pending]
+    valid = [i for i, row in enumerate(pending) if row[3] is None]
+    try:
+        for i, result in zip(valid, _diagnose_rows(loaded, [pending[i][1:3] for i in valid])):
+            out[i]["result"] = result
+    except Exception:
+        # Isolate the failing row(s) so one bad payload does not fail its neighbours
+        for i in valid:
+            try:
+                out[i]["result"] = _diagnose_rows(loaded, [pending[i][1:3]])[0]
+            except Exception as exc:
+                out[i]["error"] = f"{type(exc).__name__}: {exc}"
+    return "".join(json.dumps(row) + "\n" for row in out).encode("utf-8")
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """StreamingResponse that may start while the request body is still being read.
+
+    Starlette's default (ASGI < 2.4) listens for disconnects on receive(), which would
+    swallow the body chunks the handler is still consuming; here a client disconnect
+    surfaces as a failed send instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+@app.post("/api/v2/diagnose/batch")
+async def diagnose_batch(request: Request, x_api_key: str | None = Header(default=None), claims: dict = Depends(verify_bearer)):
+    """Stream NDJSON in ({"data": ..., "has_test_results"?, "id"?} per line) and results out.
+
+    Output line i answers the i-th non-blank input line: {"index", "id"?, "result"} or
+    {"index", "id"?, "error"}. Rows are scored MDM_NDJSON_BATCH_ROWS (default 256) at a
+    time on the model that was active when the request started; the response cache is
+    bypassed so bulk jobs do not evict interactive entries. Results stream back while
+    input is still arriving, so clients sending large bodies should read concurrently.
+    """
+    if os.environ.get("MDM_AUTH_MODE", "api_key").lower() != "oidc":
+        _auth_check(x_api_key)
+    loaded = _active_model()
+    batch_rows = max(1, _env_number("MDM_NDJSON_BATCH_ROWS", 256))
+
+    async def results() -> AsyncIterator[bytes]:
+        pending: List[tuple] = []
+        index = 0
+        async for line in _ndjson_lines(request):
+            if not line.strip():
+                continue
+            pending.append(_parse_batch_row(index, line))
+            index += 1
+            if len(pending) >= batch_rows:
+                yield await run_in_threadpool(_score_batch_rows, loaded, pending)
+                pending = []
+        if pending:
+            yield await run_in_threadpool(_score_batch_rows, loaded, pending)
+
+    return _DuplexStreamingResponse(results(), media_type="application/x-ndjson")
+
+
+def _cache_severities(severity_vector: list[float]) -> tuple:
+    """Severities (0-1 in the feature vector) on the MDM_DIAGNOSE_CACHE_DECIMALS 0-10 grid.
+
+    Only the cache key is quantized: presentations within the grid share an entry, but a
+    miss is always scored on the severities the caller sent.
+    """
+    return tuple(round(sev * 10.0, _DIAGNOSE_CACHE_DECIMALS) for sev in severity_vector)
 
 
 class ExportRequest(BaseModel):
@@ -135,6 +524,45 @@ def export_report(req: ExportRequest, x_api_key: str | None = Header(default=Non
     return {"path": path}
 
 
+def _admin_check(x_api_key: str | None, claims: dict):
+    if os.environ.get("MDM_AUTH_MODE", "api_key").lower() == "oidc":
+        scopes = (claims.get("scope") or "") if isinstance(claims, dict) else ""
+        if "admin:model" not in scopes.split():
+            raise HTTPException(status_code=403, detail="Forbidden")
+    else:
+        _auth_check(x_api_key)
+
+
+@app.get("/api/v2/admin/model")
+def model_status(x_api_key: str | None = Header(default=None), claims: dict = Depends(verify_bearer)):
+    _admin_check(x_api_key, claims)
+    return _MODELS.status()
+
+
+@app.get("/api/v2/admin/stats")
+def serving_stats(x_api_key: str | None = Header(default=None), claims: dict = Depends(verify_bearer)):
+    _admin_check(x_api_key, claims)
+    tree = _ADAPTIVE_POLICY["tree"]
+    return {
+        "diagnose_cache": _DIAGNOSE_CACHE.stats(),
+        "inference_batcher": _BATCHER.stats(),
+        "adaptive_memo": _ADAPTIVE_MEMO.stats(),
+        "adaptive_policy": None if tree is None else {
+            "model_version": tree.model_version, "depth": tree.depth, "nodes": len(tree),
+        },
+    }
+
+
+@app.post("/api/v2/admin/model/reload", status_code=202)
+def reload_model(wait: bool = False, x_api_key: str | None = Header(default=None), claims: dict = Depends(verify_bearer)):
+    """Reload MODEL_PATH in the background; wait=true blocks until the swap (or failure)"""
+    _admin_check(x_api_key, claims)
+    started = _MODELS.reload_async()
+    if wait:
+        _MODELS.wait()
+    return dict(_MODELS.status(), started=started)
+
+
 # ===================== Adaptive (alpha) =====================
 
 class AdaptiveStartRequest(BaseModel):
@@ -146,6 +574,7 @@ class AdaptiveStartRequest(BaseModel):
 class AdaptiveStartResponse(BaseModel):
     session_id: str
     next_question: dict | None = None  # {symptom_id, name}
+    model_version: str | None = None
 
 
 class AdaptiveAnswerRequest(BaseModel):
@@ -160,16 +589,29 @@ class AdaptiveAnswerResponse(BaseModel):
     finished: bool
     next_question: dict | None = None
     results: dict | None = None
+    model_version: str | None = None
 
 
 def _symptom_id_from_key(key: str | int) -> int | None:
     if isinstance(key, int):
         return key if key in SYMPTOMS else None
-    # Try exact name match
-    for sid, meta in SYMPTOMS.items():
-        if meta.get("name", "").lower() == str(key).lower():
-            return sid
-    return None
+    # Name, medical term or clinical-schema synonym (case-insensitive)
+    sid, _ = find_symptom(key)
+    return sid
+
+
+def _answer_features(info: dict) -> tuple[int, float]:
+    """(presence, severity 0-1) one answer contributes to the feature row"""
+    if info.get("answer") != "yes":
+        # explicitly absent or unknown → present=0, severity=0
+        return 0, 0.0
+    sev_raw = info.get("severity")
+    if sev_raw is None:
+        return 1, 0.6
+    try:
+        return 1, max(0.0, min(float(sev_raw) / 10.0, 1.0))
+    except Exception:
+        return 1, 0.6
 
 
 def _answers_to_vectors(answers: Dict[int, dict]) -> tuple[list[int], list[float], list[int]]:
@@ -177,82 +619,107 @@ def _answers_to_vectors(answers: Dict[int, dict]) -> tuple[list[int], list[float
     severity_vector = [0.0] * 30
     present_ids: list[int] = []
     for sid, info in answers.items():
-        ans = info.get("answer")
-        sev_raw = info.get("severity")
-        if ans == "yes":
+        present, severity = _answer_features(info)
+        if present:
             symptom_vector[sid] = 1
+            severity_vector[sid] = severity
             present_ids.append(sid)
-            if sev_raw is None:
-                severity_vector[sid] = 0.6
-            else:
-                try:
-                    severity_vector[sid] = max(0.0, min(float(sev_raw) / 10.0, 1.0))
-                except Exception:
-                    severity_vector[sid] = 0.6
-        elif ans == "no":
-            # explicitly absent → keep present=0, severity=0
-            continue
-        else:
-            # unknown → ignore
-            continue
     return symptom_vector, severity_vector, present_ids
 
 
-def _compute_adjusted_probs(symptom_vector: list[int], severity_vector: list[float], present_ids: list[int]) -> list[float]:
-    if model.network is None:
-        _ensure_model_loaded()
+def _compute_adjusted_probs(symptom_vector: list[int], severity_vector: list[float], present_ids: list[int],
+                            model: ClinicalReasoningNetwork | None = None) -> list[float]:
+    if model is None:
+        model = _active_model().model
     # Neutral prior when no evidence yet to avoid premature certainty
     if not present_ids:
         n = len(DISEASES_V2)
         adjusted = [1.0 / n] * n
     else:
-        features = symptom_vector + severity_vector
-        base = model._predict_proba(features)
-        adjusted = model._apply_clinical_rules(base, present_ids, severity_vector, has_test_results=None)
+        adjusted = _BATCHER.submit(model, symptom_vector + severity_vector).tolist()
     total = sum(adjusted)
     return [p / total for p in adjusted] if total else adjusted
 
 
-def _entropy(probs: list[float]) -> float:
-    import math
-    eps = 1e-12
-    return -sum(p * math.log(max(p, eps)) for p in probs)
+def _session_posterior(loaded: LoadedModel, sess: dict, changed_sid: int | None = None) -> tuple[list[float], list[int]]:
+    """(rule-adjusted probs, present ids) for an adaptive session.
+
+    sess["inference"] keeps the feature row and first-layer pre-activations for the
+    model version that produced them; when only changed_sid was answered, its two
+    input columns are patched into both (O(hidden)) instead of re-running the layer
+    over the whole history. A missing cache or a reloaded model rebuilds from answers.
+    """
+    model = loaded.model
+    cache = sess.get("inference")
+    if changed_sid is None or not cache or cache.get("version") != loaded.version:
+        sv, sev, _ = _answers_to_vectors(sess["answers"])
+        features = np.asarray(sv + sev, dtype=np.float64)
+        hidden = model.hidden_preactivation(features)
+    else:
+        features = np.array(cache["features"], dtype=np.float64)
+        hidden = cache["hidden"]
+        columns = [changed_sid, 30 + changed_sid]
+        deltas = np.asarray(_answer_features(sess["answers"][changed_sid]), dtype=np.float64) - features[columns]
+        if deltas.any():
+            hidden = model.update_hidden_preactivation(hidden, columns, deltas)
+            features[columns] += deltas
+    sess["inference"] = {"version": loaded.version, "features": features, "hidden": hidden}
+    present_ids = np.flatnonzero(features[:30]).tolist()
+    # Neutral prior when no evidence yet to avoid premature certainty
+    if not present_ids:
+        n = len(DISEASES_V2)
+        return [1.0 / n] * n, present_ids
+    start = time.perf_counter()
+    probs = model.predict_proba_from_hidden(hidden)
+    ruled = time.perf_counter()
+    adjusted = model._apply_clinical_rules(probs, present_ids, features[30:], None)
+    _observe_inference("forward", ruled - start)
+    _observe_inference("rules", time.perf_counter() - ruled)
+    total = sum(adjusted)
+    return ([p / total for p in adjusted] if total else adjusted), present_ids
 
 
 def _select_next_symptom(disease_probs: list[float], asked: set[int]) -> int | None:
-    # Build mapping disease_id -> prob
-    d_ids = list(DISEASES_V2.keys())
-    p_map = {did: disease_probs[did] for did in d_ids}
-    h_before = _entropy(list(p_map.values()))
-    best_symptom = None
-    best_eig = -1.0
-    # Precompute per-disease symptom frequencies
     triage_sids = [27, 26, 3, 7, 8, 11]  # Dysuria, Frequency, Cough, Rhinorrhea, Congestion, Diarrhea
     candidate_sids = triage_sids if len(asked) == 0 else list(range(30))
-    for sid in candidate_sids:
-        if sid in asked:
-            continue
-        # P(yes|d)
-        py_d = {did: DISEASES_V2[did].get("symptom_patterns", {}).get(sid, {}).get("frequency", 0.0) for did in d_ids}
-        # Priors for yes/no
-        p_yes = sum(p_map[did] * py_d[did] for did in d_ids)
-        p_no = 1.0 - p_yes
-        if p_yes <= 1e-9 or p_no <= 1e-9:
-            eig = 0.0
-        else:
-            # Posteriors
-            post_yes = []
-            post_no = []
-            for did in d_ids:
-                post_yes.append((p_map[did] * py_d[did]) / p_yes)
-                post_no.append((p_map[did] * (1.0 - py_d[did])) / p_no)
-            h_yes = _entropy(post_yes)
-            h_no = _entropy(post_no)
-            eig = h_before - (p_yes * h_yes + p_no * h_no)
-        if eig > best_eig:
-            best_eig = eig
-            best_symptom = sid
-    return best_symptom
+    candidates = [sid for sid in candidate_sids if sid not in asked]
+    # Likelihood rows: P(yes|d) per symptom from the compiled disease x symptom matrix
+    ranked = rank_by_eig(disease_probs, compile_symptom_patterns().frequency.T, candidates, k=1)
+    return ranked[0][0] if ranked else None
+
+
+def _answers_key(answers: Dict[int, dict]) -> tuple:
+    """Canonical answer set: what the posterior and next question depend on.
+
+    'no' and 'unknown' encode the same features and both mark the symptom as asked, so
+    they share a key; so do a 'yes' without severity and one at severity 6.
+    """
+    return tuple(sorted((sid, *_answer_features(info)) for sid, info in answers.items()))
+
+
+def _adaptive_step(loaded: LoadedModel, sess: dict, changed_sid: int | None = None) -> tuple[list[float], int | None]:
+    probs, _ = _session_posterior(loaded, sess, changed_sid)
+    return probs, _select_next_symptom(probs, set(sess["answers"]))
+
+
+def _next_step(loaded: LoadedModel, sess: dict, changed_sid: int | None = None) -> tuple[list[float], int | None]:
+    """(posterior, next question) from the policy tree, else the memo, else inference"""
+    key = _answers_key(sess["answers"])
+    tree = _ADAPTIVE_POLICY["tree"]
+    step = tree.lookup(key) if tree is not None and tree.model_version == loaded.version else None
+    computed = False
+
+    def _compute():
+        nonlocal computed
+        computed = True
+        return _adaptive_step(loaded, sess, changed_sid)
+
+    if step is None:
+        step = _ADAPTIVE_MEMO.get_or_compute((loaded.version, key), _compute)
+    if not computed:
+        # Skipped the incremental update, so the session's inference cache is stale
+        sess.pop("inference", None)
+    return step
 
 
 def _has_supporting_evidence(top_disease_id: int, present_ids: list[int]) -> bool:
@@ -265,11 +732,7 @@ def _has_supporting_evidence(top_disease_id: int, present_ids: list[int]) -> boo
     if name == "Urinary Tract Infection":
         return (26 in present_ids) or (27 in present_ids)
     # Generic: any high-frequency key symptom present
-    patterns = disease.get("symptom_patterns", {})
-    for sid, pat in patterns.items():
-        if pat.get("frequency", 0.0) >= 0.7 and sid in present_ids:
-            return True
-    return False
+    return any(sid in present_ids for sid in compile_symptom_patterns().key_symptoms(top_disease_id, 0.7))
 
 
 def _session_should_stop(
@@ -325,17 +788,18 @@ def adaptive_start(req: AdaptiveStartRequest, x_api_key: str | None = Header(def
                 answers[sid] = {"answer": "yes", "severity": float(val)}
             elif isinstance(val, str):
                 answers[sid] = {"answer": val.lower(), "severity": None}
-    _ADAPTIVE_SESSIONS[session_id] = {
+    sess = {
         "answers": answers,
         "threshold": threshold,
         "max_q": max_q,
         "num_q": 0,
     }
     # Compute next question
-    sv, sev, present = _answers_to_vectors(answers)
-    probs = _compute_adjusted_probs(sv, sev, present)
-    sid_next = _select_next_symptom(probs, set(answers.keys()))
-    return AdaptiveStartResponse(session_id=session_id, next_question=_build_next_question(sid_next))
+    loaded = _active_model()
+    _, sid_next = _next_step(loaded, sess)
+    _ADAPTIVE_SESSIONS.put(session_id, sess)
+    return AdaptiveStartResponse(session_id=session_id, next_question=_build_next_question(sid_next),
+                                 model_version=loaded.version)
 
 
 @app.post("/api/v2/adaptive/answer")
@@ -351,11 +815,13 @@ def adaptive_answer(req: AdaptiveAnswerRequest, x_api_key: str | None = Header(d
     ans = req.answer.lower()
     if ans not in {"yes", "no", "unknown"}:
         raise HTTPException(status_code=400, detail="Invalid answer")
+    loaded = _active_model()
     sess["answers"][sid] = {"answer": ans, "severity": req.severity}
     sess["num_q"] = int(sess.get("num_q", 0)) + 1
-    # Recompute
-    sv, sev, present = _answers_to_vectors(sess["answers"]) 
-    probs = _compute_adjusted_probs(sv, sev, present)
+    # Policy tree / memo hit, else update the posterior for this answer only
+    probs, sid_next = _next_step(loaded, sess, sid)
+    _ADAPTIVE_SESSIONS.put(req.session_id, sess)
+    present = [sid_k for sid_k, info in sess["answers"].items() if info.get("answer") == "yes"]
     top_did = max(range(len(probs)), key=lambda i: probs[i]) if probs else 0
     if _session_should_stop(probs, sess["num_q"], sess["threshold"], sess["max_q"], present, top_did):
         # Build diagnosis using current answers (convert to name: severity 0-10)
@@ -366,11 +832,12 @@ def adaptive_answer(req: AdaptiveAnswerRequest, x_api_key: str | None = Header(d
                 if name:
                     val = info.get("severity")
                     symptom_dict[name] = float(val) if val is not None else 6.0
-        results = model.diagnose_with_reasoning(symptom_dict)
-        return AdaptiveAnswerResponse(session_id=req.session_id, finished=True, next_question=None, results=results)
+        results = _diagnose_symptoms(loaded, symptom_dict)
+        return AdaptiveAnswerResponse(session_id=req.session_id, finished=True, next_question=None, results=results,
+                                      model_version=loaded.version)
     # Else ask next
-    sid_next = _select_next_symptom(probs, set(sess["answers"].keys()))
-    return AdaptiveAnswerResponse(session_id=req.session_id, finished=False, next_question=_build_next_question(sid_next), results=None)
+    return AdaptiveAnswerResponse(session_id=req.session_id, finished=False, next_question=_build_next_question(sid_next), results=None,
+                                  model_version=loaded.version)
 
 
 class AdaptiveFinishRequest(BaseModel):
@@ -391,6 +858,7 @@ def adaptive_finish(req: AdaptiveFinishRequest, x_api_key: str | None = Header(d
             if name:
                 val = info.get("severity")
                 symptom_dict[name] = float(val) if val is not None else 6.0
-    results = model.diagnose_with_reasoning(symptom_dict)
-    return {"session_id": req.session_id, "results": results}
+    loaded = _active_model()
+    results = _diagnose_symptoms(loaded, symptom_dict)
+    return {"session_id": req.session_id, "results": results, "model_version": loaded.version}
 
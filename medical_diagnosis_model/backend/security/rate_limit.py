@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+# Every store implements take(key, capacity, refill_per_s, now) -> (allowed, retry_after_s);
+# stores whose take can block on I/O set blocking = True so async callers move it off the loop
+
+
+def _take(tokens: float, updated: float, capacity: float, refill_per_s: float, now: float) -> Tuple[float, bool, float]:
+    """Refill a bucket to `now` and try to spend one token: (tokens_after, allowed, retry_after_s)"""
+    tokens = min(capacity, tokens + max(0.0, now - updated) * refill_per_s)
+    if tokens >= 1.0:
+        return tokens - 1.0, True, 0.0
+    return tokens, False, (1.0 - tokens) / refill_per_s
+
+
+class MemoryRateLimitStore:
+    """Per-process token buckets in an LRU bounded to max_keys.
+
+    Evicting a bucket forgets its debt, so max_keys should comfortably exceed the number
+    of clients active within one window.
+    """
+
+    blocking = False
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max(1, int(max_keys))
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_per_s: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens, allowed, retry_after = _take(tokens, updated, capacity, refill_per_s, now)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteRateLimitStore:
+    """Token buckets in a SQLite (WAL) file shared by every worker on a host.
+
+    Each take is one IMMEDIATE transaction, so concurrent workers serialize per call.
+    Every prune_every takes, buckets idle long enough to have refilled are deleted and
+    the table is trimmed to the max_keys most recently used.
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, max_keys: int = 100_000, prune_every: int = 1024):
+        self.path = path
+        self.max_keys = max(1, int(max_keys))
+        self.prune_every = max(1, int(prune_every))
+        self._lock = threading.Lock()
+        self._takes = 0
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS rate_buckets_updated ON rate_buckets(updated)")
+
+    def take(self, key: str, capacity: float, refill_per_s: float, now: float) -> Tuple[bool, float]:
+        with self._lock:
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens, allowed, retry_after = _take(tokens, updated, capacity, refill_per_s, now)
+                conn.execute("INSERT OR REPLACE INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                             (key, tokens, now))
+                self._takes += 1
+                if self._takes % self.prune_every == 0:
+                    self._prune(now - capacity / refill_per_s)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return allowed, retry_after
+
+    def _prune(self, idle_before: float) -> None:
+        # A bucket untouched for capacity / refill seconds is full again; dropping it is exact
+        self._conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (idle_before,))
+        self._conn.execute(
+            "DELETE FROM rate_buckets WHERE key IN ("
+            "SELECT key FROM rate_buckets ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+            (self.max_keys,),
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM rate_buckets")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+
+
+class RateLimiter:
+    """Token bucket per client key: bursts up to rpm, refilling at rpm / window_s per second.
+
+    key_mode picks the client identity: 'ip', 'api_key' (hashed X-API-Key) or 'sub'
+    (the bearer token's subject). A credential only keys its own bucket once it checks
+    out (verify_api_key(key) is true / verify_token(token) returns claims without
+    raising); absent, forged or unverifiable credentials fall back to the IP, so a client
+    cannot mint fresh buckets by varying them. Without a verifier the mode keys by IP.
+    """
+
+    KEY_MODES = ("ip", "api_key", "sub")
+
+    def __init__(self, store, rpm: int = 120, window_s: float = 60.0, key_mode: str = "ip",
+                 clock=time.time, verify_api_key: Callable[[str], bool] | None = None,
+                 verify_token: Callable[[str], Dict[str, Any]] | None = None):
+        if key_mode not in self.KEY_MODES:
+            raise ValueError(f"key_mode must be one of {self.KEY_MODES}")
+        self.store = store
+        self.rpm = int(rpm)
+        self.window_s = float(window_s)
+        self.key_mode = key_mode
+        self._clock = clock
+        self._verify_api_key = verify_api_key
+        self._verify_token = verify_token
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 and self.window_s > 0
+
+    @property
+    def blocking(self) -> bool:
+        """True when client_key + check may block (shared store, or token verification)"""
+        return bool(getattr(self.store, "blocking", False)) or self.key_mode == "sub"
+
+    def check(self, key: str) -> Tuple[bool, float]:
+        """(allowed, retry_after_s) for one request from key"""
+        if not self.enabled:
+            return True, 0.0
+        return self.store.take(key, float(self.rpm), self.rpm / self.window_s, self._clock())
+
+    def client_key(self, headers, client_ip: str) -> str:
+        if self.key_mode == "api_key" and self._verify_api_key is not None:
+            api_key = headers.get("x-api-key")
+            if api_key and self._verify_api_key(api_key):
+                return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:32]
+        elif self.key_mode == "sub" and self._verify_token is not None:
+            scheme, _, token = (headers.get("authorization") or "").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    sub = self._verify_token(token).get("sub")
+                except Exception:
+                    sub = None
+                if sub:
+                    return f"sub:{sub}"
+        return f"ip:{client_ip}"
+
+    @classmethod
+    def from_env(cls, verify_api_key: Callable[[str], bool] | None = None,
+                 verify_token: Callable[[str], Dict[str, Any]] | None = None) -> "RateLimiter":
+        """Configured once at startup from MDM_RATE_LIMIT_* (RPM, WINDOW_S, KEY, MAX_KEYS, SQLITE)"""
+        def _number(name, default, cast):
+            try:
+                return cast(os.environ.get(name, default))
+            except ValueError:
+                return cast(default)
+
+        max_keys = _number("MDM_RATE_LIMIT_MAX_KEYS", 100_000, int)
+        sqlite_path = os.environ.get("MDM_RATE_LIMIT_SQLITE")
+        store = SQLiteRateLimitStore(sqlite_path, max_keys) if sqlite_path else MemoryRateLimitStore(max_keys)
+        key_mode = os.environ.get("MDM_RATE_LIMIT_KEY", "ip").lower()
+        return cls(
+            store,
+            rpm=_number("MDM_RATE_LIMIT_RPM", 120, int),
+            window_s=_number("MDM_RATE_LIMIT_WINDOW_S", 60, float),
+            key_mode=key_mode if key_mode in cls.KEY_MODES else "ip",
+            verify_api_key=verify_api_key,
+            verify_token=verify_token,
+        )
@@ -1,12 +1,70 @@
 from __future__ import annotations
 
-from typing import Dict, List, Tuple
-import math
+from typing import Dict, List, Sequence, Tuple
 
+import numpy as np
 
-def _entropy(probabilities: List[float]) -> float:
-    eps = 1e-12
-    return -sum(p * math.log(max(p, eps)) for p in probabilities)
+_EPS = 1e-12
+
+
+def _entropy(probabilities: np.ndarray) -> np.ndarray:
+    """Shannon entropy (nats) along the last axis"""
+    p = np.asarray(probabilities, dtype=np.float64)
+    return -(p * np.log(np.maximum(p, _EPS))).sum(axis=-1)
+
+
+def eig_scores(
+    posterior: Sequence[float],
+    likelihood: np.ndarray,
+    no_likelihood: np.ndarray | None = None,
+    min_answer_prob: float = 1e-9,
+) -> np.ndarray:
+    """Expected entropy reduction of asking each symptom (yes/no), all at once.
+
+    Inputs:
+      - posterior: (D,) current belief over diseases
+      - likelihood: (S, D) P(yes | disease) per candidate symptom
+      - no_likelihood: (S, D) P(no | disease); defaults to 1 - likelihood
+
+    Returns: (S,) EIG per symptom; 0 where either answer has prior below min_answer_prob.
+    """
+    p = np.asarray(posterior, dtype=np.float64)
+    py = np.asarray(likelihood, dtype=np.float64)
+    pn = 1.0 - py if no_likelihood is None else np.asarray(no_likelihood, dtype=np.float64)
+    joint_yes = py * p  # (S, D) unnormalized posteriors
+    joint_no = pn * p
+    p_yes = joint_yes.sum(axis=1)
+    p_no = 1.0 - p_yes
+    valid = (p_yes > min_answer_prob) & (p_no > min_answer_prob)
+    z_yes = np.where(valid, p_yes, 1.0)[:, None]
+    z_no = np.where(valid, joint_no.sum(axis=1), 1.0)[:, None]
+    h_yes = _entropy(joint_yes / z_yes)
+    h_no = _entropy(joint_no / np.where(z_no > 0, z_no, _EPS))
+    eig = _entropy(p) - (p_yes * h_yes + p_no * h_no)
+    return np.where(valid, eig, 0.0)
+
+
+def rank_by_eig(
+    posterior: Sequence[float],
+    likelihood: np.ndarray,
+    candidates: Sequence[int] | None = None,
+    k: int | None = None,
+    no_likelihood: np.ndarray | None = None,
+) -> List[Tuple[int, float]]:
+    """Top-k (candidate, EIG) pairs, best first; ties keep candidate order.
+
+    likelihood rows are indexed by candidate (e.g. symptom id); candidates defaults to
+    every row.
+    """
+    rows = np.arange(len(likelihood)) if candidates is None else np.asarray(list(candidates), dtype=np.int64)
+    if len(rows) == 0:
+        return []
+    scores = eig_scores(posterior, np.asarray(likelihood)[rows],
+                        None if no_likelihood is None else np.asarray(no_likelihood)[rows])
+    order = np.lexsort((np.arange(len(rows)), -scores))
+    if k is not None:
+        order = order[:max(0, int(k))]
+    return [(int(rows[i]), float(scores[i])) for i in order]
 
 
 def expected_information_gain(
@@ -17,36 +75,21 @@ def expected_information_gain(
 
     Inputs:
       - disease_probs: current posterior over diseases
-      - symptom_to_likelihood: map symptom -> (P(yes|disease), P(no|disease)) approximations
+      - symptom_to_likelihood: map symptom -> (P(yes|disease), P(no|disease)) approximations;
+        each entry is a number shared by all diseases or a map disease -> probability
 
     Returns: list of (symptom, EIG) sorted desc.
     Simplified toy math: assumes binary answers and naive Bayes update.
     """
     diseases = list(disease_probs.keys())
-    p = [disease_probs[d] for d in diseases]
-    h_before = _entropy(p)
-
-    ranked: List[Tuple[str, float]] = []
-    for symptom, (py, pn) in symptom_to_likelihood.items():
-        # Approximate answer priors under current belief
-        p_yes = sum(disease_probs[d] * py for d in diseases)
-        p_no = 1.0 - p_yes
-
-        # Posterior if answer is yes/no (naive Bayes style, normalized)
-        def posterior(mult: float) -> List[float]:
-            unnorm = [disease_probs[d] * mult for d in diseases]
-            z = sum(unnorm) or 1e-12
-            return [u / z for u in unnorm]
-
-        p_post_yes = posterior(py)
-        p_post_no = posterior(pn)
-
-        h_yes = _entropy(p_post_yes)
-        h_no = _entropy(p_post_no)
-        eig = h_before - (p_yes * h_yes + p_no * h_no)
-        ranked.append((symptom, eig))
-
-    ranked.sort(key=lambda x: x[1], reverse=True)
-    return ranked
+    symptoms = list(symptom_to_likelihood.keys())
 
+    def _row(value) -> List[float]:
+        if isinstance(value, dict):
+            return [float(value.get(d, 0.0)) for d in diseases]
+        return [float(value)] * len(diseases)
 
+    py = np.array([_row(symptom_to_likelihood[s][0]) for s in symptoms]).reshape(len(symptoms), len(diseases))
+    pn = np.array([_row(symptom_to_likelihood[s][1]) for s in symptoms]).reshape(len(symptoms), len(diseases))
+    ranked = rank_by_eig([disease_probs[d] for d in diseases], py, no_likelihood=pn)
+    return [(symptoms[i], eig) for i, eig in ranked]
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+# step(answers) -> (posterior, next symptom id or None); answers is {sid: {answer, severity}}
+Step = Callable[[Dict[int, dict]], Tuple[Sequence[float], Optional[int]]]
+KeyFn = Callable[[Dict[int, dict]], Hashable]
+
+FORMAT = 1
+
+
+def _branches(yes_severity: float | None) -> Tuple[Tuple[int, dict], Tuple[int, dict]]:
+    # (node slot, answer) per branch; 'unknown' shares the 'no' branch when the key treats them alike
+    return (2, {"answer": "yes", "severity": yes_severity}), (3, {"answer": "no", "severity": None})
+
+
+def build_policy_tree(step: Step, depth: int, model_version: str,
+                      yes_severity: float | None = None) -> Dict[str, Any]:
+    """Expand the adaptive policy from an empty session to `depth` answers.
+
+    Every node records the posterior and the question step() picks there; its children
+    answer that question yes (at yes_severity) or no. Nodes are a flat breadth-first
+    list of [next_sid, posterior, yes_child, no_child] (children are indices or None),
+    so a depth-d tree has at most 2 ** (d + 1) - 1 nodes and as many step() calls.
+    """
+    nodes: List[list] = []
+    queue: "deque[Tuple[Dict[int, dict], int]]" = deque([({}, 0)])
+    while queue:
+        answers, level = queue.popleft()
+        probs, sid = step(answers)
+        node = [sid, [float(p) for p in probs], None, None]
+        if sid is not None and level < int(depth):
+            for slot, info in _branches(yes_severity):
+                node[slot] = len(nodes) + len(queue) + 1
+                queue.append(({**answers, sid: info}, level + 1))
+        nodes.append(node)
+    return {"format": FORMAT, "model_version": model_version, "depth": int(depth),
+            "yes_severity": yes_severity, "nodes": nodes}
+
+
+def save_policy_tree(artifact: Dict[str, Any], path: str) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(artifact, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+class PolicyTree:
+    """Read-only lookup of a built policy: (posterior, next question) per answer set.
+
+    Nodes are indexed by key_fn(answers), the canonical answer-set key the caller also
+    uses for its memo, so any session whose answers lie on the tree is one dict lookup
+    regardless of answer order.
+    """
+
+    def __init__(self, artifact: Dict[str, Any], key_fn: KeyFn):
+        if artifact.get("format") != FORMAT:
+            raise ValueError(f"unsupported policy tree format: {artifact.get('format')!r}")
+        self.model_version = artifact["model_version"]
+        self.depth = int(artifact["depth"])
+        nodes = artifact["nodes"]
+        self._index: Dict[Hashable, Tuple[List[float], Optional[int]]] = {}
+        stack: List[Tuple[int, Dict[int, dict]]] = [(0, {})]
+        while stack:
+            i, answers = stack.pop()
+            sid, probs, *children = nodes[i]
+            self._index[key_fn(answers)] = (probs, sid)
+            for (_, info), child in zip(_branches(artifact["yes_severity"]), children):
+                if child is not None:
+                    stack.append((child, {**answers, sid: info}))
+
+    @classmethod
+    def load(cls, path: str, key_fn: KeyFn) -> "PolicyTree":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), key_fn)
+
+    def lookup(self, key: Hashable) -> Tuple[List[float], Optional[int]] | None:
+        return self._index.get(key)
+
+    def __len__(self) -> int:
+        return len(self._index)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+class InferenceBatcher:
+    """Micro-batches single-case inference across concurrent request threads.
+
+    submit() queues one feature row and blocks. The worker collects rows for up to
+    window_ms after the first one queued, or until max_batch are queued, then runs one
+    predict_proba_batch plus one apply_clinical_rules_batch per model in the batch
+    (requests pinned to an older model during a hot reload are batched separately)
+    and hands each caller its row.
+
+    Inputs:
+      - max_batch: rows per forward pass; <= 1 runs every submit inline
+      - window_ms: collection window measured from the oldest queued row; a lone row
+        waits out the whole window. 0 means no wait: only rows that queued during the
+        previous pass are batched together
+      - observer: optional callback(stage, seconds) after each 'forward' and 'rules' pass
+    """
+
+    def __init__(self, max_batch: int = 64, window_ms: float = 2.0,
+                 observer: Callable[[str, float], None] | None = None):
+        self.max_batch = int(max_batch)
+        self.window_s = max(0.0, float(window_ms)) / 1000.0
+        self._observer = observer
+        self._cond = threading.Condition()
+        # (model, feature row, future, enqueue time)
+        self._pending: "deque[Tuple[Any, Sequence[float], Future, float]]" = deque()
+        self._worker: threading.Thread | None = None
+        self._counters = {"batches": 0, "rows": 0, "full_batches": 0, "largest_batch": 0, "errors": 0}
+        self._wait_s_total = 0.0
+
+    def submit(self, model, features: Sequence[float]) -> np.ndarray:
+        """Rule-adjusted class probabilities (D,) for one feature row"""
+        if self.max_batch <= 1:
+            return self._run(model, np.asarray([features], dtype=np.float64))[0]
+        future: Future = Future()
+        with self._cond:
+            self._pending.append((model, features, future, time.monotonic()))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._loop, name="inference-batcher", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return future.result()
+
+    def _run(self, model, features: np.ndarray) -> np.ndarray:
+        start = time.perf_counter()
+        probs = model.predict_proba_batch(features)
+        ruled = time.perf_counter()
+        out = model.apply_clinical_rules_batch(probs, features)
+        if self._observer is not None:
+            self._observer("forward", ruled - start)
+            self._observer("rules", time.perf_counter() - ruled)
+        return out
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # The window runs from the oldest row's arrival, so rows that queued while
+                # the previous batch ran are not held back a second time
+                deadline = self._pending[0][3] + self.window_s
+                while len(self._pending) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = [self._pending.popleft() for _ in range(min(self.max_batch, len(self._pending)))]
+            self._execute(batch)
+
+    def _execute(self, batch: List[tuple]) -> None:
+        groups: Dict[int, List[tuple]] = {}
+        for item in batch:
+            groups.setdefault(id(item[0]), []).append(item)
+        now = time.monotonic()
+        for items in groups.values():
+            model = items[0][0]
+            try:
+                out = self._run(model, np.asarray([item[1] for item in items], dtype=np.float64))
+            except Exception as exc:
+                with self._cond:
+                    self._counters["errors"] += 1
+                for item in items:
+                    item[2].set_exception(exc)
+                continue
+            for row, item in zip(out, items):
+                item[2].set_result(row)
+        with self._cond:
+            self._counters["batches"] += 1
+            self._counters["rows"] += len(batch)
+            self._counters["full_batches"] += int(len(batch) >= self.max_batch)
+            self._counters["largest_batch"] = max(self._counters["largest_batch"], len(batch))
+            self._wait_s_total += sum(now - item[3] for item in batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            rows = self._counters["rows"]
+            return dict(
+                self._counters,
+                queued=len(self._pending),
+                max_batch=self.max_batch,
+                window_ms=self.window_s * 1000.0,
+                mean_batch=rows / self._counters["batches"] if self._counters["batches"] else 0.0,
+                mean_queue_wait_ms=1000.0 * self._wait_s_total / rows if rows else 0.0,
+            )
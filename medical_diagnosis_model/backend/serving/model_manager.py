@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+
+def model_version(path: str) -> str:
+    """Content hash of a model file (stable across workers and restarts)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def validate_model(model, num_classes: int | None = None) -> None:
+    """Probe forward pass; raises ValueError unless it yields finite probability rows"""
+    if not model.network:
+        raise ValueError("model has no network")
+    probe = np.zeros((2, model.num_features))
+    probe[1, :] = 1.0
+    try:
+        probs = np.asarray(model.predict_proba_batch(probe), dtype=np.float64)
+    except Exception as exc:
+        raise ValueError(f"forward pass failed: {exc}") from exc
+    expected = (2, num_classes if num_classes is not None else model.num_diseases)
+    if probs.shape != expected:
+        raise ValueError(f"expected output shape {expected}, got {probs.shape}")
+    if not np.all(np.isfinite(probs)) or not np.allclose(probs.sum(axis=1), 1.0, atol=1e-6):
+        raise ValueError("output rows are not finite probability distributions")
+
+
+class LoadedModel:
+    """A (model, version) pair, never mutated once published; handlers keep one per request"""
+
+    __slots__ = ("model", "version", "path", "loaded_at")
+
+    def __init__(self, model, version: str, path: str):
+        self.model = model
+        self.version = version
+        self.path = path
+        self.loaded_at = time.time()
+
+
+class ModelManager:
+    """Loads a model artifact off to the side and atomically swaps it in.
+
+    The active LoadedModel is replaced by one reference assignment, so requests that
+    already hold the previous one finish on it. A reload that fails to load or to
+    validate leaves the active model untouched and is recorded in status().
+
+    Inputs:
+      - factory: builds an empty model (e.g. ClinicalReasoningNetwork with app settings)
+      - path: model artifact (.json or .bin) to (re)load
+      - num_classes: expected output width checked by validate_model
+      - load_options: extra keyword arguments for model.load_model
+    """
+
+    def __init__(self, factory: Callable[[], Any], path: str, num_classes: int | None = None,
+                 load_options: Dict[str, Any] | None = None):
+        self.factory = factory
+        self.path = path
+        self.num_classes = num_classes
+        self.load_options = dict(load_options or {})
+        self._active: LoadedModel | None = None
+        self._load_lock = threading.Lock()
+        self._listeners: List[Callable[[LoadedModel], None]] = []
+        self._reload_thread: threading.Thread | None = None
+        self._watch_thread: threading.Thread | None = None
+        self._watch_stop = threading.Event()
+        self._status: Dict[str, Any] = {"state": "idle", "last_error": None, "reloads": 0, "failures": 0}
+
+    @property
+    def active(self) -> LoadedModel | None:
+        return self._active
+
+    def add_listener(self, callback: Callable[[LoadedModel], None]) -> None:
+        """callback(new_loaded) runs after every swap (e.g. to clear response caches)"""
+        self._listeners.append(callback)
+
+    def install(self, model, path: str | None = None, version: str | None = None) -> LoadedModel:
+        """Validate an already-built model and swap it in; version defaults to the file's hash"""
+        path = path or self.path
+        validate_model(model, self.num_classes)
+        loaded = LoadedModel(model, version or model_version(path), path)
+        self._active = loaded
+        self._status["state"] = "idle"
+        for callback in self._listeners:
+            callback(loaded)
+        return loaded
+
+    def load(self, path: str | None = None) -> LoadedModel:
+        """Load, validate and swap in synchronously; raises and keeps the old model on failure"""
+        with self._load_lock:
+            self._status["state"] = "loading"
+            try:
+                path = path or self.path
+                # Hash first: if the file changes mid-load, the watcher sees a new signature
+                version = model_version(path)
+                model = self.factory()
+                model.load_model(path, **self.load_options)
+                loaded = self.install(model, path, version)
+            except Exception as exc:
+                self._status.update(state="failed", last_error=f"{type(exc).__name__}: {exc}")
+                self._status["failures"] += 1
+                raise
+            self._status.update(state="idle", last_error=None)
+            self._status["reloads"] += 1
+            return loaded
+
+    def reload_async(self) -> bool:
+        """Start a background reload; False if one is already running"""
+        with self._load_lock:
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return False
+            self._status["state"] = "loading"
+            self._reload_thread = threading.Thread(target=self._reload_quietly, name="model-reload", daemon=True)
+            self._reload_thread.start()
+        return True
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Block until a background reload started by reload_async finishes"""
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _reload_quietly(self) -> None:
+        try:
+            self.load()
+        except Exception:
+            pass  # recorded in status(); the active model keeps serving
+
+    def start_watch(self, interval_s: float) -> None:
+        """Poll the artifact's stat signature and reload when it changes"""
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=self._watch, args=(float(interval_s),),
+                                              name="model-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watch(self) -> None:
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _watch(self, interval_s: float) -> None:
+        seen = self._signature()
+        while not self._watch_stop.wait(interval_s):
+            current = self._signature()
+            if current is None or current == seen:
+                continue
+            # Remember the signature even if the reload fails so a bad artifact is tried once
+            seen = current
+            self._reload_quietly()
+
+    def status(self) -> Dict[str, Any]:
+        active = self._active
+        return dict(
+            self._status,
+            version=active.version if active else None,
+            path=active.path if active else self.path,
+            loaded_at=active.loaded_at if active else None,
+        )
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+import numpy as np
+
+
+def _encode_inference(cache: Dict[str, Any]) -> Dict[str, Any]:
+    # Feature rows are sparse; pre-activations go as exact little-endian float64
+    features = np.asarray(cache["features"], dtype=np.float64)
+    hidden = np.asarray(cache["hidden"], dtype="<f8")
+    return {
+        "v": cache["version"],
+        "n": int(features.size),
+        "f": [[int(i), float(features[i])] for i in np.flatnonzero(features)],
+        "h": base64.b64encode(hidden.tobytes()).decode("ascii"),
+    }
+
+
+def _decode_inference(doc: Dict[str, Any]) -> Dict[str, Any]:
+    features = np.zeros(doc["n"], dtype=np.float64)
+    for i, value in doc["f"]:
+        features[i] = value
+    hidden = np.frombuffer(base64.b64decode(doc["h"]), dtype="<f8").astype(np.float64)
+    return {"version": doc["v"], "features": features, "hidden": hidden}
+
+
+def encode_session(session: Dict[str, Any]) -> bytes:
+    """Compact JSON for an adaptive session ({answers: {sid: {answer, severity}}, threshold, max_q, num_q},
+    plus the optional cached inference state {version, features, hidden})"""
+    answers = [[sid, info.get("answer"), info.get("severity")] for sid, info in session.get("answers", {}).items()]
+    doc = {"a": answers, "t": session.get("threshold"), "m": session.get("max_q"), "n": session.get("num_q", 0)}
+    if session.get("inference"):
+        doc["i"] = _encode_inference(session["inference"])
+    return json.dumps(doc, separators=(",", ":")).encode("utf-8")
+
+
+def decode_session(data: bytes) -> Dict[str, Any]:
+    doc = json.loads(data)
+    session = {
+        "answers": {int(sid): {"answer": answer, "severity": severity} for sid, answer, severity in doc["a"]},
+        "threshold": doc["t"],
+        "max_q": doc["m"],
+        "num_q": doc["n"],
+    }
+    if "i" in doc:
+        session["inference"] = _decode_inference(doc["i"])
+    return session
+
+
+class MemorySessionStore:
+    """Per-process sessions: encoded, expiring ttl_s after the last put, LRU-bounded.
+
+    get returns a fresh copy; callers put it back after changing it (as with the
+    shared backend, so handlers behave the same on either).
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_s: float = 1800.0, clock: Callable[[], float] = time.time):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, session_id: str, default=None):
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return default
+            if entry[0] <= self._clock():
+                del self._entries[session_id]
+                return default
+            return decode_session(entry[1])
+
+    def put(self, session_id: str, session: Dict[str, Any]) -> None:
+        data = encode_session(session)
+        with self._lock:
+            now = self._clock()
+            self._entries.pop(session_id, None)
+            self._entries[session_id] = (now + self.ttl_s, data)
+            # Insertion order is expiry order, so the head is both LRU and soonest to expire
+            while self._entries:
+                head_id, (expires, _) = next(iter(self._entries.items()))
+                if expires > now and len(self._entries) <= self.max_entries:
+                    break
+                del self._entries[head_id]
+
+    def pop(self, session_id: str, default=None):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is None or entry[0] <= self._clock():
+            return default
+        return decode_session(entry[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Live sessions: expired ones are pruned first (from the head, in expiry order)"""
+        with self._lock:
+            now = self._clock()
+            while self._entries:
+                head_id, (expires, _) = next(iter(self._entries.items()))
+                if expires > now:
+                    break
+                del self._entries[head_id]
+            return len(self._entries)
+
+
+class SQLiteSessionStore:
+    """Sessions in a SQLite (WAL) file shared by every worker on a host.
+
+    Same interface and expiry as MemorySessionStore; every prune_every puts, expired
+    rows are deleted and the table is trimmed to the max_entries latest-expiring.
+    Concurrent answers to one session are last-writer-wins.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, ttl_s: float = 1800.0,
+                 prune_every: int = 256, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self.prune_every = max(1, int(prune_every))
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS adaptive_sessions ("
+            "id TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS adaptive_sessions_expires ON adaptive_sessions(expires)")
+
+    def get(self, session_id: str, default=None):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM adaptive_sessions WHERE id = ? AND expires > ?",
+                                     (session_id, self._clock())).fetchone()
+        return decode_session(row[0]) if row else default
+
+    def put(self, session_id: str, session: Dict[str, Any]) -> None:
+        data = encode_session(session)
+        with self._lock:
+            now = self._clock()
+            self._conn.execute("INSERT OR REPLACE INTO adaptive_sessions (id, data, expires) VALUES (?, ?, ?)",
+                               (session_id, data, now + self.ttl_s))
+            self._puts += 1
+            if self._puts % self.prune_every == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._conn.execute("DELETE FROM adaptive_sessions WHERE expires <= ?", (now,))
+                    self._conn.execute(
+                        "DELETE FROM adaptive_sessions WHERE id IN ("
+                        "SELECT id FROM adaptive_sessions ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+
+    def pop(self, session_id: str, default=None):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data, expires FROM adaptive_sessions WHERE id = ?",
+                                         (session_id,)).fetchone()
+                self._conn.execute("DELETE FROM adaptive_sessions WHERE id = ?", (session_id,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None or row[1] <= self._clock():
+            return default
+        return decode_session(row[0])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM adaptive_sessions")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM adaptive_sessions WHERE expires > ?",
+                                      (self._clock(),)).fetchone()[0]
+
+
+def session_store_from_env():
+    """MDM_SESSION_SQLITE=/path shares sessions across workers; else per-process memory"""
+    def _number(name, default, cast):
+        try:
+            return cast(os.environ.get(name, default))
+        except ValueError:
+            return cast(default)
+
+    max_entries = _number("MDM_SESSION_MAX", 10_000, int)
+    ttl_s = _number("MDM_SESSION_TTL_S", 1800, float)
+    path = os.environ.get("MDM_SESSION_SQLITE")
+    if path:
+        return SQLiteSessionStore(path, max_entries=max_entries, ttl_s=ttl_s)
+    return MemorySessionStore(max_entries=max_entries, ttl_s=ttl_s)
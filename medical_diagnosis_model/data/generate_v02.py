@@ -34,16 +34,14 @@ def _load_schema():
 
 
 def _sample_case(disease_id: int, diseases: dict, symptoms: dict, explicit_neg: bool) -> Tuple[Dict[str, float], str]:
-    dis = diseases[disease_id]
-    name = dis["name"]
-    pats = dis.get("symptom_patterns", {})
+    # Compiled once for DISEASES_V2 (see _load_schema for the import path)
+    from versions.v2.medical_disease_schema_v2 import compile_symptom_patterns
+    name = diseases[disease_id]["name"]
     out: Dict[str, float] = {}
     # Positive sampling from patterns
-    for sid, pat in pats.items():
+    for sid, freq, sev_lo, sev_hi in compile_symptom_patterns(diseases).patterns[disease_id]:
         if sid not in symptoms:
             continue
-        freq = pat.get("frequency", 0.0)
-        sev_lo, sev_hi = pat.get("severity_range", (0.2, 0.6))
         if random.random() < freq:
             sev = random.uniform(sev_lo, sev_hi)
             out[symptoms[sid]["name"]] = round(min(max(sev * 10.0, 0.0), 10.0), 1)
@@ -3,6 +3,8 @@ Medical Symptom Schema
 A comprehensive mapping of symptoms with medical terminology and classifications
 """
 
+import os
+
 # Symptom categories for better organization
 SYMPTOM_CATEGORIES = {
     "General/Constitutional": [0, 1, 2],
@@ -284,30 +286,87 @@ SYMPTOMS = {
     }
 }
 
+# Lookup indexes, built once at import (call rebuild_symptom_indexes() after editing SYMPTOMS)
+CLINICAL_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configs", "clinical_schema.yaml")
+
+
+def _fold(text):
+    return str(text).casefold()
+
+
+def _load_synonyms(path):
+    """Map of symptom name -> synonyms from the clinical schema; empty when PyYAML or the file is
+    unavailable or malformed, leaving lookups to the built-in names and medical terms"""
+    try:
+        import yaml
+    except ImportError:
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            schema = yaml.safe_load(f) or {}
+        return {name: list((meta or {}).get("synonyms") or [])
+                for name, meta in (schema.get("symptoms") or {}).items()}
+    except (OSError, yaml.YAMLError, AttributeError, TypeError):
+        return {}
+
+
+def rebuild_symptom_indexes(schema_path=CLINICAL_SCHEMA_PATH):
+    """Rebuild the name, medical term, synonym and ICD-10 prefix indexes from SYMPTOMS"""
+    global _NAME_INDEX, _MEDICAL_TERM_INDEX, _SYNONYM_INDEX, _ICD10_TRIE
+    names, terms, synonyms = {}, {}, {}
+    # Trie node: {"ids": symptom ids with codes under this prefix, "next": {char: node}}
+    trie = {"ids": [], "next": {}}
+    for sid, symptom in SYMPTOMS.items():
+        # First definition wins, like the linear scans these indexes replace
+        names.setdefault(_fold(symptom['name']), sid)
+        terms.setdefault(_fold(symptom['medical_term']), sid)
+        node = trie
+        node["ids"].append(sid)
+        for ch in symptom['icd_10']:
+            node = node["next"].setdefault(ch, {"ids": [], "next": {}})
+            node["ids"].append(sid)
+    for name, words in _load_synonyms(schema_path).items():
+        sid = names.get(_fold(name))
+        if sid is not None:
+            for word in words:
+                synonyms.setdefault(_fold(word), sid)
+    _NAME_INDEX, _MEDICAL_TERM_INDEX, _SYNONYM_INDEX, _ICD10_TRIE = names, terms, synonyms, trie
+
+
 # Function to get symptom by name
 def get_symptom_by_name(name):
     """Find symptom ID by common name"""
-    for sid, symptom in SYMPTOMS.items():
-        if symptom['name'].lower() == name.lower():
-            return sid, symptom
-    return None, None
+    sid = _NAME_INDEX.get(_fold(name))
+    return (sid, SYMPTOMS[sid]) if sid is not None else (None, None)
 
 # Function to get symptom by medical term
 def get_symptom_by_medical_term(term):
     """Find symptom ID by medical terminology"""
-    for sid, symptom in SYMPTOMS.items():
-        if symptom['medical_term'].lower() == term.lower():
-            return sid, symptom
+    sid = _MEDICAL_TERM_INDEX.get(_fold(term))
+    return (sid, SYMPTOMS[sid]) if sid is not None else (None, None)
+
+# Function to resolve free text (name, medical term or schema synonym)
+def find_symptom(text):
+    """Find symptom ID by common name, then medical term, then synonym from configs/clinical_schema.yaml"""
+    key = _fold(text)
+    for index in (_NAME_INDEX, _MEDICAL_TERM_INDEX, _SYNONYM_INDEX):
+        sid = index.get(key)
+        if sid is not None:
+            return sid, SYMPTOMS[sid]
     return None, None
 
 # Function to search symptoms by ICD-10 code
 def get_symptoms_by_icd10_prefix(prefix):
     """Find all symptoms matching an ICD-10 code prefix"""
-    matching = []
-    for sid, symptom in SYMPTOMS.items():
-        if symptom['icd_10'].startswith(prefix):
-            matching.append((sid, symptom))
-    return matching
+    node = _ICD10_TRIE
+    for ch in prefix:
+        node = node["next"].get(ch)
+        if node is None:
+            return []
+    return [(sid, SYMPTOMS[sid]) for sid in node["ids"]]
+
+
+rebuild_symptom_indexes()
 
 # Severity interpretation functions
 def interpret_severity(symptom_id, value):
@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _api_ready():
+    """API tests call endpoints right away; wait for the background warm start first"""
+    from backend import app as app_module
+    from medical_diagnosis_model.backend import app as package_app_module
+    for module in (app_module, package_app_module):
+        assert module.wait_until_ready(600), module._WARM_START["error"]
@@ -0,0 +1,88 @@
+import random
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from backend.serving.batcher import InferenceBatcher
+from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
+
+
+def _model(seed):
+    random.seed(seed)
+    m = ClinicalReasoningNetwork(hidden_neurons=4)
+    m.network = m._initialize_network()
+    return m
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    presence = (rng.random((n, 30)) < 0.2).astype(float)
+    return np.hstack([presence, presence * rng.random((n, 30))])
+
+
+def _submit_all(batcher, jobs):
+    out = [None] * len(jobs)
+    barrier = threading.Barrier(len(jobs))
+
+    def run(i, model, row):
+        barrier.wait()
+        out[i] = batcher.submit(model, row.tolist())
+
+    threads = [threading.Thread(target=run, args=(i, m, r)) for i, (m, r) in enumerate(jobs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def test_concurrent_rows_share_batches_and_match_direct_inference():
+    a, b = _model(1), _model(2)
+    rows = _rows(24)
+    jobs = [(a if i % 3 else b, row) for i, row in enumerate(rows)]
+    batcher = InferenceBatcher(max_batch=16, window_ms=50)
+    out = _submit_all(batcher, jobs)
+    for (m, row), got in zip(jobs, out):
+        direct = m._apply_clinical_rules(m._predict_proba(row.tolist()), list(np.flatnonzero(row[:30])), row[30:].tolist(), None)
+        assert np.allclose(got, direct, rtol=1e-9, atol=1e-12)
+    stats = batcher.stats()
+    assert stats["rows"] == 24 and stats["batches"] < 24 and stats["largest_batch"] <= 16
+
+
+def test_errors_reach_every_waiter_and_inline_mode():
+    class Broken:
+        def predict_proba_batch(self, features):
+            raise RuntimeError("boom")
+
+    batcher = InferenceBatcher(max_batch=8, window_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit(Broken(), [0.0] * 60)
+    assert batcher.stats()["errors"] == 1
+
+    m, row = _model(3), _rows(1)[0]
+    inline = InferenceBatcher(max_batch=1)
+    assert np.allclose(inline.submit(m, row), batcher.submit(m, row))
+    assert inline.stats()["batches"] == 0
+
+
+def test_rows_arriving_within_the_window_share_a_batch():
+    m, rows = _model(4), _rows(2)
+    batcher = InferenceBatcher(max_batch=16, window_ms=100)
+    first = threading.Thread(target=batcher.submit, args=(m, rows[0].tolist()))
+    first.start()
+    time.sleep(0.001)
+    batcher.submit(m, rows[1].tolist())
+    first.join()
+    stats = batcher.stats()
+    assert stats["batches"] == 1 and stats["largest_batch"] == 2
+
+
+def test_zero_window_does_not_wait():
+    m, row = _model(4), _rows(1)[0]
+    batcher = InferenceBatcher(max_batch=16, window_ms=0)
+    batcher.submit(m, row)  # start the worker
+    start = time.perf_counter()
+    batcher.submit(m, row)
+    assert time.perf_counter() - start < 0.25 and batcher.stats()["batches"] == 2
@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+
+from versions.v2.calibration import fit_temperature, fit_vector_scaling, nll
+from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
+
+
+def _logits(n=300, n_classes=5, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, n_classes, n)
+    logits = rng.normal(size=(n, n_classes)) + 4.0 * np.eye(n_classes)[labels]
+    # Distort per class so vector scaling has something to fix
+    return logits * np.linspace(0.5, 2.0, n_classes), labels
+
+
+def test_fit_temperature_matches_dense_search():
+    logits, labels = _logits()
+    T = fit_temperature(logits, labels)
+    grid = np.linspace(0.2, 5.0, 4801)
+    best = grid[np.argmin([nll(logits / t, labels) for t in grid])]
+    assert abs(T - best) < 2e-3
+    assert nll(logits / T, labels) <= nll(logits / best, labels) + 1e-12
+
+
+def test_vector_scaling_improves_on_temperature():
+    logits, labels = _logits(seed=1)
+    T = fit_temperature(logits, labels)
+    scale, bias = fit_vector_scaling(logits, labels, T)
+    assert scale.shape == bias.shape == (5,)
+    assert nll(logits * scale + bias, labels) < nll(logits / T, labels)
+
+
+def test_vector_calibration_is_applied_and_persisted(tmp_path):
+    random.seed(0)
+    m = ClinicalReasoningNetwork(hidden_neurons=8, epochs=3, batch_size=16, calibration="vector")
+    m.train(cases_per_disease=10, verbose=False)
+    assert m.temperature == 1.0 and m.class_scaling is not None
+    features = [1, 0, 0, 1] + [0] * 26 + [0.8, 0, 0, 0.6] + [0] * 26
+    probs = m._predict_proba(features)
+    for name in ("m.json", "m.bin"):
+        loaded = ClinicalReasoningNetwork()
+        m.save_model(str(tmp_path / name), binary=False)
+        loaded.load_model(str(tmp_path / name))
+        assert loaded.calibration == "vector"
+        assert np.allclose(loaded._predict_proba(features), probs)
@@ -0,0 +1,154 @@
+import math
+import random
+
+import numpy as np
+
+from versions.v2.clinical_rules_engine import CompiledClinicalRules
+from versions.v2.medical_disease_schema_v2 import (
+    DISEASES_V2, SYNDROMES, get_appropriate_differential, get_syndrome_from_symptoms
+)
+from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
+
+
+def _idx(name):
+    for did, disease in DISEASES_V2.items():
+        if disease['name'] == name:
+            return did
+    return None
+
+
+def _scalar_rules(nn_outputs, symptom_ids, sev):
+    """Per-case reference implementation of the rules (the pre-compilation algorithm)"""
+    adjusted = list(nn_outputs)
+    syndrome = get_syndrome_from_symptoms(symptom_ids)
+    appropriate = set(get_appropriate_differential(syndrome))
+    strep, uti = _idx("Streptococcal Pharyngitis"), _idx("Urinary Tract Infection")
+    uri, ili = _idx("Viral Upper Respiratory Infection"), _idx("Influenza-like Illness")
+    covid, pna = _idx("COVID-19-like Illness"), _idx("Pneumonia Syndrome")
+
+    centor = int(0 in symptom_ids and sev[0] > 0.3) + int(3 not in symptom_ids) + int(6 in symptom_ids and sev[6] > 0.5)
+    adjusted[strep] *= 0.1 if centor <= 1 else (0.5 if centor == 2 else 1.5)
+    for did, disease in DISEASES_V2.items():
+        missing = sum(1 for sid, p in disease['symptom_patterns'].items()
+                      if p.get('frequency', 0.0) >= 0.85 and sid not in symptom_ids)
+        if missing:
+            adjusted[did] *= 0.6 ** missing
+    gu_missing = int(26 not in symptom_ids) + int(27 not in symptom_ids)
+    adjusted[uti] *= {0: 1.0, 1: 0.2, 2: 0.03}[gu_missing]
+
+    gated = bool(appropriate)
+    if gated:
+        allowed = appropriate | {"Viral Syndrome"}
+        logits = [math.log(max(p, 1e-12)) + (1.0 if DISEASES_V2[did]['name'] in allowed else -1.0)
+                  for did, p in enumerate(adjusted)]
+        fever, fatigue, cough, dyspnea, sore = sev[0], sev[1], sev[3], sev[4], sev[6]
+        rhin, cong, nausea, myal, chest, anos = sev[7], sev[8], sev[9], sev[16], sev[18], sev[28]
+        gu_absent = 26 not in symptom_ids and 27 not in symptom_ids
+        if rhin > 0.3 and cong > 0.3 and cough > 0.2:
+            logits[uri] += 1.5
+        if fever < 0.6 and myal < 0.6:
+            logits[uri] += 0.5
+        if (rhin > 0.3 or cong > 0.3) and gu_absent:
+            logits[uti] -= 6.0
+        if anos < 0.6 and fever < 0.6 and cough >= 0.3 and (rhin > 0.3 or cong > 0.3):
+            logits[uri] += 1.0
+        if anos < 0.6 and cough < 0.2 and sore >= 0.6:
+            logits[covid] -= 3.0
+            logits[uri] += 0.5
+        if fever >= 0.6 and myal >= 0.6:
+            logits[ili] += 2.5
+        if fatigue >= 0.7:
+            logits[ili] += 0.5
+        if myal < 0.3 and cough < 0.2 and sore >= 0.6:
+            logits[ili] -= 3.5
+            logits[uri] += 1.5
+        if anos >= 0.8:
+            logits[covid] += 2.5
+        if nausea >= 0.3 and cough > 0.2:
+            logits[covid] += 0.5
+        if dyspnea >= 0.4:
+            logits[covid] += 0.3
+        if dyspnea >= 0.5 and chest >= 0.4 and cough >= 0.5:
+            logits[pna] += 2.5
+        if anos < 0.6 and dyspnea >= 0.6 and chest >= 0.4 and fever >= 0.6 and cough >= 0.6:
+            logits[pna] += 5.0
+            logits[covid] -= 8.0
+        if gu_absent:
+            logits[uti] -= 12.0 if ("Respiratory" in syndrome or syndrome == "Undifferentiated") else 8.0
+        m = max(logits)
+        exps = [math.exp(z - m) for z in logits]
+        adjusted = [e / sum(exps) for e in exps]
+        if dyspnea >= 0.6 and chest >= 0.4 and cough >= 0.6 and anos < 0.3:
+            adjusted[pna] = max(adjusted[pna], adjusted[covid] + 0.05)
+            adjusted[covid] *= 0.1
+    total = sum(adjusted)
+    return [p / total for p in adjusted] if total > 0 else adjusted
+
+
+def _random_case(rng):
+    ids = sorted(rng.sample(range(30), rng.randint(0, 8)))
+    sev = [0.0] * 30
+    for sid in ids:
+        sev[sid] = rng.choice([0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0, rng.random()])
+    probs = [rng.random() for _ in DISEASES_V2]
+    return [p / sum(probs) for p in probs], ids, sev
+
+
+def test_syndrome_classification_matches_schema():
+    rng = random.Random(1)
+    rules = CompiledClinicalRules()
+    cases = [sorted(rng.sample(range(30), rng.randint(0, 6))) for _ in range(500)]
+    counts = np.zeros((len(cases), 30))
+    for row, ids in zip(counts, cases):
+        row[ids] = 1
+    got = rules.classify_syndromes(counts)
+    assert [SYNDROMES[k] for k in got] == [get_syndrome_from_symptoms(ids) for ids in cases]
+
+
+def test_compiled_rules_match_scalar_reference():
+    rng = random.Random(0)
+    rules = CompiledClinicalRules()
+    cases = [_random_case(rng) for _ in range(400)]
+    # Classic presentations that trigger the strongest rules
+    cases.append(([1 / 11] * 11, [0, 3, 4, 18], [0.9, 0, 0, 0.9, 0.8, 0] + [0] * 12 + [0.7] + [0] * 11))
+    cases.append(([1 / 11] * 11, [0, 6], [0.8] + [0] * 5 + [0.9] + [0] * 23))
+    for probs, ids, sev in cases:
+        expected = _scalar_rules(probs, ids, sev)
+        assert np.allclose(rules.apply_case(probs, ids, sev), expected, rtol=1e-10, atol=1e-14)
+
+    batch = np.array([c[0] for c in cases])
+    counts = np.zeros((len(cases), 30))
+    for row, (_, ids, _) in zip(counts, cases):
+        row[ids] = 1
+    out = rules.apply(batch, counts, np.array([c[2] for c in cases]))
+    assert np.allclose(out, [_scalar_rules(*c) for c in cases], rtol=1e-10, atol=1e-14)
+
+
+def test_model_batch_rules_match_per_case():
+    rng = random.Random(2)
+    m = ClinicalReasoningNetwork(hidden_neurons=4)
+    cases = [_random_case(rng) for _ in range(20)]
+    features = np.array([[1.0 if s in ids else 0.0 for s in range(30)] + sev for _, ids, sev in cases])
+    probs = np.array([c[0] for c in cases])
+    batch = m.apply_clinical_rules_batch(probs, features)
+    for row, (p, ids, sev) in zip(batch, cases):
+        assert np.allclose(row, m._apply_clinical_rules(p, ids, sev, None))
+
+
+def test_compiled_symptom_patterns_match_schema():
+    from versions.v2.medical_disease_schema_v2 import compile_symptom_patterns
+    patterns = compile_symptom_patterns()
+    assert patterns is compile_symptom_patterns(DISEASES_V2, 30)
+    for did, disease in DISEASES_V2.items():
+        spec = disease['symptom_patterns']
+        assert [row[0] for row in patterns.patterns[did]] == list(spec)
+        for sid in range(30):
+            assert patterns.defined[did, sid] == (sid in spec)
+            assert patterns.frequency[did, sid] == spec.get(sid, {}).get('frequency', 0.0)
+            if sid in spec:
+                assert (patterns.severity_low[did, sid], patterns.severity_high[did, sid]) == spec[sid]['severity_range']
+        keys = patterns.key_symptoms(did, 0.7)
+        assert sorted(keys) == sorted(s for s, p in spec.items() if p['frequency'] >= 0.7)
+        assert [spec[s]['frequency'] for s in keys] == sorted((spec[s]['frequency'] for s in keys), reverse=True)
+        assert patterns.key_symptoms(did, 0.7, strict=True) == [s for s in keys if spec[s]['frequency'] > 0.7]
+    assert not patterns.frequency.flags.writeable
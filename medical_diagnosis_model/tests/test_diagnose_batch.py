@@ -0,0 +1,44 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+
+
+def test_ndjson_batch_streams_ordered_results_and_row_errors(monkeypatch):
+    monkeypatch.delenv("MDM_API_KEY", raising=False)
+    monkeypatch.setenv("MDM_NDJSON_BATCH_ROWS", "2")
+    client = TestClient(app_module.app)
+    payloads = [
+        {"data": {"Fever": 8, "Cough": 6}, "id": "a"},
+        {"data": {"Sore Throat": 7, "Fever": 5}},
+        "{not json",
+        {"symptoms": {"Fever": 8}, "id": "c"},
+        {"data": {"Dysuria": 7, "Frequency": 6}, "has_test_results": {"UA": "positive"}},
+        {"data": {}},
+    ]
+    lines = [p if isinstance(p, str) else json.dumps(p) for p in payloads]
+    body = ("\n".join(lines[:3]) + "\n\n" + "\n".join(lines[3:])).encode()
+
+    def chunks():
+        # Chunk boundaries fall mid-line
+        for i in range(0, len(body), 17):
+            yield body[i:i + 17]
+
+    r = client.post("/api/v2/diagnose/batch", content=chunks())
+    assert r.status_code == 200 and r.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["index"] for row in rows] == list(range(len(payloads)))
+    assert rows[0]["id"] == "a" and rows[3]["id"] == "c"
+    assert "invalid JSON" in rows[2]["error"] and "error" in rows[3]
+    for row, payload in zip(rows, payloads):
+        if isinstance(payload, dict) and "data" in payload:
+            single = client.post("/api/v2/diagnose", json={k: v for k, v in payload.items() if k != "id"}).json()
+            assert row["result"]["primary_diagnosis"] == single["primary_diagnosis"]
+            assert row["result"]["model_version"] == single["model_version"]
+
+
+def test_ndjson_batch_requires_auth(monkeypatch):
+    monkeypatch.setenv("MDM_API_KEY", "testkey")
+    client = TestClient(app_module.app)
+    assert client.post("/api/v2/diagnose/batch", content=b'{"data": {}}\n').status_code == 401
@@ -0,0 +1,47 @@
+import random
+
+import numpy as np
+
+from backend import app as app_module
+from backend.sessions.session_store import decode_session, encode_session
+
+
+def _full_posterior(loaded, answers):
+    sv, sev, present = app_module._answers_to_vectors(answers)
+    return app_module._compute_adjusted_probs(sv, sev, present, loaded.model)
+
+
+def test_incremental_updates_match_full_recompute():
+    loaded = app_module._active_model()
+    rng = random.Random(7)
+    sess = {"answers": {1: {"answer": "yes", "severity": 8.0}}, "threshold": 0.85, "max_q": 10, "num_q": 0}
+    probs, _ = app_module._session_posterior(loaded, sess)
+    assert np.allclose(probs, _full_posterior(loaded, sess["answers"]), atol=1e-12)
+    for _ in range(40):  # includes re-answering earlier questions
+        sid = rng.randrange(30)
+        sess["answers"][sid] = {"answer": rng.choice(["yes", "no", "unknown"]), "severity": rng.choice([None, 2, 9])}
+        sess = decode_session(encode_session(sess))  # the cache survives the store's codec
+        probs, present = app_module._session_posterior(loaded, sess, sid)
+        assert np.allclose(probs, _full_posterior(loaded, sess["answers"]), atol=1e-9)
+        assert present == sorted(app_module._answers_to_vectors(sess["answers"])[2])
+
+
+def test_cache_from_another_model_version_is_rebuilt():
+    loaded = app_module._active_model()
+    answers = {3: {"answer": "yes", "severity": 6.0}, 0: {"answer": "yes", "severity": None}}
+    stale = {"version": "older", "features": np.zeros(60), "hidden": np.zeros(25)}
+    sess = {"answers": answers, "inference": stale}
+    probs, _ = app_module._session_posterior(loaded, sess, 0)
+    assert np.allclose(probs, _full_posterior(loaded, answers), atol=1e-12)
+    assert sess["inference"]["version"] == loaded.version
+
+
+def test_codec_keeps_inference_state_exact():
+    hidden = np.random.default_rng(0).normal(size=25)
+    features = np.zeros(60)
+    features[[2, 32]] = [1.0, 0.7]
+    sess = {"answers": {2: {"answer": "yes", "severity": 7.0}}, "threshold": 0.85, "max_q": 10, "num_q": 1,
+            "inference": {"version": "abc123", "features": features, "hidden": hidden}}
+    got = decode_session(encode_session(sess))["inference"]
+    assert got["version"] == "abc123"
+    assert np.array_equal(got["features"], features) and np.array_equal(got["hidden"], hidden)
@@ -0,0 +1,97 @@
+from random import seed
+
+import numpy as np
+
+from foundational_brain import NeuralNet
+from foundational_brain import MatrixNet
+
+
+DATASET = [
+    [0, 1, 1, 0, 0, 1],
+    [1, 1, 1, 0, 1, 1],
+    [1, 1, 0, 0, 1, 0],
+    [0, 1, 0, 1, 1, 0],
+    [0, 0, 0, 1, 0, 0],
+    [1, 0, 1, 0, 1, 0],
+]
+
+
+def test_adapter_round_trip_preserves_weights():
+    seed(3)
+    network = NeuralNet.initialize_network(5, 4, 2)
+    layers = MatrixNet.from_neuron_network(network)
+    assert layers[0]["weights"].shape == (4, 5)
+    assert layers[1]["bias"].shape == (2,)
+    assert MatrixNet.to_neuron_network(layers) == [[{"weights": n["weights"]} for n in layer] for layer in network]
+
+
+def test_matrix_engine_matches_scalar_engine():
+    seed(1)
+    scalar = NeuralNet.initialize_network(5, 3, 2)
+    seed(1)
+    matrix = MatrixNet.initialize_network(5, 3, 2)
+
+    scalar_errors = NeuralNet.train_network(scalar, DATASET, 0.5, 50, 2, verbose=False)
+    matrix_errors = MatrixNet.train_network(matrix, DATASET, 0.5, 50, 2, verbose=False)
+
+    assert np.allclose(scalar_errors, matrix_errors)
+    for row in DATASET:
+        expected = NeuralNet.forward_user_input(scalar, row[:-1])
+        assert np.allclose(MatrixNet.forward_user_input(matrix, row[:-1]), expected)
+
+
+def test_forward_propagate_accepts_batches():
+    seed(2)
+    layers = MatrixNet.initialize_network(5, 3, 2)
+    batch = np.array([row[:-1] for row in DATASET], dtype=float)
+    outputs = MatrixNet.forward_propagate(layers, batch)[-1]
+    assert outputs.shape == (len(DATASET), 2)
+    for i, row in enumerate(batch):
+        assert np.allclose(outputs[i], MatrixNet.forward_propagate(layers, row)[-1])
+
+
+def test_dropout_gradients_match_finite_differences():
+    seed(4)
+    layers = MatrixNet.initialize_network(5, 4, 3)
+    rng = np.random.default_rng(0)
+    x = rng.random((6, 5))
+    y = np.eye(3)[[0, 1, 2, 0, 1, 2]]
+    masks = MatrixNet.dropout_masks(layers, len(x), 0.5, rng)
+
+    def loss():
+        out = MatrixNet.forward_propagate(layers, x, masks=masks)
+        return 0.5 * float(np.sum((out[-1] - y) ** 2))
+
+    outputs = MatrixNet.forward_propagate(layers, x, masks=masks)
+    output_delta = (outputs[-1] - y) * MatrixNet.transfer_derivative(outputs[-1])
+    deltas = MatrixNet.propagate_deltas(layers, outputs, output_delta, masks)
+    grads = MatrixNet.compute_gradients(layers, x, outputs, deltas, masks)
+
+    eps = 1e-6
+    for li, (i, j) in ((0, (1, 2)), (1, (2, 3))):
+        w = layers[li]["weights"]
+        w[i, j] += eps
+        up = loss()
+        w[i, j] -= 2 * eps
+        down = loss()
+        w[i, j] += eps
+        assert abs((up - down) / (2 * eps) - grads[li]["weights"][i, j]) < 1e-6
+
+
+def test_flatten_network_makes_layers_views_of_one_buffer():
+    seed(5)
+    layers = MatrixNet.initialize_network(5, 4, 3)
+    expected = [{k: v.copy() for k, v in layer.items()} for layer in layers]
+    flat = MatrixNet.flatten_network(layers)
+    assert flat.size == 4 * 5 + 4 + 3 * 4 + 3
+    for layer, before in zip(layers, expected):
+        assert np.array_equal(layer["weights"], before["weights"])
+        assert np.shares_memory(layer["weights"], flat) and np.shares_memory(layer["bias"], flat)
+    layers[1]["weights"] -= 1.0
+    assert np.isclose(flat.sum(), sum(v.sum() for layer in expected for v in layer.values()) - 12.0)
+
+
+def test_predict_matches_neuralnet():
+    for outputs in ([0.1, 0.7, 0.2], [0.5, 0.5, 0.1], [0.0]):
+        assert MatrixNet.predict(outputs) == NeuralNet.predict(outputs)
+        assert MatrixNet.predict(np.array(outputs)) == NeuralNet.predict(outputs)
@@ -0,0 +1,92 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+from backend.metrics.registry import MetricsRegistry
+from backend.security.rate_limit import MemoryRateLimitStore, RateLimiter
+
+
+def _samples(text):
+    out = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            out[name] = float(value)
+    return out
+
+
+def test_registry_exposition_and_threaded_updates():
+    registry = MetricsRegistry()
+    requests = registry.counter("req_total", "Requests", ("route",))
+    latency = registry.histogram("lat_seconds", "Latency", buckets=(0.1, 1.0))
+    registry.callback("info", "Info", lambda: {('v"1',): 1}, ("version",))
+
+    def _work():
+        for _ in range(10_000):
+            requests.labels("/a").inc()
+            latency.observe(0.5)
+
+    threads = [threading.Thread(target=_work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latency.observe(0.1)
+
+    text = registry.render()
+    assert "# TYPE lat_seconds histogram" in text
+    samples = _samples(text)
+    assert samples['req_total{route="/a"}'] == 80_000
+    assert samples['lat_seconds_bucket{le="0.1"}'] == 1
+    assert samples['lat_seconds_bucket{le="1"}'] == samples['lat_seconds_bucket{le="+Inf"}'] == 80_001
+    assert samples["lat_seconds_count"] == 80_001 and abs(samples["lat_seconds_sum"] - 40_000.1) < 1e-6
+    assert samples['info{version="v\\"1"}'] == 1
+
+
+def test_metrics_endpoint_counts_routes_inference_and_rejections(monkeypatch):
+    monkeypatch.delenv("MDM_API_KEY", raising=False)
+    client = TestClient(app_module.app)
+    before = _samples(client.get("/metrics").text)
+    for _ in range(2):
+        assert client.post("/api/v2/diagnose", json={"data": {"Fever": 7, "Sneezing": 3}}).status_code == 200
+    monkeypatch.setattr(app_module, "_RATE_LIMITER", RateLimiter(MemoryRateLimitStore(), rpm=1, window_s=60))
+    assert client.post("/api/v2/diagnose", json={"data": {"Fever": 7}}).status_code == 200
+    assert client.post("/api/v2/diagnose", json={"data": {"Fever": 7}}).status_code == 429
+
+    r = client.get("/metrics")  # scrapes are never rate limited
+    assert r.status_code == 200 and r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = _samples(r.text)
+
+    def delta(name):
+        return after.get(name, 0.0) - before.get(name, 0.0)
+
+    ok = 'mdm_http_requests_total{method="POST",route="/api/v2/diagnose",status="200"}'
+    assert delta(ok) == 3
+    assert delta('mdm_http_requests_total{method="POST",route="/api/v2/diagnose",status="429"}') == 1
+    assert delta('mdm_http_request_duration_seconds_count{method="POST",route="/api/v2/diagnose"}') == 4
+    assert delta("mdm_rate_limit_rejections_total") == 1
+    assert delta('mdm_cache_hits_total{cache="diagnose"}') >= 1
+    assert delta('mdm_inference_seconds_count{stage="rules"}') >= 1
+    loaded = app_module._MODELS.active
+    assert after[f'mdm_model_info{{version="{loaded.version}",path="{loaded.path}"}}'] == 1
+    assert after["mdm_model_ready"] == 1 and "mdm_adaptive_sessions" in after
+
+
+def test_exited_threads_fold_into_the_base_total():
+    registry = MetricsRegistry()
+    requests = registry.counter("req_total", "Requests")
+    latency = registry.histogram("lat_seconds", "Latency", buckets=(1.0,))
+
+    def _work():
+        requests.inc()
+        latency.observe(0.5)
+
+    for _ in range(50):  # like a pool recycling its worker threads
+        t = threading.Thread(target=_work)
+        t.start()
+        t.join()
+    requests.inc()
+    assert len(requests.labels()._shards) == 1 and len(latency.labels()._shards) == 0
+    samples = _samples(registry.render())
+    assert samples["req_total"] == 51 and samples['lat_seconds_bucket{le="1"}'] == 50
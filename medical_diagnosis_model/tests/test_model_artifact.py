@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
+from versions.v2.model_artifact import artifact_path, read_artifact
+
+MODEL_PATH = Path(__file__).resolve().parents[1] / "models" / "enhanced_medical_model_v02.json"
+
+
+def _load(path, **kwargs):
+    m = ClinicalReasoningNetwork(**kwargs)
+    m.load_model(str(path))
+    return m
+
+
+def test_binary_artifact_round_trips_json_model(tmp_path):
+    original = _load(MODEL_PATH)
+    out = tmp_path / "model.json"
+    original.save_model(str(out))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["model.bin", "model.json"]
+
+    mapped = _load(artifact_path(str(out)))
+    assert mapped.temperature == original.temperature
+    assert mapped.hidden_neurons == original.hidden_neurons
+    for a, b in zip(original.network, mapped.network):
+        assert not b["weights"].flags.owndata  # view into the mapped file
+        assert not b["weights"].flags.writeable
+        assert np.array_equal(a["weights"], b["weights"])
+        assert np.array_equal(a["bias"], b["bias"])
+    features = [1, 0, 0, 1] + [0] * 26 + [0.8, 0, 0, 0.6] + [0] * 26
+    assert mapped._predict_proba(features) == original._predict_proba(features)
+
+
+def test_float32_artifact_is_compact_and_loads_as_float64(tmp_path):
+    compact = _load(MODEL_PATH, weights_dtype="float32")
+    out = tmp_path / "compact.bin"
+    compact.save_model(str(out))
+    _, layers = read_artifact(str(out))
+    assert all(layer["weights"].dtype == np.float32 for layer in layers)
+    widened = _load(out)
+    assert widened.network[0]["weights"].dtype == np.float64
+    assert np.array_equal(widened.network[0]["weights"], compact.network[0]["weights"])
+
+
+def test_corrupted_artifact_fails_checksum(tmp_path):
+    out = tmp_path / "model.bin"
+    _load(MODEL_PATH).save_model(str(out))
+    raw = bytearray(out.read_bytes())
+    raw[-8] ^= 0xFF
+    out.write_bytes(bytes(raw))
+    with pytest.raises(ValueError, match="checksum"):
+        read_artifact(str(out))
+
+
+def test_prefer_artifact_ignores_a_stale_twin(tmp_path):
+    original = _load(MODEL_PATH)
+    out = tmp_path / "model.json"
+    original.save_model(str(out))
+    twin = artifact_path(str(out))
+
+    in_sync = ClinicalReasoningNetwork()
+    in_sync.load_model(str(out), prefer_artifact=True)
+    assert not in_sync.network[0]["weights"].flags.owndata  # mapped from the twin
+
+    # The JSON changes (git pull / deploy copy) but the gitignored twin does not
+    original.temperature = 2.5
+    original.save_model(str(out), binary=False)
+    stale_mtime = Path(twin).stat().st_mtime_ns
+    refreshed = ClinicalReasoningNetwork()
+    refreshed.load_model(str(out), prefer_artifact=True)
+    assert refreshed.temperature == 2.5 and refreshed.network[0]["weights"].flags.owndata
+    assert Path(twin).stat().st_mtime_ns != stale_mtime  # rewritten from the JSON
+
+    mapped = ClinicalReasoningNetwork()
+    mapped.load_model(str(out), prefer_artifact=True)
+    assert mapped.temperature == 2.5 and not mapped.network[0]["weights"].flags.owndata
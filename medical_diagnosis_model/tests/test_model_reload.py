@@ -0,0 +1,79 @@
+import os
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.serving.model_manager import ModelManager, model_version
+from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
+
+
+def _write_model(path, seed):
+    import random
+    random.seed(seed)
+    m = ClinicalReasoningNetwork(hidden_neurons=4)
+    m.network = m._initialize_network()
+    m.save_model(str(path), binary=False)
+    return m
+
+
+def test_reload_swaps_atomically_and_keeps_old_model_on_failure(tmp_path):
+    path = tmp_path / "model.json"
+    _write_model(path, 1)
+    swaps = []
+    manager = ModelManager(lambda: ClinicalReasoningNetwork(hidden_neurons=4), str(path), num_classes=11)
+    manager.add_listener(swaps.append)
+    first = manager.load()
+    assert first.version == model_version(str(path)) and swaps == [first]
+
+    _write_model(path, 2)
+    assert manager.reload_async()
+    manager.wait(10)
+    second = manager.active
+    assert second is not first and second.version != first.version
+    # A request still holding the old model keeps serving from it
+    assert first.model.diagnose_with_reasoning({"Fever": 8})["primary_diagnosis"]["name"]
+
+    path.write_text("{not json")
+    manager.reload_async()
+    manager.wait(10)
+    status = manager.status()
+    assert manager.active is second
+    assert status["state"] == "failed" and status["failures"] == 1 and status["version"] == second.version
+
+    with pytest.raises(ValueError):
+        ModelManager(lambda: ClinicalReasoningNetwork(hidden_neurons=4), str(path)).install(
+            ClinicalReasoningNetwork(hidden_neurons=4))
+
+
+def test_watcher_reloads_changed_artifact(tmp_path):
+    path = tmp_path / "model.json"
+    _write_model(path, 1)
+    manager = ModelManager(lambda: ClinicalReasoningNetwork(hidden_neurons=4), str(path))
+    first = manager.load()
+    manager.start_watch(0.01)
+    try:
+        _write_model(path, 3)
+        os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+        deadline = time.time() + 10
+        while manager.active is first and time.time() < deadline:
+            time.sleep(0.01)
+    finally:
+        manager.stop_watch()
+    assert manager.active.version == model_version(str(path)) != first.version
+
+
+def test_responses_report_model_version_and_admin_reload(monkeypatch):
+    from backend import app as app_module
+    monkeypatch.delenv("MDM_API_KEY", raising=False)
+    client = TestClient(app_module.app)
+    version = client.post("/api/v2/diagnose", json={"data": {"Fever": 8}}).json()["model_version"]
+    assert version == app_module._active_model().version
+
+    r = client.post("/api/v2/admin/model/reload?wait=true")
+    assert r.status_code == 202
+    body = r.json()
+    assert body["started"] and body["state"] == "idle" and body["version"] == version
+    start = client.post("/api/v2/adaptive/start", json={}).json()
+    assert start["model_version"] == version
+    assert client.get("/api/v2/admin/model").json()["reloads"] >= 1
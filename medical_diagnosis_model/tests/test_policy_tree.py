@@ -0,0 +1,71 @@
+import random
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+from backend.selector.policy_tree import PolicyTree, build_policy_tree, save_policy_tree
+
+
+def _build(loaded, depth):
+    return build_policy_tree(lambda answers: app_module._adaptive_step(loaded, {"answers": answers}),
+                             depth, loaded.version)
+
+
+def test_tree_lookups_match_inference_along_any_path():
+    loaded = app_module._active_model()
+    artifact = _build(loaded, 3)
+    assert len(artifact["nodes"]) <= 2 ** 4 - 1
+    tree = PolicyTree(artifact, app_module._answers_key)
+    rng = random.Random(3)
+    for _ in range(20):
+        answers = {}
+        for _ in range(3):
+            probs, sid = tree.lookup(app_module._answers_key(answers))
+            want_probs, want_sid = app_module._adaptive_step(loaded, {"answers": dict(answers)})
+            assert sid == want_sid and np.allclose(probs, want_probs, atol=1e-12)
+            answers[sid] = {"answer": rng.choice(["yes", "no", "unknown"]), "severity": rng.choice([None, 6])}
+    # A yes at another severity is off the tree
+    root_sid = tree.lookup(app_module._answers_key({}))[1]
+    assert tree.lookup(app_module._answers_key({root_sid: {"answer": "yes", "severity": 9}})) is None
+
+
+def test_adaptive_endpoints_follow_tree_then_memo(monkeypatch):
+    monkeypatch.delenv("MDM_API_KEY", raising=False)
+    loaded = app_module._active_model()
+    tree = PolicyTree(_build(loaded, 2), app_module._answers_key)
+    client = TestClient(app_module.app)
+
+    def _questions():
+        start = client.post("/api/v2/adaptive/start", json={"max_questions": 5, "threshold": 1.1}).json()
+        asked, q = [], start["next_question"]
+        while q is not None:
+            asked.append(q["symptom_id"])
+            q = client.post("/api/v2/adaptive/answer", json={"session_id": start["session_id"],
+                                                             "question": q["symptom_id"], "answer": "no"}).json()["next_question"]
+        return asked
+
+    monkeypatch.setattr(app_module, "_ADAPTIVE_MEMO", app_module.ResponseCache(max_entries=0))
+    expected = _questions()
+    monkeypatch.setattr(app_module, "_ADAPTIVE_MEMO", app_module.ResponseCache(max_entries=64, ttl_s=0))
+    monkeypatch.setitem(app_module._ADAPTIVE_POLICY, "tree", tree)
+    assert _questions() == expected
+    # Depth 2 covers start and the first two answers; deeper hops go through the memo once
+    assert app_module._ADAPTIVE_MEMO.stats()["misses"] == len(expected) - 2
+    assert _questions() == expected and app_module._ADAPTIVE_MEMO.stats()["hits"] == len(expected) - 2
+
+
+def test_policy_for_another_model_version_is_ignored(tmp_path, monkeypatch):
+    loaded = app_module._active_model()
+    artifact = _build(loaded, 1)
+    path = str(tmp_path / "policy.json")
+    monkeypatch.setattr(app_module, "ADAPTIVE_POLICY_PATH", path)
+    monkeypatch.setitem(app_module._ADAPTIVE_POLICY, "tree", None)
+
+    save_policy_tree(artifact, path)
+    app_module._load_adaptive_policy(loaded)
+    assert len(app_module._ADAPTIVE_POLICY["tree"]) == len(artifact["nodes"])
+
+    save_policy_tree(dict(artifact, model_version="older"), path)
+    app_module._load_adaptive_policy(loaded)
+    assert app_module._ADAPTIVE_POLICY["tree"] is None
@@ -0,0 +1,90 @@
+from backend.security.rate_limit import MemoryRateLimitStore, RateLimiter, SQLiteRateLimitStore
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _allowed(limiter, key, n):
+    return sum(limiter.check(key)[0] for _ in range(n))
+
+
+def test_token_bucket_bursts_then_refills():
+    clock = _Clock()
+    limiter = RateLimiter(MemoryRateLimitStore(), rpm=6, window_s=60, clock=clock)
+    assert _allowed(limiter, "ip:a", 10) == 6
+    allowed, retry_after = limiter.check("ip:a")
+    assert not allowed and abs(retry_after - 10.0) < 1e-9
+    assert _allowed(limiter, "ip:b", 1) == 1  # separate bucket
+    clock.now += 25  # 2.5 tokens back
+    assert _allowed(limiter, "ip:a", 5) == 2
+    assert RateLimiter(MemoryRateLimitStore(), rpm=0).check("ip:a") == (True, 0.0)
+
+
+def test_memory_store_is_lru_bounded():
+    store = MemoryRateLimitStore(max_keys=3)
+    for i in range(10):
+        store.take(f"ip:{i}", 5.0, 1.0, 0.0)
+    store.take("ip:7", 5.0, 1.0, 0.0)
+    store.take("ip:10", 5.0, 1.0, 0.0)
+    assert len(store) == 3 and set(store._buckets) == {"ip:9", "ip:7", "ip:10"}
+
+
+def test_sqlite_store_is_shared_between_workers_and_pruned(tmp_path):
+    path = str(tmp_path / "rate.sqlite3")
+    clock = _Clock()
+    worker_a = RateLimiter(SQLiteRateLimitStore(path), rpm=4, window_s=60, clock=clock)
+    worker_b = RateLimiter(SQLiteRateLimitStore(path), rpm=4, window_s=60, clock=clock)
+    assert _allowed(worker_a, "ip:x", 3) == 3
+    assert _allowed(worker_b, "ip:x", 3) == 1
+
+    store = SQLiteRateLimitStore(path, max_keys=5, prune_every=10)
+    rate = 4 / 6000  # full refill takes 6000 s
+    for i in range(10):
+        store.take(f"ip:{i}", 4.0, rate, clock.now + i)  # 10th take trims to the 5 most recent
+    assert len(store) == 5
+    for _ in range(10):
+        store.take("ip:late", 4.0, rate, clock.now + 10_000)  # every other bucket is idle and full
+    assert len(store) == 1
+
+
+def test_client_keys_only_trust_verified_credentials():
+    limiter = RateLimiter(MemoryRateLimitStore(), key_mode="api_key", verify_api_key=lambda key: key == "secret")
+    assert limiter.client_key({}, "1.2.3.4") == "ip:1.2.3.4"
+    key = limiter.client_key({"x-api-key": "secret"}, "1.2.3.4")
+    assert key.startswith("key:") and "secret" not in key
+    assert limiter.client_key({"x-api-key": "forged"}, "1.2.3.4") == "ip:1.2.3.4"
+    # No verifier: never key by an unchecked credential
+    assert RateLimiter(MemoryRateLimitStore(), key_mode="api_key").client_key({"x-api-key": "secret"}, "1.2.3.4") \
+        == "ip:1.2.3.4"
+
+    def verify(token):
+        if token != "good":
+            raise ValueError("bad signature")
+        return {"sub": "user-1"}
+
+    limiter = RateLimiter(MemoryRateLimitStore(), key_mode="sub", verify_token=verify)
+    assert limiter.client_key({"authorization": "Bearer good"}, "1.2.3.4") == "sub:user-1"
+    assert limiter.client_key({"authorization": "Bearer forged"}, "1.2.3.4") == "ip:1.2.3.4"
+    assert limiter.blocking and not RateLimiter(MemoryRateLimitStore()).blocking
+
+
+def test_forged_api_keys_share_the_ip_bucket(monkeypatch, tmp_path):
+    from fastapi.testclient import TestClient
+    from backend import app as app_module
+
+    monkeypatch.setenv("MDM_API_KEY", "testkey")
+    # SQLite store: the middleware runs the check in the threadpool
+    limiter = RateLimiter(SQLiteRateLimitStore(str(tmp_path / "rate.sqlite3")), rpm=2, window_s=60,
+                          key_mode="api_key", verify_api_key=app_module._valid_api_key)
+    monkeypatch.setattr(app_module, "_RATE_LIMITER", limiter)
+    client = TestClient(app_module.app)
+    codes = [client.post("/api/v2/diagnose", headers={"X-API-Key": f"forged-{i}"}, json={"data": {"Fever": 8}}).status_code
+             for i in range(4)]
+    assert codes == [401, 401, 429, 429]
+    # The real key has its own bucket
+    assert client.post("/api/v2/diagnose", headers={"X-API-Key": "testkey"}, json={"data": {"Fever": 8}}).status_code == 200
@@ -0,0 +1,29 @@
+import threading
+
+from fastapi.testclient import TestClient
+
+from backend import app as app_module
+
+
+def test_health_and_ready_probes():
+    client = TestClient(app_module.app)
+    assert client.get("/healthz").json() == {"status": "ok"}
+    r = client.get("/readyz")
+    assert r.status_code == 200
+    assert r.json() == {"status": "ready", "model_version": app_module._MODELS.active.version}
+
+
+def test_requests_before_ready_get_fast_503(monkeypatch):
+    started = []
+    monkeypatch.setattr(app_module, "_READY", threading.Event())
+    monkeypatch.setattr(app_module, "_start_warm_start", lambda: started.append(1))
+    monkeypatch.delenv("MDM_API_KEY", raising=False)
+    client = TestClient(app_module.app)
+
+    r = client.post("/api/v2/diagnose", json={"data": {"Fever": 8}})
+    assert r.status_code == 503 and r.headers["retry-after"] == "1"
+    assert client.post("/api/v2/adaptive/start", json={}).status_code == 503
+    assert client.get("/readyz").status_code == 503
+    assert client.get("/healthz").status_code == 200
+    # Each rejected request (re)starts the background warm start instead of training inline
+    assert len(started) == 2
@@ -0,0 +1,113 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from backend.cache.response_cache import ResponseCache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_ttl_expiry():
+    clock = _Clock()
+    cache = ResponseCache(max_entries=2, ttl_s=10, clock=clock)
+    calls = []
+
+    def compute(key):
+        return lambda: calls.append(key) or key.upper()
+
+    assert cache.get_or_compute("a", compute("a")) == "A"
+    cache.get_or_compute("b", compute("b"))
+    cache.get_or_compute("a", compute("a"))  # hit; "b" is now least recent
+    cache.get_or_compute("c", compute("c"))
+    assert calls == ["a", "b", "c"]
+    cache.get_or_compute("b", compute("b"))
+    assert calls == ["a", "b", "c", "b"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["size"]) == (1, 4, 2, 2)
+
+    clock.now = 11.0
+    cache.get_or_compute("b", compute("b"))
+    assert calls[-1] == "b" and cache.stats()["expirations"] == 1
+
+    cache.clear()
+    assert len(cache) == 0
+    assert ResponseCache(max_entries=0).get_or_compute("a", compute("a")) == "A"
+
+
+def test_concurrent_identical_requests_compute_once():
+    cache = ResponseCache(max_entries=8)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return {"ok": True}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(6)]
+    for t in threads:
+        t.start()
+    while cache.stats()["coalesced"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(results) == 6 and all(r is results[0] for r in results)
+
+
+def test_clear_drops_inflight_result():
+    cache = ResponseCache(max_entries=8)
+
+    def compute():
+        cache.clear()  # e.g. model reloaded mid-request
+        return 1
+
+    assert cache.get_or_compute("k", compute) == 1
+    assert len(cache) == 0
+
+
+def test_diagnose_endpoint_uses_cache(monkeypatch):
+    from backend import app as app_module
+    monkeypatch.delenv("MDM_API_KEY", raising=False)
+    client = TestClient(app_module.app)
+    client.post("/api/v2/diagnose", json={"data": {"Fever": 1}})  # ensure model is loaded
+    app_module._DIAGNOSE_CACHE.clear()
+    before = app_module._DIAGNOSE_CACHE.stats()
+
+    first = client.post("/api/v2/diagnose", json={"data": {"Fever": 8, "Cough": 6}})
+    # Same presentation: other key order and case, severity within the rounding grid
+    second = client.post("/api/v2/diagnose", json={"data": {"cough": 6.04, "fever": 8, "Rash": 0}})
+    tested = client.post("/api/v2/diagnose",
+                         json={"data": {"Fever": 8, "Cough": 6}, "has_test_results": {"CXR": "clear"}})
+    assert first.status_code == second.status_code == tested.status_code == 200
+    assert first.json() == second.json()
+
+    stats = app_module._DIAGNOSE_CACHE.stats()
+    assert stats["hits"] - before["hits"] == 1
+    assert stats["misses"] - before["misses"] == 2
+    loaded = app_module._active_model()
+    expected = loaded.model.diagnose_with_reasoning({"Fever": 8, "Cough": 6})
+    assert first.json() == dict(expected, model_version=loaded.version)
+
+
+def test_diagnose_scores_raw_severities(monkeypatch):
+    from backend import app as app_module
+    monkeypatch.delenv("MDM_API_KEY", raising=False)
+    client = TestClient(app_module.app)
+    loaded = app_module._active_model()
+    data = {"Fever": 8.04, "Cough": 0.04}  # 0.04 rounds to 0 on the cache grid but is still reported
+    expected = dict(loaded.model.diagnose_with_reasoning(data), model_version=loaded.version)
+    for cache in (ResponseCache(max_entries=0), ResponseCache(max_entries=8)):
+        monkeypatch.setattr(app_module, "_DIAGNOSE_CACHE", cache)
+        assert client.post("/api/v2/diagnose", json={"data": data}).json() == expected
+    assert expected != dict(loaded.model.diagnose_with_reasoning({"Fever": 8.0}), model_version=loaded.version)
@@ -1,7 +1,9 @@
 import os
 from fastapi.testclient import TestClient
 
-from medical_diagnosis_model.backend.app import app, _RATE_LIMIT_STORE
+from medical_diagnosis_model.backend import app as app_module
+from medical_diagnosis_model.backend.app import app
+from medical_diagnosis_model.backend.security.rate_limit import MemoryRateLimitStore, RateLimiter
 
 
 def test_cors_preflight_allows_localhost_3000():
@@ -41,9 +43,8 @@ def test_api_key_auth_enforced_and_allows_valid_key(monkeypatch):
 def test_rate_limiting_triggers_429(monkeypatch):
     client = TestClient(app)
     monkeypatch.setenv("MDM_API_KEY", "testkey")
-    monkeypatch.setenv("MDM_RATE_LIMIT_RPM", "5")
-    monkeypatch.setenv("MDM_RATE_LIMIT_WINDOW_S", "60")
-    _RATE_LIMIT_STORE.clear()
+    # Limits are read once at startup (RateLimiter.from_env); install a 5-per-minute limiter
+    monkeypatch.setattr(app_module, "_RATE_LIMITER", RateLimiter(MemoryRateLimitStore(), rpm=5, window_s=60))
 
     url = "/api/v2/diagnose"
     headers = {"X-API-Key": "testkey"}
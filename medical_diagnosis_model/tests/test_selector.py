@@ -12,3 +12,44 @@ def test_eig_ranks_informative_symptom_higher():
     assert ranked[0][0] == "fever"
 
 
+def _scalar_eig(p, py):
+    import math
+
+    def h(q):
+        return -sum(x * math.log(max(x, 1e-12)) for x in q)
+
+    p_yes = sum(a * b for a, b in zip(p, py))
+    p_no = 1.0 - p_yes
+    if p_yes <= 1e-9 or p_no <= 1e-9:
+        return 0.0
+    post_yes = [a * b / p_yes for a, b in zip(p, py)]
+    post_no = [a * (1.0 - b) / p_no for a, b in zip(p, py)]
+    return h(p) - (p_yes * h(post_yes) + p_no * h(post_no))
+
+
+def test_vectorized_eig_matches_scalar_and_ranks_top_k():
+    import numpy as np
+    from backend.selector.eig_selector import eig_scores, rank_by_eig
+
+    rng = np.random.default_rng(0)
+    p = rng.dirichlet(np.ones(11))
+    likelihood = rng.random((30, 11)) * (rng.random((30, 11)) < 0.4)
+    likelihood[5] = 0.0  # never observed -> no information
+    expected = [_scalar_eig(p, row) for row in likelihood]
+    assert np.allclose(eig_scores(p, likelihood), expected, atol=1e-12)
+
+    candidates = [sid for sid in range(30) if sid % 3]
+    top = rank_by_eig(p, likelihood, candidates, k=4)
+    ref = sorted(((sid, expected[sid]) for sid in candidates), key=lambda t: t[1], reverse=True)[:4]
+    assert [sid for sid, _ in top] == [sid for sid, _ in ref]
+    assert rank_by_eig(p, likelihood, [], k=3) == []
+
+
+def test_eig_with_per_disease_likelihoods():
+    disease_probs = {"viral_uri": 0.5, "strep": 0.5}
+    symptom_to_likelihood = {
+        "rhinorrhea": ({"viral_uri": 0.85, "strep": 0.1}, {"viral_uri": 0.15, "strep": 0.9}),
+        "fatigue": ({"viral_uri": 0.6, "strep": 0.5}, {"viral_uri": 0.4, "strep": 0.5}),
+    }
+    ranked = expected_information_gain(disease_probs, symptom_to_likelihood)
+    assert ranked[0][0] == "rhinorrhea" and ranked[0][1] > ranked[1][1] > 0
@@ -0,0 +1,80 @@
+from fastapi.testclient import TestClient
+
+from backend.sessions.session_store import (
+    MemorySessionStore, SQLiteSessionStore, decode_session, encode_session
+)
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _session(n):
+    return {"answers": {3: {"answer": "yes", "severity": 6.0}, 27: {"answer": "no", "severity": None}},
+            "threshold": 0.85, "max_q": 10, "num_q": n}
+
+
+def test_codec_round_trips_compactly():
+    data = encode_session(_session(2))
+    assert decode_session(data) == _session(2)
+    assert len(data) < 80
+
+
+def test_memory_store_expires_and_evicts():
+    clock = _Clock()
+    store = MemorySessionStore(max_entries=2, ttl_s=10, clock=clock)
+    store.put("a", _session(0))
+    got = store.get("a")
+    got["num_q"] = 5  # copies: unchanged until put back
+    assert store.get("a")["num_q"] == 0
+    store.put("b", _session(1))
+    clock.now = 5.0
+    store.put("c", _session(2))
+    assert store.get("a") is None and len(store) == 2
+    clock.now = 10.0
+    assert len(store) == 1  # "b" expired and is not counted
+    assert store.get("b") is None and store.pop("c") == _session(2)
+    store.put("d", _session(3))
+    clock.now = 20.0
+    assert store.pop("d", "gone") == "gone" and len(store) == 0
+
+
+def test_sqlite_store_shared_and_bounded(tmp_path):
+    clock = _Clock()
+    path = str(tmp_path / "sessions.sqlite3")
+    worker_a = SQLiteSessionStore(path, ttl_s=10, clock=clock)
+    worker_b = SQLiteSessionStore(path, ttl_s=10, clock=clock)
+    worker_a.put("s1", _session(1))
+    assert worker_b.get("s1") == _session(1)
+    assert worker_b.pop("s1") == _session(1) and worker_a.get("s1") is None
+
+    store = SQLiteSessionStore(path, max_entries=3, ttl_s=10, prune_every=5, clock=clock)
+    for i in range(5):
+        clock.now = float(i)
+        store.put(f"s{i}", _session(i))  # 5th put prunes to the 3 latest
+    assert [store.get(f"s{i}") is not None for i in range(5)] == [False, False, True, True, True]
+    clock.now = 13.5
+    assert len(store) == 1
+
+
+def test_adaptive_session_survives_across_workers(tmp_path, monkeypatch):
+    from backend import app as worker_a
+    from medical_diagnosis_model.backend import app as worker_b
+    path = str(tmp_path / "sessions.sqlite3")
+    monkeypatch.setattr(worker_a, "_ADAPTIVE_SESSIONS", SQLiteSessionStore(path))
+    monkeypatch.setattr(worker_b, "_ADAPTIVE_SESSIONS", SQLiteSessionStore(path))
+    monkeypatch.delenv("MDM_API_KEY", raising=False)
+
+    start = TestClient(worker_a.app).post("/api/v2/adaptive/start", json={"prior_answers": {"Fever": 8}}).json()
+    client_b = TestClient(worker_b.app)
+    r = client_b.post("/api/v2/adaptive/answer",
+                      json={"session_id": start["session_id"], "question": start["next_question"]["symptom_id"],
+                            "answer": "no"})
+    assert r.status_code == 200
+    assert worker_a._ADAPTIVE_SESSIONS.get(start["session_id"])["num_q"] == 1
+    assert client_b.post("/api/v2/adaptive/finish", json={"session_id": start["session_id"]}).status_code == 200
+    assert worker_a._ADAPTIVE_SESSIONS.get(start["session_id"]) is None
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import numpy as np
+
+from tools.train_pipeline import (
+    _sweep_trial, build_model, load_sweep_space, probability_metrics, run_sweep, successive_halving, sweep_candidates
+)
+
+SPLITS = Path(__file__).resolve().parents[1] / "data" / "splits" / "v02"
+
+
+def test_successive_halving_keeps_best_third_and_grows_budget():
+    calls = []
+
+    def run_rung(params_list, epochs, previous):
+        calls.append((len(params_list), epochs))
+        # Survivors come back with their own previous result to resume from
+        assert previous is None or [r["params"] for r in previous] == params_list
+        return [{"params": p, "val_nll": p["hidden_neurons"] / epochs} for p in params_list]
+
+    candidates = sweep_candidates({"hidden_neurons": list(range(1, 10))})
+    results = successive_halving(candidates, run_rung, min_epochs=10, max_epochs=100, eta=3)
+    assert calls == [(9, 10), (3, 30), (1, 90)]
+    assert results[-1]["params"] == {"hidden_neurons": 1} and results[-1]["rung"] == 2
+
+
+def test_probability_metrics():
+    probs = np.array([[0.9, 0.1], [0.2, 0.8], [0.6, 0.4]])
+    labels = np.array([0, 1, 1])
+    m = probability_metrics(probs, labels)
+    assert np.isclose(m["val_nll"], -np.mean(np.log([0.9, 0.8, 0.4])))
+    assert np.isclose(m["val_accuracy"], 2 / 3)
+    # bins: 0.9 (hit), 0.8 (hit), 0.6 (miss)
+    assert np.isclose(m["val_ece"], (0.1 + 0.2 + 0.6) / 3)
+
+
+def test_sweep_writes_leaderboard(tmp_path):
+    out = tmp_path / "sweep.json"
+    report = run_sweep({"hidden_neurons": [4, 6], "batch_size": [32]}, SPLITS, min_epochs=1, max_epochs=2,
+                       eta=2, jobs=2, config="", out_path=out)
+    assert out.exists()
+    assert [r["candidates"] for r in report["rungs"]] == [2, 1]
+    top = report["leaderboard"][0]
+    assert top["rung"] == 1 and top["epochs"] == 2
+    assert {"val_nll", "val_accuracy", "val_ece", "wall_time_s"} <= set(top) and "state" not in top
+
+
+def test_sweep_trial_resumes_the_previous_rung():
+    task = {"params": {"hidden_neurons": 4, "batch_size": 32}, "config": "",
+            "train": str(SPLITS / "train.jsonl"), "val": str(SPLITS / "val.jsonl")}
+    first = _sweep_trial(dict(task, epochs=1))
+    direct = _sweep_trial(dict(task, epochs=3))
+    resumed = _sweep_trial(dict(task, epochs=3, resume=first))
+    assert resumed["epochs_run"] == 3 and resumed["val_nll"] == direct["val_nll"]
+    assert resumed["state"]["history"][0] == first["state"]["history"][0]
+    # A run that had already stopped early is carried forward, not retrained
+    first["state"]["no_improve"] = 20
+    assert _sweep_trial(dict(task, epochs=3, resume=first))["epochs_run"] == 1
+
+
+def test_default_space_pins_sgd_over_the_adam_base_config():
+    # configs/training.yaml selects Adam at lr 3e-3; the default candidates use SGD-scale rates
+    model, _ = build_model(epochs=1, config=str(SPLITS.parents[2] / "configs" / "training.yaml"))
+    assert model.optimizer == "adam"
+    for params in sweep_candidates(load_sweep_space(None)):
+        assert params["optimizer"] == "sgd"
+
+
+def test_sweep_cli_defaults_to_the_builtin_sgd_config(monkeypatch):
+    import tools.train_pipeline as pipeline
+    seen = {}
+
+    def fake_run_sweep(space, splits, min_epochs, max_epochs, eta, jobs, samples, config, out_path):
+        seen["config"] = config
+        return {"wall_time_s": 0.0, "leaderboard": []}
+
+    monkeypatch.setattr(pipeline, "run_sweep", fake_run_sweep)
+    assert pipeline.sweep_main(["--space", ""]) == 0
+    model, _ = build_model(epochs=1, config=seen["config"])
+    assert seen["config"] == "" and model.optimizer == "sgd"
@@ -0,0 +1,114 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
+
+MODEL_PATH = Path(__file__).resolve().parents[1] / "models" / "enhanced_medical_model_v02.json"
+
+
+def _load():
+    m = ClinicalReasoningNetwork()
+    m.load_model(str(MODEL_PATH))
+    return m
+
+
+def _random_features(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        present = [1 if rng.random() < 0.2 else 0 for _ in range(30)]
+        severity = [round(rng.uniform(0.1, 1.0), 2) if p else 0.0 for p in present]
+        rows.append(present + severity)
+    return rows
+
+
+def test_predict_proba_batch_matches_single_row():
+    m = _load()
+    rows = _random_features(25)
+    batch = m.predict_proba_batch(rows)
+    assert batch.shape == (25, m.num_diseases)
+    assert np.allclose(batch.sum(axis=1), 1.0)
+    for i, row in enumerate(rows):
+        assert np.allclose(batch[i], m._predict_proba(row))
+
+
+def test_concurrent_inference_is_unaffected_by_calibration():
+    m = _load()
+    rows = _random_features(40, seed=1)
+    expected = m.predict_proba_batch(rows)
+    val_set = [row + [i % m.num_diseases] for i, row in enumerate(rows)]
+    original_T = m.temperature
+
+    stop = threading.Event()
+
+    def recalibrate():
+        while not stop.is_set():
+            m._fit_calibration(val_set)
+
+    def score(i):
+        return np.allclose(m.predict_proba_batch([rows[i % len(rows)]])[0], expected[i % len(rows)])
+
+    worker = threading.Thread(target=recalibrate)
+    worker.start()
+    try:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(score, range(400)))
+    finally:
+        stop.set()
+        worker.join()
+    assert all(results)
+    assert m.temperature == original_T
+
+
+def test_float32_weights_load_current_json_model():
+    exact = _load()
+    compact = ClinicalReasoningNetwork(weights_dtype="float32")
+    compact.load_model(str(MODEL_PATH))
+    assert all(layer["weights"].dtype == np.float32 for layer in compact.network)
+    # JSON -> float64 is lossless; float32 is the nearest representable weight
+    for a, b in zip(exact.network, compact.network):
+        assert np.array_equal(a["weights"].astype(np.float32), b["weights"])
+    rows = _random_features(50, seed=2)
+    probs = compact.predict_proba_batch(rows)
+    assert probs.dtype == np.float64
+    assert np.allclose(probs, exact.predict_proba_batch(rows), atol=1e-5)
+
+
+def test_symptom_indexes_match_linear_scans():
+    from medical_symptom_schema import (
+        SYMPTOMS, find_symptom, get_symptom_by_medical_term, get_symptom_by_name, get_symptoms_by_icd10_prefix
+    )
+    for sid, s in SYMPTOMS.items():
+        assert get_symptom_by_name(s['name'].upper())[0] == sid
+        assert get_symptom_by_medical_term(s['medical_term'].lower())[0] == sid
+        for n in range(len(s['icd_10']) + 1):
+            prefix = s['icd_10'][:n]
+            expected = [i for i, x in SYMPTOMS.items() if x['icd_10'].startswith(prefix)]
+            assert [i for i, _ in get_symptoms_by_icd10_prefix(prefix)] == expected
+    assert get_symptom_by_name("no such symptom") == (None, None)
+    assert get_symptoms_by_icd10_prefix("Z99") == []
+    # Synonyms from configs/clinical_schema.yaml resolve through find_symptom only
+    fever, _ = get_symptom_by_name("Fever")
+    assert find_symptom("Feverish")[0] == fever
+    assert get_symptom_by_name("feverish") == (None, None)
+
+
+def test_malformed_clinical_schema_falls_back_to_names_and_terms(tmp_path):
+    import medical_symptom_schema as schema
+    broken = tmp_path / "clinical_schema.yaml"
+    broken.write_text("symptoms:\n  Fever: {synonyms: [feverish\n", encoding="utf-8")
+    try:
+        schema.rebuild_symptom_indexes(str(broken))
+        fever, _ = schema.get_symptom_by_name("Fever")
+        assert schema.find_symptom("fever")[0] == fever
+        assert schema.find_symptom("Feverish") == (None, None)
+        broken.write_text("- not a mapping\n", encoding="utf-8")
+        schema.rebuild_symptom_indexes(str(broken))
+        assert schema.find_symptom("Feverish") == (None, None)
+    finally:
+        schema.rebuild_symptom_indexes()
+    assert schema.find_symptom("Feverish")[0] == fever
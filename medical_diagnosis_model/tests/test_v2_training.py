@@ -0,0 +1,178 @@
+import random
+
+import numpy as np
+
+from foundational_brain.MatrixNet import initialize_network
+from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
+
+
+def _dataset(cases_per_disease=8, seed=0):
+    random.seed(seed)
+    m = ClinicalReasoningNetwork()
+    return m._generate_clinical_training_data(cases_per_disease)
+
+
+def test_minibatch_training_reports_throughput_and_learns():
+    data = _dataset()
+    split = int(0.8 * len(data))
+    m = ClinicalReasoningNetwork(hidden_neurons=10, learning_rate=1.0, epochs=15, batch_size=16)
+    m.network = initialize_network(m.num_features, m.hidden_neurons, m.num_diseases)
+    history = m._train_softmax_cross_entropy(m.network, data[:split], data[split:], verbose=False)
+    assert all(h["samples_per_sec"] > 0 for h in history)
+    assert history[-1]["train_loss"] < history[0]["train_loss"]
+
+
+def test_batch_size_persists_in_saved_config(tmp_path):
+    m = ClinicalReasoningNetwork(hidden_neurons=4, epochs=1, batch_size=8)
+    m.network = initialize_network(m.num_features, m.hidden_neurons, m.num_diseases)
+    path = tmp_path / "m.json"
+    m.save_model(str(path))
+    loaded = ClinicalReasoningNetwork()
+    loaded.load_model(str(path))
+    assert loaded.batch_size == 8
+
+
+def test_training_config_yaml_drives_optimizer_and_regularization():
+    m = ClinicalReasoningNetwork(hidden_neurons=10, learning_rate=0.3)
+    settings = m.apply_training_config()  # configs/training.yaml
+    assert m.optimizer == "adam"
+    assert m.learning_rate == 0.003
+    assert m.weight_decay == 0.0001
+    assert m.dropout_rate == 0.0
+    assert m.hidden_neurons == 25
+    assert settings["seed"] == 42 and settings["cases_per_disease"] == 50
+
+
+def test_each_optimizer_reduces_loss_with_decay_and_dropout():
+    data = _dataset(seed=1)
+    split = int(0.8 * len(data))
+    for name, lr in (("sgd", 0.5), ("momentum", 0.2), ("adam", 0.01)):
+        random.seed(5)
+        m = ClinicalReasoningNetwork(hidden_neurons=10, learning_rate=lr, epochs=10, batch_size=8,
+                                     optimizer=name, weight_decay=1e-4, dropout_rate=0.2)
+        network = initialize_network(m.num_features, m.hidden_neurons, m.num_diseases)
+        history = m._train_softmax_cross_entropy(network, data[:split], data[split:], verbose=False)
+        assert history[-1]["train_loss"] < history[0]["train_loss"], name
+
+
+def test_float32_weights_train_and_stay_float32():
+    data = _dataset(seed=2)
+    split = int(0.8 * len(data))
+    random.seed(6)
+    m = ClinicalReasoningNetwork(hidden_neurons=10, learning_rate=1.0, epochs=10, batch_size=16,
+                                 weights_dtype="float32")
+    network = m._initialize_network()
+    history = m._train_softmax_cross_entropy(network, data[:split], data[split:], verbose=False)
+    assert all(layer["weights"].dtype.name == "float32" for layer in network)
+    assert history[-1]["train_loss"] < history[0]["train_loss"]
+
+
+def test_history_reports_best_epoch_and_best_weights_are_restored():
+    data = _dataset(seed=3)
+    split = int(0.8 * len(data))
+    random.seed(7)
+    m = ClinicalReasoningNetwork(hidden_neurons=10, learning_rate=3.0, epochs=12, batch_size=4)
+    network = m._initialize_network()
+    history = m._train_softmax_cross_entropy(network, data[:split], data[split:], verbose=False)
+    best = min(history, key=lambda h: h["val_loss"])
+    assert history[-1]["best_epoch"] == best["epoch"]
+    assert history[-1]["best_val_loss"] == best["val_loss"]
+    val_loss, _ = m._evaluate(network, data[split:])
+    assert abs(val_loss - best["val_loss"]) < 1e-9
+
+
+def test_data_parallel_training_matches_serial():
+    data = _dataset(seed=4)
+    split = int(0.8 * len(data))
+    results = []
+    for workers in (1, 3):
+        random.seed(8)
+        m = ClinicalReasoningNetwork(hidden_neurons=10, learning_rate=1.0, epochs=3, batch_size=32,
+                                     workers=workers)
+        network = m._initialize_network()
+        history = m._train_softmax_cross_entropy(network, data[:split], data[split:], verbose=False)
+        results.append((history, network))
+    (serial, serial_net), (parallel, parallel_net) = results
+    for a, b in zip(serial, parallel):
+        assert abs(a["val_loss"] - b["val_loss"]) < 1e-9
+        assert a["train_acc"] == b["train_acc"]
+    # Weights are back in private, writable memory after the pool shuts down
+    assert parallel_net[0]["weights"].flags.writeable
+    assert np.allclose(serial_net[0]["weights"], parallel_net[0]["weights"])
+
+
+def test_data_parallel_startup_failure_releases_shared_memory(monkeypatch):
+    from multiprocessing import shared_memory
+
+    import pytest
+    from versions.v2 import data_parallel
+
+    created = []
+    real_shm = shared_memory.SharedMemory
+
+    def tracking_shm(*args, **kwargs):
+        shm = real_shm(*args, **kwargs)
+        created.append(shm.name)
+        return shm
+
+    class FailingContext:
+        def Pool(self, *args, **kwargs):
+            raise OSError("no processes available")
+
+    monkeypatch.setattr(data_parallel.shared_memory, "SharedMemory", tracking_shm)
+    monkeypatch.setattr(data_parallel.mp, "get_context", lambda: FailingContext())
+    m = ClinicalReasoningNetwork(hidden_neurons=10, epochs=1, batch_size=32, workers=2)
+    network = m._initialize_network()
+    data = _dataset(seed=5)
+    with pytest.raises(OSError):
+        m._train_softmax_cross_entropy(network, data[:40], data[40:], verbose=False)
+    assert len(created) == 2
+    for name in created:
+        with pytest.raises(FileNotFoundError):
+            real_shm(name=name)
+    # Weights were moved back out of the released segments
+    assert network[0]["weights"].flags.writeable and np.isfinite(network[0]["weights"]).all()
+
+
+def test_resumed_training_matches_one_uninterrupted_run():
+    data = _dataset(seed=6)
+    split = int(0.8 * len(data))
+
+    def run(epochs, resume=None, optimizer="momentum"):
+        random.seed(9)
+        m = ClinicalReasoningNetwork(hidden_neurons=10, learning_rate=0.5, epochs=epochs, batch_size=16,
+                                     optimizer=optimizer, dropout_rate=0.2)
+        network = m._initialize_network()
+        history = m._train_softmax_cross_entropy(network, data[:split], data[split:], verbose=False, resume=resume)
+        return history, network, m.training_state
+
+    for optimizer in ("momentum", "adam"):
+        full, full_net, _ = run(6, optimizer=optimizer)
+        _, _, state = run(2, optimizer=optimizer)
+        resumed, resumed_net, _ = run(6, resume=state, optimizer=optimizer)
+        assert [h["val_loss"] for h in resumed] == [h["val_loss"] for h in full]
+        assert np.array_equal(resumed_net[0]["weights"], full_net[0]["weights"])
+
+
+def test_data_parallel_training_drops_shared_views_before_close(monkeypatch):
+    import weakref
+
+    from versions.v2 import data_parallel
+
+    leftover = []
+    real_close = data_parallel.DataParallelTrainer.close
+
+    def close(self):
+        # Unmapping a segment that a live view still points into leaves that view dangling
+        shared = weakref.ref(self.params)
+        params = real_close(self)
+        leftover.append(shared() is not None)
+        return params
+
+    monkeypatch.setattr(data_parallel.DataParallelTrainer, "close", close)
+    data = _dataset(seed=7)
+    m = ClinicalReasoningNetwork(hidden_neurons=6, epochs=1, batch_size=32, workers=2)
+    network = m._initialize_network()
+    m._train_softmax_cross_entropy(network, data[:40], data[40:], verbose=False)
+    assert leftover == [False]
+    assert network[0]["weights"].flags.writeable and np.isfinite(network[0]["weights"]).all()
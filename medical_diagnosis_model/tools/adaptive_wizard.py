@@ -59,11 +59,17 @@ def main() -> int:
         _ADAPTIVE_SESSIONS,  # type: ignore
         _answers_to_vectors,  # type: ignore
         _compute_adjusted_probs,  # type: ignore
+        wait_until_ready,
     )
-    from versions.v2.medical_disease_schema_v2 import DISEASES_V2  # type: ignore
+    from versions.v2.medical_disease_schema_v2 import DISEASES_V2, compile_symptom_patterns  # type: ignore
     from medical_symptom_schema import SYMPTOMS  # type: ignore
+    from backend.selector.eig_selector import rank_by_eig
 
     client = TestClient(app)
+    print("Loading model...")
+    if not wait_until_ready(600):
+        print("Model did not become ready")
+        return 1
 
     prior = _prompt_seed()
     payload = {"prior_answers": prior} if prior else {}
@@ -86,11 +92,6 @@ def main() -> int:
         print(f"  ID:   {q.get('symptom_id')}")
         print(f"  Name: {q.get('name')}  (ICD-10: {q.get('icd_10')})")
 
-    def _entropy(probs: List[float]) -> float:
-        import math
-        eps = 1e-12
-        return -sum(p * math.log(max(p, eps)) for p in probs)
-
     def _rank_candidates(session_id: str, k: int = 5) -> Tuple[List[Tuple[int, float, str]], List[Tuple[int, float, str]]]:
         # Collect answers and compute current posterior P(d)
         sess = _ADAPTIVE_SESSIONS.get(session_id) or {}
@@ -99,32 +100,18 @@ def main() -> int:
         probs = _compute_adjusted_probs(sv, sev, present)  # type: ignore
         d_ids = list(DISEASES_V2.keys())
         p_map = {did: probs[did] for did in d_ids}
-        h_before = _entropy(list(p_map.values()))
         asked = set(int(sid) for sid in answers.keys())
-        ranked: List[Tuple[int, float, str]] = []
-        for sid in range(30):
-            if sid in asked:
-                continue
-            py_d = {did: DISEASES_V2[did].get("symptom_patterns", {}).get(sid, {}).get("frequency", 0.0) for did in d_ids}
-            p_yes = sum(p_map[did] * py_d[did] for did in d_ids)
-            p_no = 1.0 - p_yes
-            if p_yes <= 1e-9 or p_no <= 1e-9:
-                eig = 0.0
-            else:
-                post_yes = [(p_map[did] * py_d[did]) / p_yes for did in d_ids]
-                post_no = [(p_map[did] * (1.0 - py_d[did])) / p_no for did in d_ids]
-                h_yes = _entropy(post_yes)
-                h_no = _entropy(post_no)
-                eig = h_before - (p_yes * h_yes + p_no * h_no)
-            name = (SYMPTOMS.get(sid, {}) or {}).get("name", str(sid))
-            ranked.append((sid, eig, name))
-        ranked.sort(key=lambda t: t[1], reverse=True)
+        candidates = [sid for sid in range(30) if sid not in asked]
+        ranked = [
+            (sid, eig, (SYMPTOMS.get(sid, {}) or {}).get("name", str(sid)))
+            for sid, eig in rank_by_eig(probs, compile_symptom_patterns().frequency.T, candidates, k=max(1, k))
+        ]
         # Also compute top diseases by current posterior
         top_diseases: List[Tuple[int, float, str]] = []
         for did in d_ids:
             top_diseases.append((did, p_map[did], DISEASES_V2[did]["name"]))
         top_diseases.sort(key=lambda t: t[1], reverse=True)
-        return ranked[: max(1, k)], top_diseases[:3]
+        return ranked, top_diseases[:3]
 
     while True:
         _print_q(next_q)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Precompute the adaptive questioning policy for the active model.
+
+Expands the first --depth questions over yes/no answers (unknown shares the no
+branch) into a policy tree artifact tagged with the model version. The API loads it
+from MDM_ADAPTIVE_POLICY (default: models/adaptive_policy.json) and ignores it once
+a different model is active; rebuild after retraining.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+
+def _setup_paths() -> None:
+    here = os.path.abspath(os.path.dirname(__file__))
+    model_root = os.path.dirname(here)
+    repo_root = os.path.dirname(model_root)
+    for p in (repo_root, model_root):
+        if p not in sys.path:
+            sys.path.append(p)
+
+
+def main() -> int:
+    _setup_paths()
+    parser = argparse.ArgumentParser(description="Build the adaptive policy tree artifact")
+    parser.add_argument("--depth", type=int, default=6, help="Answers to expand (nodes <= 2^(depth+1) - 1)")
+    parser.add_argument("--out", default=None, help="Output path (default: MDM_ADAPTIVE_POLICY)")
+    args = parser.parse_args()
+
+    from backend.app import ADAPTIVE_POLICY_PATH, _MODELS, _adaptive_step, wait_until_ready  # type: ignore
+    from backend.selector.policy_tree import build_policy_tree, save_policy_tree
+
+    print("Loading model...")
+    if not wait_until_ready(600):
+        print("Model did not become ready")
+        return 1
+    loaded = _MODELS.active
+    start = time.perf_counter()
+    artifact = build_policy_tree(lambda answers: _adaptive_step(loaded, {"answers": answers}),
+                                 args.depth, loaded.version)
+    out = args.out or ADAPTIVE_POLICY_PATH
+    save_policy_tree(artifact, out)
+    print(f"Wrote {len(artifact['nodes'])} nodes (depth {args.depth}, model {loaded.version}) "
+          f"to {out} in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -70,16 +70,18 @@ def cmd_tests(args: argparse.Namespace) -> None:
     _run(cmd, env=pyenv)
 
 
-def _wait_for(url: str, timeout_s: int = 30) -> None:
+def _wait_for(url: str, timeout_s: int = 30, require_ok: bool = False) -> None:
     deadline = time.time() + timeout_s
     last_err = None
     while time.time() < deadline:
         try:
-            requests.get(url, timeout=2)
-            return
+            r = requests.get(url, timeout=2)
+            if not require_ok or r.ok:
+                return
+            last_err = f"HTTP {r.status_code}"
         except Exception as e:
             last_err = e
-            time.sleep(0.5)
+        time.sleep(0.5)
     raise RuntimeError(f"Service not ready at {url}: {last_err}")
 
 
@@ -98,7 +100,8 @@ def _start_server(args: argparse.Namespace) -> tuple[Optional[subprocess.Popen],
     ]
     proc = subprocess.Popen(cmd, env=env, cwd=str(ROOT))
     try:
-        _wait_for(f"http://localhost:{args.port}/docs", timeout_s=60)
+        # Startup returns at once; /readyz turns 200 once the model is loaded and warmed
+        _wait_for(f"http://localhost:{args.port}/readyz", timeout_s=120, require_ok=True)
     except Exception:
         try:
             proc.terminate()
@@ -5,11 +5,17 @@ One-shot training pipeline:
  - Train v2 from JSONL
  - Calibrate and save model to models/enhanced_medical_model_v02.json
  - Optionally run a quick confusion summary on held-out set (counts only)
+ - `sweep` subcommand: parallel hyperparameter search with successive halving on the splits
 """
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 
@@ -36,20 +42,33 @@ def generate_dataset(per_disease: int) -> Path:
     return path
 
 
-def train_model(jsonl_path: Path, epochs: int) -> Path:
+def build_model(epochs: int | None = None, batch_size: int | None = None, config: str | None = None,
+                workers: int = 1):
+    """Model with pipeline defaults, then the training config, then explicit CLI overrides."""
     from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
-    m = ClinicalReasoningNetwork(hidden_neurons=25, learning_rate=0.3, epochs=epochs)
-    m.train_from_jsonl(str(jsonl_path), verbose=False)
+    m = ClinicalReasoningNetwork(hidden_neurons=25, learning_rate=0.3, epochs=5000)
+    settings = m.apply_training_config(config) if config else {}
+    if epochs is not None:
+        m.epochs = epochs
+    if batch_size is not None:
+        m.batch_size = batch_size
+    m.workers = max(1, workers)
+    return m, settings.get("seed", 42)
+
+
+def train_model(jsonl_path: Path, epochs: int | None = None, batch_size: int | None = None,
+                config: str | None = None, workers: int = 1) -> Path:
+    m, seed = build_model(epochs, batch_size, config, workers)
+    print(f"Training: optimizer={m.optimizer} lr={m.learning_rate} weight_decay={m.weight_decay} "
+          f"dropout={m.dropout_rate} hidden={m.hidden_neurons} batch_size={m.batch_size} epochs={m.epochs} "
+          f"workers={m.workers}")
+    m.train_from_jsonl(str(jsonl_path), seed=seed, verbose=False)
     out = Path(__file__).resolve().parents[1] / "models" / "enhanced_medical_model_v02.json"
     m.save_model(str(out))
     return out
 
 
-def evaluate_model(jsonl_path: Path, model_path: Path, report_path: Path) -> None:
-    """Compute a small confusion matrix and ECE (top-1) on the dataset."""
-    from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork, DISEASES_V2, get_symptom_by_name
-    import json
-    # Load dataset
+def _read_jsonl(jsonl_path) -> list[dict]:
     rows = []
     with open(jsonl_path, "r", encoding="utf-8") as f:
         for line in f:
@@ -57,23 +76,34 @@ def evaluate_model(jsonl_path: Path, model_path: Path, report_path: Path) -> Non
             if not line:
                 continue
             rows.append(json.loads(line))
-    # Build vectors
-    def vec(row):
-        sym = row.get("symptoms", {})
-        symptom_vector = [0] * 30
-        severity_vector = [0.0] * 30
-        for name, sev in sym.items():
-            sid, _ = get_symptom_by_name(name)
-            if sid is None or sid >= 30:
-                continue
-            try:
-                sevn = float(sev) / 10.0
-            except Exception:
-                sevn = 0.0
-            if sevn > 0.0:
-                symptom_vector[sid] = 1
-                severity_vector[sid] = sevn
-        return symptom_vector, severity_vector
+    return rows
+
+
+def vec(row: dict):
+    """Symptom presence and severity vectors (30 each) for a JSONL case."""
+    from versions.v2.medical_neural_network_v2 import get_symptom_by_name
+    sym = row.get("symptoms", {})
+    symptom_vector = [0] * 30
+    severity_vector = [0.0] * 30
+    for name, sev in sym.items():
+        sid, _ = get_symptom_by_name(name)
+        if sid is None or sid >= 30:
+            continue
+        try:
+            sevn = float(sev) / 10.0
+        except Exception:
+            sevn = 0.0
+        if sevn > 0.0:
+            symptom_vector[sid] = 1
+            severity_vector[sid] = sevn
+    return symptom_vector, severity_vector
+
+
+def evaluate_model(jsonl_path: Path, model_path: Path, report_path: Path) -> None:
+    """Compute a small confusion matrix and ECE (top-1) on the dataset."""
+    from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork, DISEASES_V2
+    # Load dataset
+    rows = _read_jsonl(jsonl_path)
     # Model
     m = ClinicalReasoningNetwork()
     m.load_model(str(model_path))
@@ -88,17 +118,20 @@ def evaluate_model(jsonl_path: Path, model_path: Path, report_path: Path) -> Non
         {"low": b / B, "high": (b + 1) / B, "confs": [], "accs": []}
         for b in range(B)
     ]
-    for row in rows:
-        true_name = row.get("label_name")
-        if true_name is None:
-            continue
+    # Score every labelled row in one batched forward pass
+    scored = [row for row in rows if row.get("label_name") is not None]
+    feats = []
+    for row in scored:
         s, sev = vec(row)
-        probs = m._predict_proba(s + sev)
-        pred_id = max(range(len(probs)), key=lambda i: probs[i])
+        feats.append(s + sev)
+    probs_all = m.predict_proba_batch(feats)
+    pred_ids = probs_all.argmax(axis=1).tolist()
+    top_confs = probs_all.max(axis=1).tolist()
+    for row, pred_id, top_conf in zip(scored, pred_ids, top_confs):
+        true_name = row.get("label_name")
         pred_name = labels.get(pred_id, str(pred_id))
         cm[true_name][pred_name] = cm.get(true_name, {}).get(pred_name, 0) + 1
         n += 1
-        top_conf = probs[pred_id]
         match = int(pred_name == true_name)
         if pred_name == true_name:
             correct += 1
@@ -162,11 +195,217 @@ def evaluate_model(jsonl_path: Path, model_path: Path, report_path: Path) -> Non
         print(f"Accuracy={acc:.3f}  ECE={ece:.3f}")
 
 
+# ===== Hyperparameter sweep =====
+
+SWEEP_KEYS = ("optimizer", "learning_rate", "momentum", "weight_decay", "dropout_rate", "hidden_neurons", "batch_size")
+# Learning rates are SGD-scale; the optimizer is pinned so a --config that selects Adam
+# (configs/training.yaml does) cannot pair them with it
+DEFAULT_SWEEP_SPACE = {
+    "optimizer": ["sgd"],
+    "hidden_neurons": [16, 25, 40],
+    "learning_rate": [0.1, 0.3, 1.0],
+    "batch_size": [1, 32],
+}
+
+
+def load_sweep_space(path: str | None) -> dict:
+    """Search space from a YAML/JSON mapping of setting -> list of values (default: DEFAULT_SWEEP_SPACE)."""
+    if not path:
+        return dict(DEFAULT_SWEEP_SPACE)
+    text = Path(path).read_text(encoding="utf-8")
+    if path.endswith((".yaml", ".yml")):
+        import yaml
+        space = yaml.safe_load(text) or {}
+    else:
+        space = json.loads(text)
+    unknown = sorted(set(space) - set(SWEEP_KEYS))
+    if unknown:
+        raise SystemExit(f"Unknown sweep keys: {', '.join(unknown)} (allowed: {', '.join(SWEEP_KEYS)})")
+    return {k: v if isinstance(v, list) else [v] for k, v in space.items()}
+
+
+def sweep_candidates(space: dict, samples: int = 0, seed: int = 42) -> list[dict]:
+    """Grid over the space; with samples > 0, a seeded random subset of that size."""
+    keys = sorted(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if 0 < samples < len(grid):
+        grid = random.Random(seed).sample(grid, samples)
+    return grid
+
+
+def split_arrays(jsonl_path):
+    """(features, label ids) for the labelled cases of a JSONL split."""
+    import numpy as np
+    from versions.v2.medical_neural_network_v2 import DISEASES_V2
+    ids = {d["name"]: did for did, d in DISEASES_V2.items()}
+    feats, labels = [], []
+    for row in _read_jsonl(jsonl_path):
+        if row.get("label_name") in ids:
+            s, sev = vec(row)
+            feats.append(s + sev)
+            labels.append(ids[row["label_name"]])
+    return np.asarray(feats, dtype=np.float64).reshape(len(feats), -1), np.asarray(labels, dtype=np.int64)
+
+
+def probability_metrics(probs, labels, n_bins: int = 10) -> dict:
+    """NLL, top-1 accuracy and ECE (same 10 equal-width bins as evaluate_model)."""
+    import numpy as np
+    n = len(labels)
+    if n == 0:
+        return {"val_nll": 0.0, "val_accuracy": 0.0, "val_ece": 0.0}
+    picked = probs[np.arange(n), labels]
+    conf = probs.max(axis=1)
+    hit = (probs.argmax(axis=1) == labels).astype(np.float64)
+    bins = np.minimum((conf * n_bins).astype(int), n_bins - 1)
+    ece = 0.0
+    for b in range(n_bins):
+        mask = bins == b
+        if mask.any():
+            ece += mask.sum() / n * abs(conf[mask].mean() - hit[mask].mean())
+    return {
+        "val_nll": -float(np.log(np.clip(picked, 1e-12, 1.0)).mean()),
+        "val_accuracy": float(hit.mean()),
+        "val_ece": float(ece),
+    }
+
+
+def _sweep_trial(task: dict) -> dict:
+    """
+    Train one candidate up to a total epoch budget and score it on the validation split (runs in a
+    worker). With task["resume"] (the result of its previous rung) training continues from that
+    rung's training_state, so only the extra epochs are run; the result carries the new state.
+    """
+    _setup_paths()
+    import contextlib
+    import io
+    m, seed = build_model(epochs=task["epochs"], config=task["config"])
+    for key, value in task["params"].items():
+        setattr(m, key, value)
+    previous = task.get("resume") or {}
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        history = m.train_from_jsonl(task["train"], seed=seed, verbose=False, resume=previous.get("state"))
+    wall = time.perf_counter() - start + previous.get("wall_time_s", 0.0)
+    feats, labels = split_arrays(task["val"])
+    result = {"params": task["params"], "epochs": task["epochs"], "epochs_run": len(history),
+              "best_epoch": history[-1]["best_epoch"] if history else None,
+              "temperature": m.temperature, "wall_time_s": wall, "state": m.training_state}
+    result.update(probability_metrics(m.predict_proba_batch(feats), labels))
+    return result
+
+
+def successive_halving(candidates: list[dict], run_rung, min_epochs: int, max_epochs: int, eta: int = 3) -> list[dict]:
+    """
+    Successive halving: every live candidate trains up to the rung's epoch budget, the best
+    1/eta by val NLL survive, and the budget grows eta-fold until max_epochs. run_rung(params_list,
+    epochs, previous) returns one result dict per candidate; previous holds each survivor's result
+    from the last rung (None on the first) so it can resume rather than retrain from scratch. All
+    results from every rung are returned.
+    """
+    results = []
+    alive = list(candidates)
+    previous = None
+    epochs = min(min_epochs, max_epochs)
+    rung = 0
+    while alive:
+        scored = sorted(run_rung(alive, epochs, previous), key=lambda r: r["val_nll"])
+        for r in scored:
+            r["rung"] = rung
+        results.extend(scored)
+        if epochs >= max_epochs or len(alive) == 1:
+            break
+        previous = scored[:max(1, len(scored) // eta)]
+        alive = [r["params"] for r in previous]
+        epochs = min(max_epochs, epochs * eta)
+        rung += 1
+    return results
+
+
+def run_sweep(space: dict, splits: Path, min_epochs: int, max_epochs: int, eta: int = 3, jobs: int = 1,
+              samples: int = 0, config: str | None = None, out_path: Path | None = None, seed: int = 42) -> dict:
+    """Successive-halving sweep over `space` on splits/{train,val}.jsonl; writes and returns the leaderboard."""
+    train_jsonl, val_jsonl = Path(splits) / "train.jsonl", Path(splits) / "val.jsonl"
+    if not train_jsonl.exists() or not val_jsonl.exists():
+        raise SystemExit(f"Missing split files in {splits} (expected train.jsonl and val.jsonl)")
+    candidates = sweep_candidates(space, samples, seed)
+    rungs = []
+    sweep_start = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+        def run_rung(params_list, epochs, previous):
+            print(f"Rung {len(rungs)}: {len(params_list)} candidates x {epochs} epochs")
+            rungs.append({"epochs": epochs, "candidates": len(params_list)})
+            tasks = [{"params": p, "epochs": epochs, "config": config, "train": str(train_jsonl), "val": str(val_jsonl),
+                      "resume": previous[i] if previous else None}
+                     for i, p in enumerate(params_list)]
+            return list(pool.map(_sweep_trial, tasks))
+
+        results = successive_halving(candidates, run_rung, min_epochs, max_epochs, eta)
+
+    # Leaderboard: each candidate's furthest rung, deepest rung first, then by val NLL
+    final = {}
+    for r in results:
+        r.pop("state", None)
+        final[json.dumps(r["params"], sort_keys=True)] = r
+    leaderboard = sorted(final.values(), key=lambda r: (-r["rung"], r["val_nll"]))
+    report = {
+        "splits": str(splits),
+        "space": space,
+        "eta": eta,
+        "rungs": rungs,
+        "wall_time_s": time.perf_counter() - sweep_start,
+        "leaderboard": leaderboard,
+    }
+    if out_path is not None:
+        out_path = Path(out_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        out_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return report
+
+
+def sweep_main(argv: list[str]) -> int:
+    _setup_paths()
+    root = Path(__file__).resolve().parents[1]
+    ap = argparse.ArgumentParser(prog="train_pipeline.py sweep",
+                                 description="Parallel hyperparameter sweep with successive halving")
+    ap.add_argument("--splits", default=str(root / "data" / "splits" / "v02"), help="Directory with {train,val}.jsonl")
+    ap.add_argument("--space", default=None,
+                    help=f"YAML/JSON mapping of setting -> values ({', '.join(SWEEP_KEYS)}); default: small built-in grid")
+    ap.add_argument("--samples", type=int, default=0, help="Random subset of the grid to start from (0 = full grid)")
+    ap.add_argument("--min-epochs", type=int, default=50, help="Epoch budget of the first rung")
+    ap.add_argument("--max-epochs", type=int, default=1350, help="Epoch budget cap for the last rung")
+    ap.add_argument("--eta", type=int, default=3, help="Keep the best 1/eta per rung; budgets grow eta-fold")
+    ap.add_argument("--jobs", type=int, default=4, help="Candidates trained in parallel")
+    ap.add_argument("--config", default="",
+                    help="Base training config the candidates override (default: built-in SGD defaults; "
+                         "configs/training.yaml selects Adam, so set optimizer in --space alongside learning_rate)")
+    ap.add_argument("--out", default=str(root / "reports" / "sweep_v02.json"))
+    args = ap.parse_args(argv)
+    if args.eta < 2:
+        raise SystemExit("--eta must be at least 2")
+
+    report = run_sweep(load_sweep_space(args.space), Path(args.splits), args.min_epochs, args.max_epochs, args.eta,
+                       args.jobs, args.samples, args.config, Path(args.out))
+    print(f"Sweep finished in {report['wall_time_s']:.1f}s; top candidates:")
+    for r in report["leaderboard"][:5]:
+        print(f"  rung={r['rung']} epochs={r['epochs']} val_nll={r['val_nll']:.4f} acc={r['val_accuracy']:.3f} "
+              f"ece={r['val_ece']:.3f} T={r['temperature']:.2f} time={r['wall_time_s']:.1f}s  {r['params']}")
+    print(f"Wrote leaderboard to {args.out}")
+    return 0
+
+
 def main() -> int:
+    if sys.argv[1:2] == ["sweep"]:
+        return sweep_main(sys.argv[2:])
     _setup_paths()
     ap = argparse.ArgumentParser(description="Train v0.2 model from generated data")
     ap.add_argument("--per-disease", type=int, default=200)
-    ap.add_argument("--epochs", type=int, default=5000)
+    ap.add_argument("--epochs", type=int, default=None, help="Max epochs (default: config, else 5000)")
+    ap.add_argument("--batch-size", type=int, default=None, help="Mini-batch size (1 = per-sample SGD)")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="Data-parallel training processes (shards each mini-batch; pair with a large --batch-size)")
+    ap.add_argument("--config", default=str(Path(__file__).resolve().parents[1] / "configs" / "training.yaml"),
+                    help="Training config YAML (optimizer/regularization/model); pass '' to use built-in SGD defaults")
     ap.add_argument("--jsonl", default=None, help="Use existing JSONL instead of generating")
     ap.add_argument("--use-existing-model", default=None, help="Skip training and evaluate this model path")
     ap.add_argument("--report", default="medical_diagnosis_model/reports/metrics_v02.json")
@@ -181,11 +420,7 @@ def main() -> int:
         if not train_jsonl.exists() or not val_jsonl.exists():
             raise SystemExit(f"Missing split files in {split_dir} (expected train.jsonl and val.jsonl)")
         # Train on train split
-        from versions.v2.medical_neural_network_v2 import ClinicalReasoningNetwork
-        m = ClinicalReasoningNetwork(hidden_neurons=25, learning_rate=0.3, epochs=args.epochs)
-        m.train_from_jsonl(str(train_jsonl), verbose=False)
-        model_path = Path(__file__).resolve().parents[1] / "models" / "enhanced_medical_model_v02.json"
-        m.save_model(str(model_path))
+        model_path = train_model(train_jsonl, args.epochs, args.batch_size, args.config, args.workers)
         print(f"Saved model: {model_path}")
         # Evaluate on val split
         report_path = Path(args.report)
@@ -202,7 +437,7 @@ def main() -> int:
             model_path = Path(args.use_existing_model)
             print(f"Using existing model: {model_path}")
         else:
-            model_path = train_model(jsonl, args.epochs)
+            model_path = train_model(jsonl, args.epochs, args.batch_size, args.config, args.workers)
             print(f"Saved model: {model_path}")
         # Evaluate and write report on same JSONL
         report_path = Path(args.report)
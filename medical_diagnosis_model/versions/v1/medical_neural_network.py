@@ -4,9 +4,15 @@ Built on the foundation of symptom-disease mappings with medical terminology
 """
 
 try:
-    from foundational_brain.NeuralNet import initialize_network, train_network, forward_user_input, predict
+    from foundational_brain.MatrixNet import (
+        initialize_network, train_network, forward_user_input, predict,
+        from_neuron_network, to_neuron_network
+    )
 except Exception:
-    from NeuralNet import initialize_network, train_network, forward_user_input, predict
+    from MatrixNet import (
+        initialize_network, train_network, forward_user_input, predict,
+        from_neuron_network, to_neuron_network
+    )
 from medical_symptom_schema import SYMPTOMS, get_symptom_by_name
 from medical_disease_schema import DISEASES, get_differential_diagnosis
 from medical_training_generator import MedicalDataGenerator
@@ -228,7 +234,7 @@ class MedicalDiagnosisNetwork:
             raise ValueError("No trained model to save")
         
         model_data = {
-            "network": self.network,
+            "network": to_neuron_network(self.network),
             "config": {
                 "num_symptoms": self.num_symptoms,
                 "num_features": self.num_features,
@@ -251,7 +257,7 @@ class MedicalDiagnosisNetwork:
         with open(filename, 'r') as f:
             model_data = json.load(f)
         
-        self.network = model_data["network"]
+        self.network = from_neuron_network(model_data["network"])
         config = model_data["config"]
         self.num_symptoms = config["num_symptoms"]
         self.num_features = config["num_features"]
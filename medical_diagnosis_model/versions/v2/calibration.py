@@ -0,0 +1,113 @@
+"""
+Post-hoc probability calibration for the v2 network
+Both fits work on a cached (N, D) matrix of validation logits, so no forward passes are
+needed while searching: temperature scaling fits one scalar T (softmax(z / T)), vector
+scaling fits a per-class scale and bias (softmax(z * w + b)).
+"""
+
+import numpy as np
+
+
+def _log_softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    return z - np.log(np.exp(z).sum(axis=1, keepdims=True))
+
+
+def nll(logits, labels):
+    """Mean negative log-likelihood of integer labels under softmax(logits)"""
+    if len(labels) == 0:
+        return 0.0
+    return -float(_log_softmax(logits)[np.arange(len(labels)), labels].mean())
+
+
+def fit_temperature(logits, labels, t_min=0.05, t_max=20.0, tol=1e-8, max_iter=50):
+    """
+    Temperature minimizing validation NLL, searched over [t_min, t_max]
+
+    The NLL is convex in the inverse temperature s = 1/T (first derivative
+    E_p[z] - z_y, second derivative Var_p[z]), so safeguarded Newton on s converges in a
+    handful of passes over the cached logits; steps that leave the bracket fall back to
+    bisection.
+    """
+    z = np.asarray(logits, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.int64)
+    if len(labels) == 0:
+        return 1.0
+    z_true = z[np.arange(len(labels)), labels]
+    lo, hi = 1.0 / t_max, 1.0 / t_min
+    s = min(max(1.0, lo), hi)
+    for _ in range(max_iter):
+        p = np.exp(_log_softmax(z * s))
+        mean = (p * z).sum(axis=1)
+        grad = float((mean - z_true).mean())
+        curv = float(((p * z * z).sum(axis=1) - mean * mean).mean())
+        if grad > 0:
+            hi = s
+        else:
+            lo = s
+        if abs(grad) < tol:
+            break
+        newton = s - grad / curv if curv > 0 else None
+        s_next = newton if newton is not None and lo < newton < hi else 0.5 * (lo + hi)
+        converged = abs(s_next - s) < tol * max(1.0, s)
+        s = s_next
+        if converged:
+            break
+    return float(1.0 / s)
+
+
+def fit_vector_scaling(logits, labels, temperature=1.0, l2=1e-3, max_iter=50, tol=1e-9):
+    """
+    Per-class scale w and bias b minimizing validation NLL of softmax(z * w + b)
+
+    Damped Newton steps with backtracking, starting from the temperature solution
+    (w = 1/T, b = 0). A small L2 pull towards that start keeps classes with few
+    validation cases from drifting and keeps the Hessian positive definite.
+
+    Returns:
+        (scale, bias) float64 arrays of shape (D,)
+    """
+    z = np.asarray(logits, dtype=np.float64)
+    labels = np.asarray(labels, dtype=np.int64)
+    n, n_classes = z.shape
+    if n == 0:
+        return np.ones(n_classes), np.zeros(n_classes)
+    onehot = np.eye(n_classes)[labels]
+    theta0 = np.concatenate([np.full(n_classes, 1.0 / temperature), np.zeros(n_classes)])
+    # Each class's logit u_k = z_k * w_k + b_k has its own two features (z_k, 1)
+    feats = (z, np.ones_like(z))
+
+    def objective(theta):
+        u = z * theta[:n_classes] + theta[n_classes:]
+        return -float((_log_softmax(u) * onehot).sum() / n) + 0.5 * l2 * float(((theta - theta0) ** 2).sum())
+
+    theta = theta0.copy()
+    loss = objective(theta)
+    for _ in range(max_iter):
+        u = z * theta[:n_classes] + theta[n_classes:]
+        p = np.exp(_log_softmax(u))
+        r = p - onehot  # (n, D)
+        grad = np.concatenate([(r * z).sum(axis=0), r.sum(axis=0)]) / n + l2 * (theta - theta0)
+        # Hessian of the multinomial NLL, block (a, c) for features a, c in (z, 1):
+        # sum_i x_ika x_ikc p_ik on the diagonal minus (x_a * p)^T (x_c * p)
+        hess = np.empty((2 * n_classes, 2 * n_classes))
+        for a, xa in enumerate(feats):
+            for c, xc in enumerate(feats):
+                block = -(xa * p).T @ (xc * p)
+                block[np.diag_indices(n_classes)] += (xa * xc * p).sum(axis=0)
+                hess[a * n_classes:(a + 1) * n_classes, c * n_classes:(c + 1) * n_classes] = block
+        hess = hess / n + l2 * np.eye(2 * n_classes)
+        step = np.linalg.solve(hess, grad)
+        scale = 1.0
+        while scale > 1e-4:
+            candidate = theta - scale * step
+            new_loss = objective(candidate)
+            if new_loss <= loss:
+                break
+            scale *= 0.5
+        else:
+            break
+        theta, improvement, loss = candidate, loss - new_loss, new_loss
+        if improvement < tol:
+            break
+    return theta[:n_classes].copy(), theta[n_classes:].copy()
@@ -0,0 +1,324 @@
+"""
+Compiled clinical decision rules for the v2 network
+The rules that adjust network probabilities (Centor criteria, negative-evidence penalty, UTI
+guard, syndrome gating, discriminative logit boosts and the pneumonia guardrail) are declared
+as data below and compiled once against the disease schema into index-resolved arrays, so
+applying them is a fixed number of NumPy operations for one case or a batch of cases.
+"""
+
+import numpy as np
+
+from .medical_disease_schema_v2 import (
+    DISEASES_V2, SYNDROMES, RESPIRATORY_SYMPTOMS, GI_SYMPTOMS, SYSTEMIC_SYMPTOMS,
+    FEBRILE_RESPIRATORY_KEYS, compile_symptom_patterns, get_appropriate_differential
+)
+
+# Symptom ids referenced by the rules
+FEVER, FATIGUE, COUGH, DYSPNEA, SORE_THROAT, RHINORRHEA, CONGESTION, NAUSEA = 0, 1, 3, 4, 6, 7, 8, 9
+MYALGIA, CHEST_PAIN, FREQUENCY_URGENCY, DYSURIA, ANOSMIA = 16, 18, 26, 27, 28
+
+URI = "Viral Upper Respiratory Infection"
+ILI = "Influenza-like Illness"
+COVID = "COVID-19-like Illness"
+PNEUMONIA = "Pneumonia Syndrome"
+STREP = "Streptococcal Pharyngitis"
+UTI = "Urinary Tract Infection"
+
+# Conditions: (symptom_id, op, threshold) on severity with op in ">", ">=", "<";
+# ("present", sid) / ("absent", sid) on the symptom list; ("context", "respiratory") when the
+# inferred syndrome is respiratory or undifferentiated.
+
+# Score rules multiply a diagnosis' probability by factors[min(points, len(factors) - 1)],
+# where points counts the conditions that hold
+SCORE_RULES = [
+    # Centor criteria for strep: fever, absence of cough, sore throat
+    {"target": STREP, "points": [[("present", FEVER), (FEVER, ">", 0.3)], [("absent", COUGH)],
+                                 [("present", SORE_THROAT), (SORE_THROAT, ">", 0.5)]],
+     "factors": [0.1, 0.1, 0.5, 1.5]},
+    # UTI should not rank high without dysuria and frequency/urgency
+    {"target": UTI, "points": [[("absent", FREQUENCY_URGENCY)], [("absent", DYSURIA)]],
+     "factors": [1.0, 0.2, 0.03]},
+]
+
+# Exponential penalty per highly expected (frequency >= threshold) symptom that is absent
+KEY_SYMPTOM_FREQUENCY = 0.85
+KEY_SYMPTOM_PENALTY = 0.6
+
+# Log-domain boosts after syndrome gating: `delta` is added to the target's logit when every
+# `all` condition holds and, if `any` is given, at least one of those holds. `requires` lists
+# diagnoses that must exist in the schema for the rule to apply.
+_GU_ABSENT = [("absent", FREQUENCY_URGENCY), ("absent", DYSURIA)]
+_URI_PATTERN = [(RHINORRHEA, ">", 0.3), (CONGESTION, ">", 0.3)]
+LOGIT_RULES = [
+    # URI: rhinorrhea + congestion + cough, not very high fever, limited myalgia
+    {"target": URI, "delta": 1.5, "all": [(RHINORRHEA, ">", 0.3), (CONGESTION, ">", 0.3), (COUGH, ">", 0.2)]},
+    {"target": URI, "delta": 0.5, "all": [(FEVER, "<", 0.6), (MYALGIA, "<", 0.6)]},
+    # Negative evidence: GU keys absent with strong URI pattern present
+    {"target": UTI, "delta": -6.0, "all": _GU_ABSENT, "any": _URI_PATTERN, "requires": [URI]},
+    # Guard against COVID-like overshadowing basic URI when anosmia is absent and fever not high
+    {"target": URI, "delta": 1.0, "all": [(ANOSMIA, "<", 0.6), (FEVER, "<", 0.6), (COUGH, ">=", 0.3)],
+     "any": _URI_PATTERN, "requires": [COVID]},
+    # Strong downweight of COVID-like for strep/URI pattern: sore throat high, cough absent, anosmia absent
+    {"target": COVID, "delta": -3.0, "all": [(ANOSMIA, "<", 0.6), (COUGH, "<", 0.2), (SORE_THROAT, ">=", 0.6)],
+     "requires": [URI]},
+    {"target": URI, "delta": 0.5, "all": [(ANOSMIA, "<", 0.6), (COUGH, "<", 0.2), (SORE_THROAT, ">=", 0.6)],
+     "requires": [COVID]},
+    # ILI: high fever + myalgia (+/- severe fatigue)
+    {"target": ILI, "delta": 2.5, "all": [(FEVER, ">=", 0.6), (MYALGIA, ">=", 0.6)]},
+    {"target": ILI, "delta": 0.5, "all": [(FATIGUE, ">=", 0.7)]},
+    # Penalize ILI (and favor URI) when myalgia and cough are absent and sore throat dominates
+    {"target": ILI, "delta": -3.5, "all": [(MYALGIA, "<", 0.3), (COUGH, "<", 0.2), (SORE_THROAT, ">=", 0.6)]},
+    {"target": URI, "delta": 1.5, "all": [(MYALGIA, "<", 0.3), (COUGH, "<", 0.2), (SORE_THROAT, ">=", 0.6)],
+     "requires": [ILI]},
+    # COVID-like: anosmia highly specific; GI + cough supportive; dyspnea moderate
+    {"target": COVID, "delta": 2.5, "all": [(ANOSMIA, ">=", 0.8)]},
+    {"target": COVID, "delta": 0.5, "all": [(NAUSEA, ">=", 0.3), (COUGH, ">", 0.2)]},
+    {"target": COVID, "delta": 0.3, "all": [(DYSPNEA, ">=", 0.4)]},
+    # Pneumonia: dyspnea + chest pain + strong cough
+    {"target": PNEUMONIA, "delta": 2.5, "all": [(DYSPNEA, ">=", 0.5), (CHEST_PAIN, ">=", 0.4), (COUGH, ">=", 0.5)]},
+    # Strongly favor pneumonia over COVID-like when the classic triad is present without anosmia
+    {"target": PNEUMONIA, "delta": 5.0, "requires": [COVID],
+     "all": [(ANOSMIA, "<", 0.6), (DYSPNEA, ">=", 0.6), (CHEST_PAIN, ">=", 0.4), (FEVER, ">=", 0.6), (COUGH, ">=", 0.6)]},
+    {"target": COVID, "delta": -8.0, "requires": [PNEUMONIA],
+     "all": [(ANOSMIA, "<", 0.6), (DYSPNEA, ">=", 0.6), (CHEST_PAIN, ">=", 0.4), (FEVER, ">=", 0.6), (COUGH, ">=", 0.6)]},
+    # Stronger UTI penalty if urinary keys absent, strongest when the syndrome is respiratory
+    {"target": UTI, "delta": -12.0, "all": _GU_ABSENT + [("context", "respiratory")]},
+    {"target": UTI, "delta": -8.0, "all": _GU_ABSENT + [("context", "other")]},
+]
+
+# Final deterministic guardrail: with the pneumonia triad and no anosmia, pneumonia outranks
+# COVID-like (p_pna = max(p_pna, p_covid + margin), p_covid *= factor)
+PNEUMONIA_GUARDRAIL = {"all": [(DYSPNEA, ">=", 0.6), (CHEST_PAIN, ">=", 0.4), (COUGH, ">=", 0.6), (ANOSMIA, "<", 0.3)],
+                       "margin": 0.05, "covid_factor": 0.1}
+
+GATE_BOOST = 1.0  # logit bonus for diagnoses appropriate to the syndrome, malus otherwise
+ALWAYS_ALLOWED = ("Viral Syndrome",)
+_EPS = 1e-12
+
+
+class CompiledClinicalRules:
+    """
+    Clinical rules resolved against a disease schema
+
+    apply() takes (N, D) probabilities plus (N, S) symptom counts and severities and returns
+    adjusted, renormalized (N, D) probabilities.
+    """
+
+    def __init__(self, diseases=None, num_symptoms=30):
+        diseases = DISEASES_V2 if diseases is None else diseases
+        self.num_symptoms = num_symptoms
+        self.num_diseases = max(diseases) + 1
+        self.index = {}
+        for did, disease in diseases.items():
+            self.index.setdefault(disease['name'], did)
+        # Every rule condition is an atom; every rule is a clause (conjunction of atoms, plus an
+        # optional disjunction). All clauses are evaluated by one matrix product per call.
+        self._atoms = {}
+        self._clauses = []
+        self._compile_syndromes()
+        self._compile_gates(diseases)
+        self._compile_penalties(diseases)
+        self._compile_logit_rules()
+        self.guardrail = None
+        if PNEUMONIA in self.index and COVID in self.index:
+            self.guardrail = (self.index[PNEUMONIA], self.index[COVID],
+                              self._clause(PNEUMONIA_GUARDRAIL["all"]))
+        self._compile_clauses()
+
+    # ----- compilation -----
+
+    def _clause(self, all_of, any_of=()):
+        ids = tuple(self._atoms.setdefault(c, len(self._atoms)) for c in all_of)
+        any_ids = tuple(self._atoms.setdefault(c, len(self._atoms)) for c in any_of)
+        self._clauses.append((ids, any_ids))
+        return len(self._clauses) - 1
+
+    def _symptom_mask(self, ids):
+        mask = np.zeros(self.num_symptoms, dtype=np.float64)
+        mask[[s for s in ids if s < self.num_symptoms]] = 1.0
+        return mask
+
+    def _compile_syndromes(self):
+        # Vectorized get_syndrome_from_symptoms: group counts are compared against thresholds,
+        # the resulting bits form a code, and a table maps every code to its syndrome
+        resp, gi, systemic = (self._symptom_mask(g) for g in (RESPIRATORY_SYMPTOMS, GI_SYMPTOMS, SYSTEMIC_SYMPTOMS))
+        fever, febrile = self._symptom_mask([FEVER]), self._symptom_mask(FEBRILE_RESPIRATORY_KEYS)
+        tests = [(resp, 2), (systemic, 1), (gi, 2), (systemic, 2), (resp, 1), (gi, 1), (fever, 1), (febrile, 1)]
+        self.syndrome_groups = np.stack([mask for mask, _ in tests], axis=1)
+        self.syndrome_thresholds = np.array([t for _, t in tests], dtype=np.float64)
+        self.syndrome_bits = 1 << np.arange(len(tests))
+        table = []
+        for code in range(1 << len(tests)):
+            resp2, sys1, gi2, sys2, resp1, gi1, fever1, febrile1 = ((code >> k) & 1 for k in range(len(tests)))
+            if (fever1 and febrile1) or (resp2 and sys1):
+                table.append("Respiratory Febrile")
+            elif gi2:
+                table.append("Gastrointestinal")
+            elif sys2 and not resp1 and not gi1:
+                table.append("General/Systemic")
+            else:
+                table.append("Undifferentiated")
+        self.syndrome_table = np.array([SYNDROMES.index(name) for name in table], dtype=np.int64)
+        self.respiratory_context = np.array([float("Respiratory" in s or s == "Undifferentiated") for s in SYNDROMES])
+
+    def _compile_gates(self, diseases):
+        # gate[k, d] = +GATE_BOOST if d is appropriate for syndrome k else -GATE_BOOST;
+        # syndromes without a differential are not gated
+        self.gate = np.zeros((len(SYNDROMES), self.num_diseases))
+        self.gated = np.zeros(len(SYNDROMES), dtype=bool)
+        for k, syndrome in enumerate(SYNDROMES):
+            allowed = set(get_appropriate_differential(syndrome))
+            self.gated[k] = bool(allowed)
+            allowed.update(ALWAYS_ALLOWED)
+            for did, disease in diseases.items():
+                self.gate[k, did] = GATE_BOOST if disease['name'] in allowed else -GATE_BOOST
+        self.always_gated = bool(self.gated.all())
+
+    def _compile_penalties(self, diseases):
+        # key[d, s] = number of times symptom s is a key symptom of d; keys outside the feature
+        # range can never be present and count as always missing
+        patterns = compile_symptom_patterns(diseases, self.num_symptoms)
+        self.key_symptoms = np.zeros((self.num_symptoms, self.num_diseases))
+        self.key_always_missing = np.zeros(self.num_diseases)
+        for did in diseases:
+            for sid in patterns.key_symptoms(did, KEY_SYMPTOM_FREQUENCY):
+                if 0 <= sid < self.num_symptoms:
+                    self.key_symptoms[sid, did] += 1
+                else:
+                    self.key_always_missing[did] += 1
+        self.key_total = self.key_symptoms.sum(axis=0) + self.key_always_missing
+
+        # Score rules: one clause per point; factor tables padded with their last entry up to
+        # the highest reachable score, so scores index them directly
+        rules = [r for r in SCORE_RULES if r["target"] in self.index]
+        self.score_targets = np.array([self.index[r["target"]] for r in rules], dtype=np.int64)
+        if len(set(self.score_targets.tolist())) != len(rules):
+            raise ValueError("score rules must target distinct diagnoses")
+        width = max([max(len(r["factors"]), len(r["points"]) + 1) for r in rules], default=1)
+        self.score_factors = np.array([list(r["factors"]) + [r["factors"][-1]] * (width - len(r["factors"]))
+                                       for r in rules], dtype=np.float64).reshape(len(rules), width)
+        self.score_rows = np.arange(len(rules))
+        self._score_points = [(self._clause(point), i) for i, r in enumerate(rules) for point in r["points"]]
+
+    def _compile_logit_rules(self):
+        rules = [r for r in LOGIT_RULES
+                 if r["target"] in self.index and all(name in self.index for name in r.get("requires", []))]
+        self._boost_rules = [(self._clause(r.get("all", []), r.get("any", [])), self.index[r["target"]], r["delta"])
+                             for r in rules]
+
+    def _compile_clauses(self):
+        # Every atom is one comparison `w . x < t` on x = [severity, counts, respiratory context],
+        # with w selecting (and possibly negating) one column; `negate` flips ">=" atoms, which
+        # are evaluated as not "<". Presence is counts > 0, i.e. -count < -0.5.
+        n_atoms, n_clauses = len(self._atoms), len(self._clauses)
+        self.atom_weights = np.zeros((2 * self.num_symptoms + 1, n_atoms))
+        self.atom_thresholds = np.zeros(n_atoms)
+        self.negate = np.zeros(n_atoms, dtype=bool)
+        for condition, j in self._atoms.items():
+            if isinstance(condition[0], int):
+                sid, op, threshold = condition
+                sign = -1.0 if op == ">" else 1.0
+                self.atom_weights[sid, j] = sign
+                self.atom_thresholds[j] = sign * threshold
+                self.negate[j] = op == ">="
+            elif condition[0] in ("present", "absent"):
+                sign = -1.0 if condition[0] == "present" else 1.0
+                self.atom_weights[self.num_symptoms + condition[1], j] = sign
+                self.atom_thresholds[j] = 0.5 * sign
+            else:
+                sign = -1.0 if condition[1] == "respiratory" else 1.0
+                self.atom_weights[-1, j] = sign
+                self.atom_thresholds[j] = 0.5 * sign
+
+        # Clause j fires when all of its `all` atoms hold (column j) and at least one of its
+        # `any` atoms holds if it has any (column n_clauses + j)
+        self.clause_matrix = np.zeros((n_atoms, 2 * n_clauses))
+        for j, (all_ids, any_ids) in enumerate(self._clauses):
+            self.clause_matrix[list(all_ids), j] = 1.0
+            self.clause_matrix[list(any_ids), n_clauses + j] = 1.0
+        self.clause_required = np.concatenate([self.clause_matrix[:, :n_clauses].sum(axis=0),
+                                               np.minimum(self.clause_matrix[:, n_clauses:].sum(axis=0), 1.0)])
+
+        # Clause -> score points per score rule, clause -> logit boost per diagnosis
+        self.score_points = np.zeros((n_clauses, len(self.score_targets)), dtype=np.int64)
+        for j, rule in self._score_points:
+            self.score_points[j, rule] += 1
+        self.boosts = np.zeros((n_clauses, self.num_diseases))
+        for j, target, delta in self._boost_rules:
+            self.boosts[j, target] += delta
+
+    # ----- application -----
+
+    def classify_syndromes(self, counts):
+        """Index into SYNDROMES per row (vectorized get_syndrome_from_symptoms)"""
+        bits = (np.asarray(counts, dtype=np.float64) @ self.syndrome_groups >= self.syndrome_thresholds)
+        return self.syndrome_table[bits @ self.syndrome_bits]
+
+    def _fired_clauses(self, counts, severity, syndrome):
+        x = np.concatenate([severity, counts, self.respiratory_context[syndrome][:, None]], axis=1)
+        atoms = (x @ self.atom_weights < self.atom_thresholds) ^ self.negate
+        hits = (atoms @ self.clause_matrix >= self.clause_required).reshape(len(x), 2, -1)
+        return hits[:, 0] & hits[:, 1]
+
+    def apply(self, probs, counts, severity):
+        """
+        Adjust a batch of probability rows
+
+        Args:
+            probs: (N, D) network probabilities
+            counts: (N, S) times each symptom appears in the case's symptom list (0 = absent)
+            severity: (N, S) normalized severities
+
+        Returns:
+            (N, D) adjusted probabilities; rows are renormalized when their sum is positive
+        """
+        adjusted = np.array(probs, dtype=np.float64, ndmin=2)
+        counts = np.asarray(counts, dtype=np.float64).reshape(len(adjusted), -1)
+        severity = np.asarray(severity, dtype=np.float64).reshape(len(adjusted), -1)
+        return self._apply(adjusted, counts, severity)
+
+    def _apply(self, adjusted, counts, severity):
+        # adjusted is modified in place; all inputs are 2-D float64
+        syndrome = self.classify_syndromes(counts)
+        fired = self._fired_clauses(counts, severity, syndrome)
+
+        # Multiplicative rules: key-symptom penalty and score tables (Centor, UTI keys)
+        factors = KEY_SYMPTOM_PENALTY ** (self.key_total - (counts > 0) @ self.key_symptoms)
+        if len(self.score_targets):
+            factors[:, self.score_targets] *= self.score_factors[self.score_rows, fired @ self.score_points]
+        adjusted *= factors
+
+        # Syndrome gating and discriminative boosts in the log domain, then re-softmax
+        gated = None if self.always_gated else self.gated[syndrome]
+        if gated is None or gated.any():
+            logits = np.log(np.maximum(adjusted, _EPS)) + self.gate[syndrome] + fired @ self.boosts
+            exps = np.exp(logits - logits.max(axis=1, keepdims=True))
+            exps /= exps.sum(axis=1, keepdims=True)
+            adjusted = exps if gated is None else np.where(gated[:, None], exps, adjusted)
+
+            # Guardrail (applies after gating only)
+            if self.guardrail is not None:
+                pna, covid, clause = self.guardrail
+                hit = fired[:, clause] if gated is None else gated & fired[:, clause]
+                if hit.any():
+                    adjusted[hit, pna] = np.maximum(adjusted[hit, pna],
+                                                    adjusted[hit, covid] + PNEUMONIA_GUARDRAIL["margin"])
+                    adjusted[hit, covid] *= PNEUMONIA_GUARDRAIL["covid_factor"]
+            if gated is None:
+                # Every row went through the softmax, so every row sum is positive
+                adjusted /= adjusted.sum(axis=1, keepdims=True)
+                return adjusted
+
+        total = adjusted.sum(axis=1, keepdims=True)
+        return np.divide(adjusted, total, out=adjusted, where=total > 0)
+
+    def apply_case(self, probs, symptom_ids, severity_vector):
+        """Single case in the _apply_clinical_rules signature; returns a list"""
+        counts = np.zeros((1, self.num_symptoms))
+        for sid in symptom_ids:
+            if 0 <= sid < self.num_symptoms:
+                counts[0, sid] += 1
+        severity = np.zeros((1, self.num_symptoms))
+        n = min(len(severity_vector), self.num_symptoms)
+        severity[0, :n] = severity_vector[:n]
+        return self._apply(np.array(probs, dtype=np.float64, ndmin=2), counts, severity)[0].tolist()
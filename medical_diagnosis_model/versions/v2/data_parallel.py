@@ -0,0 +1,148 @@
+"""
+Synchronous data-parallel training for the v2 network
+The network's parameters live in shared memory. For every mini-batch the indices are split
+into one shard per worker; each worker computes the summed softmax/cross-entropy gradient of
+its shard against the current weights and writes it to its own gradient slot, and the parent
+averages the slots and applies a single optimizer step. Workers only ever read the weights,
+and the parent only writes them after every shard of the step has finished.
+"""
+
+import copy
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+try:
+    from foundational_brain.MatrixNet import dropout_masks, flatten_network
+except Exception:
+    from MatrixNet import dropout_masks, flatten_network
+
+_WORKER = {}
+
+
+def _layout(network):
+    return [(tuple(l['weights'].shape), tuple(l['bias'].shape)) for l in network]
+
+
+def _views(flat, layout):
+    """Matrix layers whose arrays are views into the 1-D buffer `flat` (see MatrixNet.flatten_network)"""
+    layers = []
+    offset = 0
+    for shapes in layout:
+        layer = {}
+        for key, shape in zip(('weights', 'bias'), shapes):
+            size = int(np.prod(shape))
+            layer[key] = flat[offset:offset + size].reshape(shape)
+            offset += size
+        layers.append(layer)
+    return layers
+
+
+def _init_worker(params_name, grads_name, layout, dtype, n_slots, features, labels, model):
+    params_shm = shared_memory.SharedMemory(name=params_name)
+    grads_shm = shared_memory.SharedMemory(name=grads_name)
+    size = sum(int(np.prod(w)) + int(np.prod(b)) for w, b in layout)
+    params = np.ndarray((size,), dtype=dtype, buffer=params_shm.buf)
+    grads = np.ndarray((n_slots, size), dtype=np.float64, buffer=grads_shm.buf)
+    _WORKER.update(
+        shm=(params_shm, grads_shm),
+        network=_views(params, layout),
+        grads=[_views(row, layout) for row in grads],
+        features=features,
+        labels=labels,
+        model=model,
+        identity=np.eye(model.num_diseases),
+    )
+
+
+def _shard_gradient(task):
+    slot, idx, temperature, mask_seed = task
+    model, network = _WORKER['model'], _WORKER['network']
+    xb = _WORKER['features'][idx]
+    yb = _WORKER['labels'][idx]
+    masks = None
+    if mask_seed is not None:
+        masks = dropout_masks(network, len(idx), model.dropout_rate, np.random.default_rng(mask_seed))
+    hidden_out, _, probs = model._forward_logits_probs(network, xb, temperature, masks)
+    grads = model._softmax_ce_gradients(network, xb, hidden_out, probs, _WORKER['identity'][yb],
+                                        masks, average=False)
+    for out, grad in zip(_WORKER['grads'][slot], grads):
+        out['weights'][...] = grad['weights']
+        out['bias'][...] = grad['bias']
+    picked = probs[np.arange(len(yb)), yb]
+    loss = -float(np.log(np.clip(picked, 1e-12, 1.0 - 1e-12)).sum())
+    correct = int((np.argmax(probs, axis=1) == yb).sum())
+    return loss, correct
+
+
+class DataParallelTrainer:
+    """
+    Process pool that computes mini-batch gradients over shards of the training set
+
+    Constructing the trainer repacks `network` in place so its arrays are views into
+    shared memory (exposed as `params`); close() moves them back into private memory.
+    """
+
+    def __init__(self, model, network, features, labels, workers):
+        self.workers = int(workers)
+        self.network = network
+        layout = _layout(network)
+        dtype = network[0]['weights'].dtype
+        size = sum(l['weights'].size + l['bias'].size for l in network)
+        self._params_shm = self._grads_shm = None
+        self.params = self._slots = None
+        try:
+            self._params_shm = shared_memory.SharedMemory(create=True, size=size * dtype.itemsize)
+            self._grads_shm = shared_memory.SharedMemory(create=True, size=self.workers * size * 8)
+            self.params = flatten_network(network, out=np.ndarray((size,), dtype=dtype, buffer=self._params_shm.buf))
+            self._slots = np.ndarray((self.workers, size), dtype=np.float64, buffer=self._grads_shm.buf)
+            self._grad_sum = np.empty(size, dtype=np.float64)
+            self._grads = _views(self._grad_sum, layout)
+            # Workers get the model's settings and methods, not its published weights
+            worker_model = copy.copy(model)
+            worker_model.network = worker_model.training_state = None
+            self._pool = mp.get_context().Pool(
+                self.workers, initializer=_init_worker,
+                initargs=(self._params_shm.name, self._grads_shm.name, layout, dtype.str, self.workers,
+                          features, labels, worker_model),
+            )
+        except BaseException:
+            # Nobody will call close(): put the weights back in private memory, unlink what we made
+            if self.params is not None:
+                flatten_network(network)
+            self.params = self._slots = None
+            self._release_shared()
+            raise
+
+    def step(self, idx, optimizer, temperature, rng=None):
+        """One synchronous step on the rows `idx`; returns (summed loss, correct count)"""
+        shards = np.array_split(np.asarray(idx), min(self.workers, len(idx)))
+        tasks = [(slot, shard, temperature, int(rng.integers(2 ** 32)) if rng is not None else None)
+                 for slot, shard in enumerate(shards)]
+        results = self._pool.map(_shard_gradient, tasks)
+        np.sum(self._slots[:len(shards)], axis=0, out=self._grad_sum)
+        self._grad_sum /= len(idx)
+        optimizer.step(self.network, self._grads)
+        return sum(r[0] for r in results), sum(r[1] for r in results)
+
+    def close(self):
+        """Stop the workers, copy the weights back into private memory and free the shared
+        buffers. Returns the new private parameter buffer."""
+        self._pool.close()
+        self._pool.join()
+        params = flatten_network(self.network)
+        self.params = self._slots = None
+        self._release_shared()
+        return params
+
+    def _release_shared(self):
+        for shm in (self._params_shm, self._grads_shm):
+            if shm is None:
+                continue
+            try:
+                shm.close()
+            except BufferError:
+                # A caller still holds a view; the mapping goes away with it
+                pass
+            shm.unlink()
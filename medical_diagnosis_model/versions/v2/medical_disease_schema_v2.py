@@ -3,6 +3,8 @@ Enhanced Medical Disease Schema V2
 Includes syndrome-level diagnoses, diagnostic certainty, and clinical reasoning
 """
 
+import numpy as np
+
 from medical_symptom_schema import SYMPTOMS
 
 # Diagnostic certainty levels
@@ -395,18 +397,21 @@ CLINICAL_RULES = {
 }
 
 # Helper functions for clinical reasoning
+# Symptom groups used for syndrome detection (also compiled by clinical_rules_engine)
+RESPIRATORY_SYMPTOMS = (3, 4, 5, 6, 7, 8)  # Cough, dyspnea, wheeze, sore throat, rhinorrhea, congestion
+GI_SYMPTOMS = (9, 10, 11)  # Nausea, vomiting, diarrhea
+SYSTEMIC_SYMPTOMS = (0, 1, 16)  # Fever, fatigue, myalgia
+FEBRILE_RESPIRATORY_KEYS = (3, 6, 7, 8)  # With fever, any of these means respiratory febrile
+SYNDROMES = ("Respiratory Febrile", "Gastrointestinal", "General/Systemic", "Undifferentiated")
+
 def get_syndrome_from_symptoms(symptom_ids):
     """Determine likely syndrome based on symptom pattern"""
-    respiratory_symptoms = [3, 4, 5, 6, 7, 8]  # Cough, dyspnea, wheeze, sore throat, rhinorrhea, congestion
-    gi_symptoms = [9, 10, 11]  # Nausea, vomiting, diarrhea
-    systemic_symptoms = [0, 1, 16]  # Fever, fatigue, myalgia
-    
-    resp_count = sum(1 for s in symptom_ids if s in respiratory_symptoms)
-    gi_count = sum(1 for s in symptom_ids if s in gi_symptoms)
-    systemic_count = sum(1 for s in symptom_ids if s in systemic_symptoms)
+    resp_count = sum(1 for s in symptom_ids if s in RESPIRATORY_SYMPTOMS)
+    gi_count = sum(1 for s in symptom_ids if s in GI_SYMPTOMS)
+    systemic_count = sum(1 for s in symptom_ids if s in SYSTEMIC_SYMPTOMS)
     
     # Heuristic: fever + any key upper-respiratory symptom is enough to call it respiratory febrile
-    if 0 in symptom_ids and any(s in symptom_ids for s in (3, 6, 7, 8)):
+    if 0 in symptom_ids and any(s in symptom_ids for s in FEBRILE_RESPIRATORY_KEYS):
         return "Respiratory Febrile"
 
     if resp_count >= 2 and systemic_count >= 1:
@@ -493,6 +498,75 @@ def assess_severity(symptom_ids, severity_vector):
     else:
         return "MILD"
 
+# Compiled symptom patterns
+DEFAULT_SEVERITY_RANGE = (0.2, 0.6)  # for patterns that do not declare one
+
+
+class CompiledSymptomPatterns:
+    """
+    Dense views of the diseases' symptom_patterns, built once and shared by the hot paths
+
+    Attributes:
+        frequency: (D, S) P(symptom | disease), 0 where no pattern is defined
+        severity_low, severity_high: (D, S) severity range per pattern
+        defined: (D, S) True where the disease declares a pattern for the symptom
+        patterns: {did: [(sid, frequency, low, high), ...]} in schema order, including
+            symptom ids outside the feature range
+        key_order: {did: [sid, ...]} by descending frequency (schema order breaks ties)
+    """
+
+    def __init__(self, diseases=None, num_symptoms=30):
+        diseases = DISEASES_V2 if diseases is None else diseases
+        self.num_symptoms = num_symptoms
+        self.num_diseases = max(diseases) + 1 if diseases else 0
+        shape = (self.num_diseases, num_symptoms)
+        self.frequency = np.zeros(shape)
+        self.severity_low = np.zeros(shape)
+        self.severity_high = np.zeros(shape)
+        self.defined = np.zeros(shape, dtype=bool)
+        self.patterns = {}
+        self.key_order = {}
+        for did, disease in diseases.items():
+            rows = []
+            for sid, pattern in disease.get('symptom_patterns', {}).items():
+                low, high = pattern.get('severity_range', DEFAULT_SEVERITY_RANGE)
+                rows.append((sid, pattern.get('frequency', 0.0), low, high))
+                if 0 <= sid < num_symptoms:
+                    self.frequency[did, sid] = rows[-1][1]
+                    self.severity_low[did, sid], self.severity_high[did, sid] = low, high
+                    self.defined[did, sid] = True
+            self.patterns[did] = rows
+            self.key_order[did] = [row[0] for row in sorted(rows, key=lambda row: -row[1])]
+        for arr in (self.frequency, self.severity_low, self.severity_high, self.defined):
+            arr.setflags(write=False)
+        self._frequency_of = {did: {row[0]: row[1] for row in rows} for did, rows in self.patterns.items()}
+
+    def key_symptoms(self, disease_id, min_frequency=0.85, strict=False):
+        """Symptom ids with frequency >= min_frequency (> when strict), most frequent first"""
+        freq = self._frequency_of[disease_id]
+        keys = []
+        for sid in self.key_order[disease_id]:
+            if freq[sid] > min_frequency or (not strict and freq[sid] == min_frequency):
+                keys.append(sid)
+            else:
+                break
+        return keys
+
+
+_COMPILED_PATTERNS = {}
+
+
+def compile_symptom_patterns(diseases=None, num_symptoms=30):
+    """
+    Compiled symptom patterns; DISEASES_V2 is compiled once per feature width and cached
+    (edits to DISEASES_V2 after the first call are not picked up)
+    """
+    if diseases is not None and diseases is not DISEASES_V2:
+        return CompiledSymptomPatterns(diseases, num_symptoms)
+    if num_symptoms not in _COMPILED_PATTERNS:
+        _COMPILED_PATTERNS[num_symptoms] = CompiledSymptomPatterns(DISEASES_V2, num_symptoms)
+    return _COMPILED_PATTERNS[num_symptoms]
+
 if __name__ == "__main__":
     print("Enhanced Medical Disease Schema V2 loaded")
     print(f"Total diagnoses: {len(DISEASES_V2)}")
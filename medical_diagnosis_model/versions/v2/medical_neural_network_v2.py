@@ -4,37 +4,104 @@ Implements clinical reasoning, syndrome-level diagnosis, and medical decision ru
 """
 
 try:
-    # Prefer foundational implementation
-    from foundational_brain.NeuralNet import initialize_network, predict
+    # Prefer foundational implementation (matrix-backed engine)
+    from foundational_brain.MatrixNet import (
+        initialize_network, predict, forward_propagate, propagate_deltas, compute_gradients,
+        dropout_masks, flatten_network, from_neuron_network, to_neuron_network, transfer
+    )
+    from foundational_brain.Optimizers import SGD, make_optimizer
 except Exception:
     # Fallback if PYTHONPATH not set
-    from NeuralNet import initialize_network, predict
+    from MatrixNet import (
+        initialize_network, predict, forward_propagate, propagate_deltas, compute_gradients,
+        dropout_masks, flatten_network, from_neuron_network, to_neuron_network, transfer
+    )
+    from Optimizers import SGD, make_optimizer
 from medical_symptom_schema import SYMPTOMS, get_symptom_by_name
 from .medical_disease_schema_v2 import (
     DISEASES_V2, CLINICAL_RULES, DIAGNOSTIC_CERTAINTY,
     get_syndrome_from_symptoms, get_appropriate_differential,
-    requires_testing, get_syndrome_diagnosis, assess_severity
+    requires_testing, get_syndrome_diagnosis, assess_severity, compile_symptom_patterns
 )
+from .training_config import load_training_config
+from .data_parallel import DataParallelTrainer
+from .calibration import fit_temperature, fit_vector_scaling
+from .clinical_rules_engine import CompiledClinicalRules
+from .model_artifact import ARTIFACT_SUFFIX, artifact_in_sync, artifact_path, atomic_write, read_artifact, write_artifact
 # Note: v2 generates its own synthetic training data; no dependency on v1 generator
+import copy
+import hashlib
 import time
 import json
 import random
+import numpy as np
 
 class ClinicalReasoningNetwork:
-    def __init__(self, hidden_neurons=20, learning_rate=0.3, epochs=10000):
-        """Initialize the clinical reasoning neural network"""
+    def __init__(self, hidden_neurons=20, learning_rate=0.3, epochs=10000, batch_size=1,
+                 optimizer="sgd", weight_decay=0.0, dropout_rate=0.0, weights_dtype="float64", workers=1,
+                 calibration="temperature"):
+        """Initialize the clinical reasoning neural network
+
+        batch_size=1 is per-sample SGD; larger values train on shuffled mini-batches
+        with gradients averaged over each batch. optimizer is 'sgd', 'momentum' or 'adam';
+        weight_decay is an L2 penalty on weights and dropout_rate applies to the hidden
+        layer during training only. weights_dtype='float32' holds the layer weights as
+        float32 arrays (half the memory of float64); logits are still widened to float64
+        before softmax, so loss, NLL and temperature calibration keep full precision.
+        workers > 1 trains data-parallel: each mini-batch is sharded across a process pool
+        and the shard gradients are averaged before one optimizer step (use a batch_size
+        of at least a few hundred so each shard has real work). calibration is
+        'temperature' (one fitted T) or 'vector' (per-class scale and bias); both are fitted
+        on cached validation logits after training.
+        """
         self.num_symptoms = 30
         self.num_features = 60  # 30 binary + 30 severity
         self.num_diseases = len(DISEASES_V2)
         self.hidden_neurons = hidden_neurons
         self.learning_rate = learning_rate
         self.epochs = epochs
-        self.network = None
+        self.batch_size = max(1, int(batch_size))
+        self.optimizer = optimizer
+        self.momentum = 0.9
+        self.weight_decay = weight_decay
+        self.dropout_rate = dropout_rate
+        self.workers = max(1, int(workers))
+        self.weights_dtype = np.dtype(weights_dtype)
+        if self.weights_dtype not in (np.float32, np.float64):
+            raise ValueError("weights_dtype must be 'float32' or 'float64'")
+        self.network = None  # matrix layers (see foundational_brain.MatrixNet)
         self.clinical_network = None  # Secondary network for syndrome classification
         self.temperature = 1.0  # for probability calibration
-        
-    def train(self, cases_per_disease=100, verbose=True):
-        """Train both specific and syndrome-level networks"""
+        if calibration not in ("temperature", "vector"):
+            raise ValueError("calibration must be 'temperature' or 'vector'")
+        self.calibration = calibration
+        self.class_scaling = None  # (scale, bias) per class when calibration == 'vector'
+        self.training_state = None  # last run's weights, optimizer and RNG state (see train_from_jsonl)
+        self.symptom_patterns = compile_symptom_patterns(DISEASES_V2, self.num_symptoms)
+        self.clinical_rules = CompiledClinicalRules(DISEASES_V2, self.num_symptoms)
+        
+    def apply_training_config(self, config=None):
+        """Apply a training config (YAML path, parsed mapping, or None for configs/training.yaml)
+
+        Returns the flattened settings so callers can pick up data-level keys (seed,
+        cases_per_disease).
+        """
+        settings = load_training_config(config)
+        for key in ("optimizer", "learning_rate", "momentum", "weight_decay", "dropout_rate",
+                    "hidden_neurons", "epochs", "batch_size"):
+            if key in settings:
+                setattr(self, key, settings[key])
+        return settings
+
+    def train(self, cases_per_disease=None, verbose=True, config=None):
+        """Train both specific and syndrome-level networks
+
+        config: optional training config (see apply_training_config); an explicit
+        cases_per_disease takes precedence over the config's data.cases_per_disease.
+        """
+        settings = self.apply_training_config(config) if config is not None else {}
+        if cases_per_disease is None:
+            cases_per_disease = settings.get("cases_per_disease", 100)
         if verbose:
             print("Training Clinical Reasoning Neural Network...")
             print("This includes syndrome-level and specific diagnosis capabilities")
@@ -52,17 +119,18 @@ class ClinicalReasoningNetwork:
         train_set = training_data[:split]
         val_set = training_data[split:]
 
-        # Initialize primary network
-        self.network = initialize_network(self.num_features, self.hidden_neurons, self.num_diseases)
+        # Initialize primary network (private until training finishes)
+        network = self._initialize_network()
 
         start_time = time.time()
-        history = self._train_softmax_cross_entropy(self.network, train_set, val_set, verbose=verbose)
+        history = self._train_softmax_cross_entropy(network, train_set, val_set, verbose=verbose)
         training_time = time.time() - start_time
 
-        # Probability calibration (temperature scaling) on validation set
-        self.temperature = self._calibrate_temperature(val_set)
+        # Probability calibration on validation set, then publish
+        self.temperature, self.class_scaling = self._fit_calibration(val_set, network)
+        self.network = network
         if verbose:
-            print(f"\nCalibration: selected temperature T={self.temperature:.2f}")
+            print(f"\nCalibration: {self._calibration_summary()}")
             print(f"Training completed in {training_time:.2f} seconds")
         
         return history
@@ -98,18 +166,15 @@ class ClinicalReasoningNetwork:
     
     def _generate_disease_case(self, disease_id):
         """Generate typical disease presentation"""
-        disease = DISEASES_V2[disease_id]
         symptom_vector = [0] * self.num_symptoms
         severity_vector = [0.0] * self.num_symptoms
         
-        for symptom_id, pattern in disease['symptom_patterns'].items():
+        for symptom_id, frequency, min_sev, max_sev in self.symptom_patterns.patterns[disease_id]:
             if symptom_id >= self.num_symptoms:
                 continue
             
-            import random
-            if random.random() < pattern['frequency']:
+            if random.random() < frequency:
                 symptom_vector[symptom_id] = 1
-                min_sev, max_sev = pattern['severity_range']
                 severity_vector[symptom_id] = random.uniform(min_sev, max_sev)
         
         return symptom_vector, severity_vector
@@ -120,9 +185,8 @@ class ClinicalReasoningNetwork:
         
         import random
         # Remove 1-2 common symptoms
-        disease = DISEASES_V2[disease_id]
-        common_symptoms = [sid for sid, p in disease['symptom_patterns'].items() 
-                          if p['frequency'] > 0.7 and symptom_vec[sid] == 1]
+        common_symptoms = [sid for sid, frequency, _, _ in self.symptom_patterns.patterns[disease_id]
+                          if frequency > 0.7 and symptom_vec[sid] == 1]
         
         if common_symptoms:
             to_remove = random.choice(common_symptoms)
@@ -143,18 +207,8 @@ class ClinicalReasoningNetwork:
         
         return symptom_vec, severity_vec
     
-    def diagnose_with_reasoning(self, symptoms_dict, has_test_results=None):
-        """
-        Diagnose with clinical reasoning
-        
-        Args:
-            symptoms_dict: {symptom_name: severity}
-            has_test_results: {test_name: result} if available
-        
-        Returns:
-            Comprehensive diagnosis with clinical reasoning
-        """
-        # Create feature vectors
+    def _encode_symptoms(self, symptoms_dict):
+        """Map {symptom_name: severity 0-10} to (symptom_vector, severity_vector, symptom_ids)"""
         symptom_vector = [0] * self.num_symptoms
         severity_vector = [0.0] * self.num_symptoms
         symptom_ids = []
@@ -171,9 +225,21 @@ class ClinicalReasoningNetwork:
                     symptom_vector[sid] = 1
                     severity_vector[sid] = sev_norm
                     symptom_ids.append(sid)
+        return symptom_vector, severity_vector, symptom_ids
+    
+    def diagnose_with_reasoning(self, symptoms_dict, has_test_results=None):
+        """
+        Diagnose with clinical reasoning
         
-        # Determine syndrome
-        syndrome = get_syndrome_from_symptoms(symptom_ids)
+        Args:
+            symptoms_dict: {symptom_name: severity}
+            has_test_results: {test_name: result} if available
+        
+        Returns:
+            Comprehensive diagnosis with clinical reasoning
+        """
+        # Create feature vectors
+        symptom_vector, severity_vector, symptom_ids = self._encode_symptoms(symptoms_dict)
         
         # Get neural network predictions (calibrated)
         features = symptom_vector + severity_vector
@@ -184,6 +250,17 @@ class ClinicalReasoningNetwork:
             nn_outputs, symptom_ids, severity_vector, has_test_results
         )
         
+        return self._diagnosis_from_outputs(adjusted_outputs, symptom_ids, severity_vector, has_test_results)
+
+    def _diagnosis_from_outputs(self, adjusted_outputs, symptom_ids, severity_vector, has_test_results=None):
+        """Build the diagnose_with_reasoning result from rule-adjusted probabilities
+        
+        Lets callers that batch the forward and rule passes (apply_clinical_rules_batch)
+        share the per-case reasoning with diagnose_with_reasoning.
+        """
+        # Determine syndrome
+        syndrome = get_syndrome_from_symptoms(symptom_ids)
+        
         # Get primary diagnosis
         predicted_idx = predict(adjusted_outputs)
         primary_disease = DISEASES_V2[predicted_idx]
@@ -216,7 +293,7 @@ class ClinicalReasoningNetwork:
                 "description": primary_disease['description']
             },
             "clinical_reasoning": self._generate_clinical_reasoning(
-                symptom_ids, severity_vector, primary_disease, syndrome
+                symptom_ids, severity_vector, predicted_idx, syndrome
             ),
             "differential_diagnosis": self._generate_differential(
                 adjusted_outputs, differential_names, syndrome
@@ -234,242 +311,386 @@ class ClinicalReasoningNetwork:
 
     # ===== Optimization/Math helpers (softmax + cross-entropy) =====
 
-    def _sigmoid(self, x: float) -> float:
-        return 1.0 / (1.0 + (2.718281828459045 ** (-x)))
-
     def _softmax(self, logits):
-        # Numerical stability: subtract max
-        m = max(logits)
-        exps = [pow(2.718281828459045, z - m) for z in logits]
-        s = sum(exps)
-        return [e / s for e in exps]
-
-    def _cross_entropy(self, probs, expected_onehot):
-        eps = 1e-12
-        loss = 0.0
-        for i in range(len(probs)):
-            p = max(min(probs[i], 1.0 - eps), eps)
-            loss += - expected_onehot[i] * (0 if p == 0 else (self._ln(p)))
-        return loss
-
-    def _ln(self, x: float) -> float:
-        # Natural log via math if available; fallback to simple approximation
-        import math
-        return math.log(x)
-
-    def _forward_logits_probs(self, network, inputs):
-        # Forward through hidden (sigmoid)
-        layer_inputs = inputs
-        hidden_outputs = []
-        for neuron in network[0]:
-            # activation = w·x + b
-            w = neuron['weights']
-            activation = w[-1]
-            for j in range(len(layer_inputs)):
-                activation += w[j] * layer_inputs[j]
-            out = self._sigmoid(activation)
-            neuron['output'] = out
-            hidden_outputs.append(out)
-
-        # Output layer logits (linear)
-        logits = []
-        out_layer = network[1]
-        for neuron in out_layer:
-            w = neuron['weights']
-            activation = w[-1]
-            for j in range(len(hidden_outputs)):
-                activation += w[j] * hidden_outputs[j]
-            logits.append(activation)
-        probs = self._softmax([z / self.temperature for z in logits])
-        # store for potential reuse
-        for idx, neuron in enumerate(out_layer):
-            neuron['output'] = probs[idx]
+        # Numerical stability: subtract max (works on a row or a batch of rows)
+        z = np.asarray(logits, dtype=np.float64)
+        exps = np.exp(z - z.max(axis=-1, keepdims=True))
+        return exps / exps.sum(axis=-1, keepdims=True)
+
+    def _forward_logits_probs(self, network, inputs, temperature=None, masks=None, scaling=None):
+        # Pure forward pass: activations live in local arrays and nothing is written back to
+        # the network or the model, so concurrent callers can share one loaded model.
+        # Hidden layer is sigmoid, output layer is linear (logits)
+        if temperature is None:
+            temperature = self.temperature
+        hidden_outputs, logits = forward_propagate(network, inputs, linear_output=True, masks=masks)
+        # Widen before temperature/softmax so float32 weights still give float64 probabilities
+        z = np.asarray(logits, dtype=np.float64)
+        if scaling is not None:
+            z = z * scaling[0] + scaling[1]
+        probs = self._softmax(z / temperature)
         return hidden_outputs, logits, probs
 
-    def _backward_softmax_ce(self, network, inputs, hidden_outputs, probs, expected_onehot):
-        # Output layer delta: y_hat - y (for softmax + cross-entropy)
-        output_layer = network[1]
-        output_deltas = []
-        for i in range(len(output_layer)):
-            delta = probs[i] - expected_onehot[i]
-            output_layer[i]['delta'] = delta
-            output_deltas.append(delta)
-
-        # Hidden layer deltas
-        hidden_layer = network[0]
-        hidden_deltas = []
-        for j, neuron in enumerate(hidden_layer):
-            error = 0.0
-            for k, out_neuron in enumerate(output_layer):
-                error += out_neuron['weights'][j] * output_deltas[k]
-            # derivative of sigmoid using neuron['output'] already stored
-            d = neuron['output'] * (1.0 - neuron['output'])
-            neuron['delta'] = error * d
-            hidden_deltas.append(neuron['delta'])
-
-        # Update weights for output layer (gradient descent)
-        for i, neuron in enumerate(output_layer):
-            for j in range(len(hidden_outputs)):
-                neuron['weights'][j] -= self.learning_rate * neuron['delta'] * hidden_outputs[j]
-            neuron['weights'][-1] -= self.learning_rate * neuron['delta']
-
-        # Update weights for hidden layer (gradient descent)
-        for j, neuron in enumerate(hidden_layer):
-            for k in range(len(inputs)):
-                neuron['weights'][k] -= self.learning_rate * neuron['delta'] * inputs[k]
-            neuron['weights'][-1] -= self.learning_rate * neuron['delta']
-
-    def _train_softmax_cross_entropy(self, network, train_set, val_set, verbose=True):
+    def _make_optimizer(self):
+        kwargs = {"momentum": self.momentum} if (self.optimizer or "").lower() == "momentum" else {}
+        return make_optimizer(self.optimizer, self.learning_rate, self.weight_decay, **kwargs)
+
+    def _softmax_ce_gradients(self, network, inputs, hidden_outputs, probs, expected_onehot,
+                              masks=None, average=True):
+        # Output layer delta: y_hat - y (for softmax + cross-entropy). Batch gradients are
+        # summed over rows, and averaged unless the caller combines shards itself.
+        outputs = [hidden_outputs, probs]
+        deltas = propagate_deltas(network, outputs, probs - expected_onehot, masks)
+        grads = compute_gradients(network, inputs, outputs, deltas, masks)
+        batch = 1 if probs.ndim == 1 else len(probs)
+        if average and batch > 1:
+            for grad in grads:
+                grad['weights'] /= batch
+                grad['bias'] /= batch
+        return grads
+
+    def _backward_softmax_ce(self, network, inputs, hidden_outputs, probs, expected_onehot,
+                             optimizer=None, masks=None):
+        # Hidden deltas use the output weights before this step's update. Batches apply the
+        # averaged gradient.
+        grads = self._softmax_ce_gradients(network, inputs, hidden_outputs, probs, expected_onehot, masks)
+        if optimizer is None:
+            optimizer = SGD(self.learning_rate, self.weight_decay)
+        optimizer.step(network, grads)
+
+    def _train_softmax_cross_entropy(self, network, train_set, val_set, verbose=True, resume=None):
+        # resume: a self.training_state left by an earlier run on the same split. Training picks up
+        # at its epoch count (self.epochs stays the total budget) with its weights, optimizer,
+        # early-stopping and RNG state; a run that already stopped early is not trained further.
         best_val_nll = float('inf')
-        best_network = None
+        best_epoch = None
         patience = 20
         no_improve = 0
         history = []
+        start_epoch = 0
+        if resume is not None:
+            np.copyto(flatten_network(network), resume["params"])
+            best_val_nll, best_epoch, no_improve = resume["best_val_nll"], resume["best_epoch"], resume["no_improve"]
+            history = list(resume["history"])
+            start_epoch = len(history) if no_improve < patience else self.epochs
+        identity = np.eye(self.num_diseases)
+        features, labels = self._dataset_arrays(train_set, self.weights_dtype)
+        val_features, val_labels = self._dataset_arrays(val_set, self.weights_dtype)
+        # With workers > 1 the parameters live in shared memory and each batch is sharded
+        # across a process pool (see data_parallel.DataParallelTrainer)
+        trainer = None
+        if self.workers > 1 and len(train_set) > 0:
+            trainer = DataParallelTrainer(self, network, features, labels, self.workers)
+            params = trainer.params
+        else:
+            params = flatten_network(network)
+        # Two preallocated buffers: the live parameters (the layers become views into `params`)
+        # and the best-so-far snapshot, refreshed with one bulk copy instead of a deep copy
+        best_params = np.empty_like(params)
+        order = list(range(len(train_set)))
+        batch_size = self.batch_size
+        if resume is None:
+            optimizer = self._make_optimizer()
+            # Dropout RNG is derived from `random` so random.seed() keeps runs reproducible;
+            # it is only drawn when dropout is on so the shuffle stream is otherwise unchanged
+            rng = np.random.default_rng(random.getrandbits(32)) if self.dropout_rate > 0 else None
+        else:
+            np.copyto(best_params, resume["best_params"])
+            optimizer, rng = copy.deepcopy(resume["optimizer"]), copy.deepcopy(resume["rng"])
+            order = list(resume["order"])
+            random.setstate(resume["random_state"])
 
-        for epoch in range(self.epochs):
-            # Shuffle
-            random.shuffle(train_set)
-            train_loss = 0.0
-            train_correct = 0
-            for row in train_set:
-                features = row[:-1]
-                label = int(row[-1])
-                expected = [0] * self.num_diseases
-                expected[label] = 1
-                hidden_out, logits, probs = self._forward_logits_probs(network, features)
-                # loss
-                train_loss += self._cross_entropy(probs, expected)
-                # accuracy
-                pred = probs.index(max(probs))
-                if pred == label:
-                    train_correct += 1
-                # backward/update
-                self._backward_softmax_ce(network, features, hidden_out, probs, expected)
-
-            # Validation
-            val_loss, val_acc = self._evaluate(network, val_set)
-            history.append({
-                'epoch': epoch,
-                'train_loss': train_loss / max(1, len(train_set)),
-                'train_acc': train_correct / max(1, len(train_set)),
-                'val_loss': val_loss,
-                'val_acc': val_acc
-            })
+        try:
+            for epoch in range(start_epoch, self.epochs):
+                # Shuffle an index permutation instead of the rows themselves
+                random.shuffle(order)
+                train_loss = 0.0
+                train_correct = 0
+                epoch_start = time.perf_counter()
+                for start in range(0, len(order), batch_size):
+                    idx = order[start:start + batch_size]
+                    if trainer is not None:
+                        loss, correct = trainer.step(idx, optimizer, self.temperature, rng)
+                        train_loss += loss
+                        train_correct += correct
+                        continue
+                    xb = features[idx]
+                    yb = labels[idx]
+                    masks = dropout_masks(network, len(idx), self.dropout_rate, rng) if rng is not None else None
+                    hidden_out, logits, probs = self._forward_logits_probs(network, xb, masks=masks)
+                    picked = probs[np.arange(len(yb)), yb]
+                    # loss
+                    train_loss += -float(np.log(np.clip(picked, 1e-12, 1.0 - 1e-12)).sum())
+                    # accuracy
+                    train_correct += int((np.argmax(probs, axis=1) == yb).sum())
+                    # backward/update
+                    self._backward_softmax_ce(network, xb, hidden_out, probs, identity[yb], optimizer, masks)
+                epoch_time = time.perf_counter() - epoch_start
+                samples_per_sec = len(order) / epoch_time if epoch_time > 0 else 0.0
+
+                # Validation
+                if val_set:
+                    val_loss, val_acc = self._evaluate_arrays(network, val_features, val_labels)
+                else:
+                    val_loss, val_acc = 0.0, 0.0
+                # Early stopping on validation loss
+                if val_loss + 1e-6 < best_val_nll:
+                    best_val_nll = val_loss
+                    best_epoch = epoch
+                    np.copyto(best_params, params)
+                    no_improve = 0
+                else:
+                    no_improve += 1
+                history.append({
+                    'epoch': epoch,
+                    'train_loss': train_loss / max(1, len(train_set)),
+                    'train_acc': train_correct / max(1, len(train_set)),
+                    'val_loss': val_loss,
+                    'val_acc': val_acc,
+                    'samples_per_sec': samples_per_sec,
+                    'best_epoch': best_epoch,
+                    'best_val_loss': best_val_nll
+                })
 
-            if verbose and (epoch % 10 == 0 or epoch == self.epochs - 1):
-                print(f"epoch={epoch:04d}  train_loss={history[-1]['train_loss']:.4f}  train_acc={history[-1]['train_acc']:.3f}  val_loss={val_loss:.4f}  val_acc={val_acc:.3f}")
+                if verbose and (epoch % 10 == 0 or epoch == self.epochs - 1):
+                    print(f"epoch={epoch:04d}  train_loss={history[-1]['train_loss']:.4f}  train_acc={history[-1]['train_acc']:.3f}  val_loss={val_loss:.4f}  val_acc={val_acc:.3f}  samples/s={samples_per_sec:.0f}")
 
-            # Early stopping on validation loss
-            if val_loss + 1e-6 < best_val_nll:
-                best_val_nll = val_loss
-                best_network = self._deepcopy_network(network)
-                no_improve = 0
-            else:
-                no_improve += 1
                 if no_improve >= patience:
                     if verbose:
-                        print(f"Early stopping at epoch {epoch} (no val improvement for {patience} epochs)")
+                        print(f"Early stopping at epoch {epoch} (no val improvement for {patience} epochs, best epoch {best_epoch})")
                     break
-
-        if best_network is not None:
-            self.network = best_network
+        finally:
+            if trainer is not None:
+                # `params` is a view of the shared segment: drop it before close() unmaps the
+                # segment (a surviving view would dangle), then take the private copy close()
+                # moves the weights into
+                del params
+                params = trainer.close()
+
+        # Everything a later call needs to continue this run (see resume above)
+        self.training_state = {
+            "params": params.copy(), "best_params": best_params, "best_val_nll": best_val_nll,
+            "best_epoch": best_epoch, "no_improve": no_improve, "history": history, "order": order,
+            "optimizer": optimizer, "rng": rng, "random_state": random.getstate(),
+        }
+        # Restore the best weights into the (private) training network
+        if best_epoch is not None:
+            np.copyto(params, best_params)
         return history
 
-    def _evaluate(self, network, dataset):
+    def _dataset_arrays(self, dataset, dtype=np.float64):
+        """Split [features..., label] rows into a feature matrix and a label vector"""
+        features = np.asarray([row[:-1] for row in dataset], dtype=dtype).reshape(len(dataset), -1)
+        labels = np.asarray([int(row[-1]) for row in dataset], dtype=np.int64)
+        return features, labels
+
+    def _evaluate(self, network, dataset, temperature=None):
         if not dataset:
             return 0.0, 0.0
-        total_nll = 0.0
-        correct = 0
-        for row in dataset:
-            features = row[:-1]
-            label = int(row[-1])
-            _, logits, probs = self._forward_logits_probs(network, features)
-            expected = [0] * self.num_diseases
-            expected[label] = 1
-            total_nll += self._cross_entropy(probs, expected)
-            if probs.index(max(probs)) == label:
-                correct += 1
-        avg_nll = total_nll / len(dataset)
-        acc = correct / len(dataset)
+        return self._evaluate_arrays(network, *self._dataset_arrays(dataset), temperature=temperature)
+
+    def _evaluate_arrays(self, network, features, labels, temperature=None):
+        # One batched forward pass over the whole dataset
+        _, _, probs = self._forward_logits_probs(network, features, temperature)
+        picked = probs[np.arange(len(labels)), labels]
+        avg_nll = -float(np.log(np.clip(picked, 1e-12, 1.0 - 1e-12)).mean())
+        acc = float((np.argmax(probs, axis=1) == labels).mean())
         return avg_nll, acc
 
-    def _deepcopy_network(self, network):
-        copied = []
-        for layer in network:
-            new_layer = []
-            for neuron in layer:
-                new_layer.append({'weights': list(neuron['weights'])})
-            copied.append(new_layer)
-        return copied
+    def _initialize_network(self):
+        # Drawn in float64 from the shared random() stream, then stored in weights_dtype
+        network = initialize_network(self.num_features, self.hidden_neurons, self.num_diseases)
+        if self.weights_dtype != np.float64:
+            network = [{key: value.astype(self.weights_dtype) for key, value in layer.items()} for layer in network]
+        return network
 
-    def _calibrate_temperature(self, val_set):
+    def _validation_logits(self, network, val_set):
+        # One forward pass; calibration fits then run on this cached float64 matrix
+        features, labels = self._dataset_arrays(val_set, network[0]['weights'].dtype)
+        logits = forward_propagate(network, features, linear_output=True)[-1]
+        return np.asarray(logits, dtype=np.float64), labels
+
+    def _fit_calibration(self, val_set, network=None):
+        """Fit the configured calibration on val_set; returns (temperature, class_scaling)
+
+        Nothing is assigned here (callers do), so serving threads never observe a candidate
+        calibration mid-fit.
+        """
         if not val_set:
-            return 1.0
-        candidates = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0, 2.5, 3.0]
-        best_T = 1.0
-        best_nll = float('inf')
-        original_T = self.temperature
-        for T in candidates:
-            self.temperature = T
-            nll, _ = self._evaluate(self.network, val_set)
-            if nll < best_nll:
-                best_nll = nll
-                best_T = T
-        self.temperature = best_T
-        return best_T
+            return 1.0, None
+        if network is None:
+            network = self.network
+        logits, labels = self._validation_logits(network, val_set)
+        temperature = fit_temperature(logits, labels)
+        if self.calibration != "vector":
+            return temperature, None
+        # Vector scaling starts from the temperature fit and absorbs it (T = 1)
+        return 1.0, fit_vector_scaling(logits, labels, temperature)
+
+    def recalibrate(self, val_set):
+        """Refit calibration for the published network (e.g. after a fine-tune or model swap)"""
+        self.temperature, self.class_scaling = self._fit_calibration(val_set, self.network)
+        return self.temperature, self.class_scaling
+
+    def _calibration_summary(self):
+        if self.class_scaling is not None:
+            scale, bias = self.class_scaling
+            return f"vector scaling (scale {scale.min():.2f}..{scale.max():.2f}, bias {bias.min():.2f}..{bias.max():.2f})"
+        return f"selected temperature T={self.temperature:.2f}"
+
+    def predict_proba_batch(self, features_2d):
+        """
+        Calibrated class probabilities for many cases in one forward pass
 
-    def _predict_proba(self, features):
-        _, _, probs = self._forward_logits_probs(self.network, features)
+        Args:
+            features_2d: (N, num_features) array or list of feature rows
+
+        Returns:
+            (N, num_diseases) NumPy array; row i sums to 1
+        """
+        # Read the published weights/calibration once so a concurrent retrain or reload
+        # cannot change them halfway through this call
+        network, temperature, scaling = self.network, self.temperature, self.class_scaling
+        features = np.asarray(features_2d, dtype=network[0]['weights'].dtype).reshape(-1, self.num_features)
+        _, _, probs = self._forward_logits_probs(network, features, temperature, scaling=scaling)
         return probs
 
+    def _predict_proba(self, features):
+        return self.predict_proba_batch([features])[0].tolist()
+
+    # ===== Incremental inference (one answer changes a few input columns) =====
+
+    def hidden_preactivation(self, features):
+        """First-layer pre-activations (float64) for one feature row"""
+        layer = self.network[0]
+        return np.asarray(features, dtype=np.float64) @ layer['weights'].T.astype(np.float64) + layer['bias']
+
+    def update_hidden_preactivation(self, hidden, columns, deltas):
+        """Pre-activations after features[columns] += deltas: O(hidden) per changed column"""
+        weights = self.network[0]['weights']
+        return np.asarray(hidden, dtype=np.float64) + weights[:, columns].astype(np.float64) @ np.asarray(deltas, dtype=np.float64)
+
+    def predict_proba_from_hidden(self, hidden):
+        """Calibrated class probabilities from cached first-layer pre-activations"""
+        network, temperature, scaling = self.network, self.temperature, self.class_scaling
+        x = transfer(np.asarray(hidden, dtype=np.float64)).astype(network[0]['weights'].dtype)
+        if len(network) > 1:
+            x = forward_propagate(network[1:], x, linear_output=True)[-1]
+        z = np.asarray(x, dtype=np.float64)
+        if scaling is not None:
+            z = z * scaling[0] + scaling[1]
+        return self._softmax(z / temperature)
+
     # ===== Persistence =====
 
-    def save_model(self, filename="models/enhanced_medical_model.json"):
-        import json, os
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        model_data = {
-            "config": {
-                "num_symptoms": self.num_symptoms,
-                "num_features": self.num_features,
-                "num_diseases": self.num_diseases,
-                "hidden_neurons": self.hidden_neurons,
-                "learning_rate": self.learning_rate,
-                "epochs": self.epochs,
-                "temperature": self.temperature
-            },
-            "network": [
-                [{"weights": n["weights"]} for n in self.network[0]],
-                [{"weights": n["weights"]} for n in self.network[1]]
-            ]
+    def _model_config(self):
+        return {
+            "num_symptoms": self.num_symptoms,
+            "num_features": self.num_features,
+            "num_diseases": self.num_diseases,
+            "hidden_neurons": self.hidden_neurons,
+            "learning_rate": self.learning_rate,
+            "epochs": self.epochs,
+            "batch_size": self.batch_size,
+            "optimizer": self.optimizer,
+            "weight_decay": self.weight_decay,
+            "dropout_rate": self.dropout_rate,
+            "temperature": self.temperature,
+            "calibration": self.calibration,
+            "class_scale": None if self.class_scaling is None else self.class_scaling[0].tolist(),
+            "class_bias": None if self.class_scaling is None else self.class_scaling[1].tolist()
         }
-        with open(filename, "w") as f:
-            json.dump(model_data, f, indent=2)
+
+    def save_model(self, filename="models/enhanced_medical_model.json", binary=True):
+        """Save the model atomically
+
+        A .json filename writes the JSON model and, unless binary=False, the binary
+        artifact next to it (same name, .bin); a .bin filename writes only the artifact.
+        """
+        import json
+        config = self._model_config()
+        if filename.endswith(ARTIFACT_SUFFIX):
+            write_artifact(filename, config, self.network)
+        else:
+            model_data = {
+                "config": config,
+                # Stored in the dict-of-neurons layout (bias last) for compatibility
+                "network": to_neuron_network(self.network)
+            }
+            payload = json.dumps(model_data, indent=2).encode("utf-8")
+            atomic_write(filename, payload)
+            if binary:
+                write_artifact(artifact_path(filename), config, self.network,
+                               source_sha256=hashlib.sha256(payload).hexdigest())
         print(f"Model saved to {filename}")
 
-    def load_model(self, filename="models/enhanced_medical_model.json"):
+    def load_model(self, filename="models/enhanced_medical_model.json", prefer_artifact=False):
+        """Load a JSON model, or memory-map a binary artifact (.bin)
+
+        With prefer_artifact, a JSON filename maps its .bin twin when the twin was written
+        from exactly this JSON (recorded content hash); otherwise the JSON is parsed and
+        the twin rewritten, so an updated JSON never serves stale weights.
+        """
         import json
-        with open(filename, "r") as f:
-            model_data = json.load(f)
-        cfg = model_data["config"]
+        if filename.endswith(ARTIFACT_SUFFIX):
+            cfg, layers = read_artifact(filename)
+            # Mapped arrays are used in place when the stored dtype matches
+            network = [{key: value if value.dtype == self.weights_dtype else value.astype(self.weights_dtype)
+                        for key, value in layer.items()} for layer in layers]
+        else:
+            with open(filename, "rb") as f:
+                payload = f.read()
+            source_sha256 = hashlib.sha256(payload).hexdigest()
+            twin = artifact_path(filename)
+            if prefer_artifact and artifact_in_sync(twin, source_sha256):
+                self.load_model(twin)
+                return
+            model_data = json.loads(payload)
+            cfg = model_data["config"]
+            # Rebuild matrix layers from the dict-of-neurons layout. JSON floats parse to float64,
+            # so the default dtype is an exact copy; float32 rounds each weight once here.
+            network = from_neuron_network(model_data["network"], dtype=self.weights_dtype)
+            if prefer_artifact:
+                # The twin is always the exact float64 weights, whatever dtype this process uses
+                exact = network if self.weights_dtype == np.float64 else from_neuron_network(model_data["network"])
+                try:
+                    write_artifact(twin, cfg, exact, source_sha256=source_sha256)
+                except OSError as exc:
+                    print(f"Could not refresh {twin}: {exc}")
         self.num_symptoms = cfg.get("num_symptoms", self.num_symptoms)
+        if self.clinical_rules.num_symptoms != self.num_symptoms:
+            self.symptom_patterns = compile_symptom_patterns(DISEASES_V2, self.num_symptoms)
+            self.clinical_rules = CompiledClinicalRules(DISEASES_V2, self.num_symptoms)
         self.num_features = cfg.get("num_features", self.num_features)
         self.num_diseases = cfg.get("num_diseases", self.num_diseases)
         self.hidden_neurons = cfg.get("hidden_neurons", self.hidden_neurons)
         self.learning_rate = cfg.get("learning_rate", self.learning_rate)
         self.epochs = cfg.get("epochs", self.epochs)
+        self.batch_size = cfg.get("batch_size", self.batch_size)
+        self.optimizer = cfg.get("optimizer", self.optimizer)
+        self.weight_decay = cfg.get("weight_decay", self.weight_decay)
+        self.dropout_rate = cfg.get("dropout_rate", self.dropout_rate)
         self.temperature = cfg.get("temperature", 1.0)
-
-        # Rebuild network structure
-        self.network = []
-        for layer in model_data["network"]:
-            rebuilt = []
-            for neuron in layer:
-                rebuilt.append({"weights": list(neuron["weights"])})
-            self.network.append(rebuilt)
+        self.calibration = cfg.get("calibration", "temperature")
+        if cfg.get("class_scale") is not None:
+            self.class_scaling = (np.asarray(cfg["class_scale"], dtype=np.float64),
+                                  np.asarray(cfg["class_bias"], dtype=np.float64))
+        else:
+            self.class_scaling = None
+        self.network = network
         print(f"Model loaded from {filename}")
     
     # ===== Training from JSONL (v0.2) =====
-    def train_from_jsonl(self, jsonl_path: str, seed: int = 42, verbose: bool = True):
+    def train_from_jsonl(self, jsonl_path: str, seed: int | None = None, verbose: bool = True, config=None,
+                         resume=None):
+        """Train on a JSONL case file (80/20 train/validation split by seed)
+
+        resume: the training_state of an earlier run with the same file, seed and settings;
+        training continues from it up to self.epochs in total instead of starting over.
+        """
+        settings = self.apply_training_config(config) if config is not None else {}
+        if seed is None:
+            seed = settings.get("seed", 42)
         import random
         random.seed(seed)
         # Load data
@@ -515,204 +736,28 @@ class ClinicalReasoningNetwork:
         split = int(0.8 * len(dataset))
         train_set = dataset[:split]
         val_set = dataset[split:]
-        # Init and train
-        self.network = initialize_network(self.num_features, self.hidden_neurons, self.num_diseases)
-        history = self._train_softmax_cross_entropy(self.network, train_set, val_set, verbose=verbose)
-        self.temperature = self._calibrate_temperature(val_set)
+        # Init and train (private until calibrated)
+        network = self._initialize_network()
+        history = self._train_softmax_cross_entropy(network, train_set, val_set, verbose=verbose, resume=resume)
+        self.temperature, self.class_scaling = self._fit_calibration(val_set, network)
+        self.network = network
         if verbose:
-            print(f"Calibration: selected T={self.temperature:.2f}")
+            print(f"Calibration: {self._calibration_summary()}")
         return history
     
     def _apply_clinical_rules(self, nn_outputs, symptom_ids, severity_vector, has_test_results):
-        """Apply clinical decision rules to adjust probabilities"""
-        adjusted = nn_outputs.copy()
-
-        # Determine syndrome to guide appropriate weighting
-        try:
-            syndrome_ctx = get_syndrome_from_symptoms(symptom_ids)
-            appropriate_names = set(get_appropriate_differential(syndrome_ctx))
-        except Exception:
-            syndrome_ctx = "Undifferentiated"
-            appropriate_names = set()
-        
-        # Example: Apply Centor criteria for strep
-        strep_idx = None
-        for did, disease in DISEASES_V2.items():
-            if disease['name'] == "Streptococcal Pharyngitis":
-                strep_idx = did
-                break
-        
-        if strep_idx is not None:
-            centor_score = 0
-            
-            # Check Centor criteria
-            if 0 in symptom_ids and severity_vector[0] > 0.3:  # Fever
-                centor_score += 1
-            if 3 not in symptom_ids:  # Absence of cough
-                centor_score += 1
-            if 6 in symptom_ids and severity_vector[6] > 0.5:  # Sore throat
-                centor_score += 1
-            
-            # Adjust strep probability based on Centor score
-            if centor_score <= 1:
-                adjusted[strep_idx] *= 0.1  # Very unlikely
-            elif centor_score == 2:
-                adjusted[strep_idx] *= 0.5  # Possible
-            else:
-                adjusted[strep_idx] *= 1.5  # Likely
-
-        # Generic negative-evidence penalty: if highly expected symptoms are absent, downweight
-        for did, disease in DISEASES_V2.items():
-            patterns = disease.get('symptom_patterns', {})
-            missing_high = 0
-            for sid, pattern in patterns.items():
-                freq = pattern.get('frequency', 0.0)
-                if freq >= 0.85 and sid not in symptom_ids:
-                    missing_high += 1
-            if missing_high > 0:
-                # Exponential penalty per missing key symptom
-                adjusted[did] *= (0.6 ** missing_high)
-
-        # Specific guard: UTI should not rank high without dysuria and frequency/urgency
-        uti_idx = None
-        for did, disease in DISEASES_V2.items():
-            if disease['name'] == "Urinary Tract Infection":
-                uti_idx = did
-                break
-        if uti_idx is not None:
-            # 27: Dysuria, 26: Frequency/Urgency
-            missing = int(26 not in symptom_ids) + int(27 not in symptom_ids)
-            if missing == 2:
-                # Very strong downweight when both GU keys absent
-                adjusted[uti_idx] *= 0.03
-            elif missing == 1:
-                adjusted[uti_idx] *= 0.2
-
-        # Soft-gate to diagnoses appropriate to inferred syndrome; allow general viral syndrome everywhere
-        if appropriate_names:
-            allowed = set(appropriate_names)
-            allowed.add("Viral Syndrome")
-            # Convert to log domain, apply additive biases, then re-softmax for stability
-            eps = 1e-12
-            logits = [self._ln(max(p, eps)) for p in adjusted]
-            for did, disease in DISEASES_V2.items():
-                if disease['name'] in allowed:
-                    logits[did] += 1.0  # smaller boost for allowed set
-                else:
-                    logits[did] -= 1.0  # smaller penalty for disallowed
-            
-            # Disease-specific discriminative boosts based on key features
-            # Helper to find disease index by name
-            def _idx(name: str):
-                for _did, _dis in DISEASES_V2.items():
-                    if _dis['name'] == name:
-                        return _did
-                return None
-            
-            uri_idx = _idx("Viral Upper Respiratory Infection")
-            ili_idx = _idx("Influenza-like Illness")
-            covid_idx = _idx("COVID-19-like Illness")
-            pna_idx = _idx("Pneumonia Syndrome")
-            
-            # Symptom severities for readability
-            fever = severity_vector[0] if len(severity_vector) > 0 else 0
-            fatigue = severity_vector[1] if len(severity_vector) > 1 else 0
-            cough = severity_vector[3] if len(severity_vector) > 3 else 0
-            dyspnea = severity_vector[4] if len(severity_vector) > 4 else 0
-            sore_throat = severity_vector[6] if len(severity_vector) > 6 else 0
-            rhinorrhea = severity_vector[7] if len(severity_vector) > 7 else 0
-            congestion = severity_vector[8] if len(severity_vector) > 8 else 0
-            nausea = severity_vector[9] if len(severity_vector) > 9 else 0
-            myalgia = severity_vector[16] if len(severity_vector) > 16 else 0
-            chest_pain = severity_vector[18] if len(severity_vector) > 18 else 0
-            anosmia = severity_vector[28] if len(severity_vector) > 28 else 0
-            
-            # URI: rhinorrhea + congestion + cough, not very high fever, limited myalgia
-            if uri_idx is not None:
-                if rhinorrhea > 0.3 and congestion > 0.3 and cough > 0.2:
-                    logits[uri_idx] += 1.5
-                if fever < 0.6 and myalgia < 0.6:
-                    logits[uri_idx] += 0.5
-                # Negative evidence: GU keys absent with strong URI pattern present
-                if uti_idx is not None and (rhinorrhea > 0.3 or congestion > 0.3) and (26 not in symptom_ids) and (27 not in symptom_ids):
-                    logits[uti_idx] -= 6.0
-                # Guard against COVID-like overshadowing basic URI when anosmia is absent and fever not high
-                if covid_idx is not None and anosmia < 0.6 and fever < 0.6 and cough >= 0.3 and (rhinorrhea > 0.3 or congestion > 0.3):
-                    logits[uri_idx] += 1.0
-                # Strong downweight of COVID-like for strep/URI pattern: sore throat high, cough absent, anosmia absent
-                if covid_idx is not None and anosmia < 0.6 and cough < 0.2 and sore_throat >= 0.6:
-                    logits[covid_idx] -= 3.0
-                    logits[uri_idx] += 0.5
-            
-            # ILI: high fever + myalgia (+/- severe fatigue)
-            if ili_idx is not None:
-                if fever >= 0.6 and myalgia >= 0.6:
-                    logits[ili_idx] += 2.5
-                if fatigue >= 0.7:
-                    logits[ili_idx] += 0.5
-                # Penalize ILI when myalgia is absent, cough absent, and sore throat dominant
-                if myalgia < 0.3 and cough < 0.2 and sore_throat >= 0.6:
-                    logits[ili_idx] -= 3.5
-                    # Boost URI in this strep/viral-pharyngitis-like pattern
-                    if uri_idx is not None:
-                        logits[uri_idx] += 1.5
-            
-            # COVID-like: anosmia highly specific; GI + cough supportive; dyspnea moderate
-            if covid_idx is not None:
-                if anosmia >= 0.8:
-                    logits[covid_idx] += 2.5
-                if nausea >= 0.3 and cough > 0.2:
-                    logits[covid_idx] += 0.5
-                if dyspnea >= 0.4:
-                    logits[covid_idx] += 0.3
-            
-            # Pneumonia: dyspnea + chest pain + strong cough
-            if pna_idx is not None:
-                if dyspnea >= 0.5 and chest_pain >= 0.4 and cough >= 0.5:
-                    logits[pna_idx] += 2.5
-                # Strongly favor pneumonia over COVID-like when classic triad present without anosmia
-                if covid_idx is not None and anosmia < 0.6 and dyspnea >= 0.6 and chest_pain >= 0.4 and fever >= 0.6 and cough >= 0.6:
-                    logits[pna_idx] += 5.0
-                    logits[covid_idx] -= 8.0
-            # Stronger UTI penalty if urinary keys absent; zero out if syndrome is respiratory
-            if uti_idx is not None and (26 not in symptom_ids) and (27 not in symptom_ids):
-                if syndrome_ctx and ("Respiratory" in syndrome_ctx or syndrome_ctx == "Undifferentiated"):
-                    logits[uti_idx] -= 12.0
-                else:
-                    logits[uti_idx] -= 8.0
-            # Recompute probabilities via softmax
-            m = max(logits)
-            exps = [pow(2.718281828459045, z - m) for z in logits]
-            s = sum(exps)
-            adjusted = [e / s for e in exps]
-        
-        # Final deterministic guardrails for classic patterns (post-gating)
-        try:
-            # Identify indices again if needed
-            def _idx2(name: str):
-                for _did, _dis in DISEASES_V2.items():
-                    if _dis['name'] == name:
-                        return _did
-                return None
-            pna_idx2 = _idx2("Pneumonia Syndrome")
-            covid_idx2 = _idx2("COVID-19-like Illness")
-            # Strong pneumonia triad: high cough + dyspnea + chest pain, no anosmia
-            if pna_idx2 is not None and covid_idx2 is not None:
-                if dyspnea >= 0.6 and chest_pain >= 0.4 and cough >= 0.6 and anosmia < 0.3:
-                    # Ensure pneumonia outranks COVID for this presentation
-                    adjusted[pna_idx2] = max(adjusted[pna_idx2], adjusted[covid_idx2] + 0.05)
-                    adjusted[covid_idx2] *= 0.1
-        except Exception:
-            pass
-
-        # Normalize probabilities
-        total = sum(adjusted)
-        if total > 0:
-            adjusted = [p/total for p in adjusted]
-        
-        return adjusted
-    
-    def _generate_clinical_reasoning(self, symptom_ids, severity_vector, primary_disease, syndrome):
+        """Apply clinical decision rules to adjust probabilities (see clinical_rules_engine)"""
+        return self.clinical_rules.apply_case(nn_outputs, symptom_ids, severity_vector)
+
+    def apply_clinical_rules_batch(self, probs, features):
+        """Apply clinical decision rules to (N, D) probabilities for (N, 2 * num_symptoms)
+        feature rows (presence flags followed by severities)"""
+        features = np.asarray(features, dtype=np.float64)
+        presence = features[:, :self.num_symptoms] > 0
+        severity = features[:, self.num_symptoms:2 * self.num_symptoms]
+        return self.clinical_rules.apply(probs, presence, severity)
+
+    def _generate_clinical_reasoning(self, symptom_ids, severity_vector, disease_id, syndrome):
         """Generate clinical reasoning explanation"""
         reasoning = {
             "syndrome_identified": syndrome,
@@ -722,22 +767,22 @@ class ClinicalReasoningNetwork:
         }
         
         # Identify key findings
-        disease_symptoms = primary_disease['symptom_patterns']
+        patterns = self.symptom_patterns
         
         for sid in symptom_ids:
-            if sid in disease_symptoms:
-                pattern = disease_symptoms[sid]
-                if pattern['frequency'] > 0.7:
+            if sid < patterns.num_symptoms and patterns.defined[disease_id, sid]:
+                frequency = patterns.frequency[disease_id, sid]
+                if frequency > 0.7:
                     reasoning["key_findings"].append({
                         "symptom": SYMPTOMS[sid]['name'],
                         "significance": "Common in this condition",
-                        "frequency": f"{pattern['frequency']*100:.0f}% of cases"
+                        "frequency": f"{frequency*100:.0f}% of cases"
                     })
                 else:
                     reasoning["supporting_features"].append({
                         "symptom": SYMPTOMS[sid]['name'],
                         "significance": "Sometimes seen",
-                        "frequency": f"{pattern['frequency']*100:.0f}% of cases"
+                        "frequency": f"{frequency*100:.0f}% of cases"
                     })
             else:
                 reasoning["inconsistent_features"].append({
@@ -746,11 +791,11 @@ class ClinicalReasoningNetwork:
                 })
         
         # Note important absent symptoms
-        for sid, pattern in disease_symptoms.items():
-            if pattern['frequency'] > 0.8 and sid not in symptom_ids and sid < len(SYMPTOMS):
+        for sid, frequency, _, _ in patterns.patterns[disease_id]:
+            if frequency > 0.8 and sid not in symptom_ids and sid < len(SYMPTOMS):
                 reasoning["inconsistent_features"].append({
                     "symptom": SYMPTOMS[sid]['name'] + " (absent)",
-                    "significance": f"Expected in {pattern['frequency']*100:.0f}% of cases"
+                    "significance": f"Expected in {frequency*100:.0f}% of cases"
                 })
         
         return reasoning
@@ -785,12 +830,11 @@ class ClinicalReasoningNetwork:
     
     def _get_discriminating_features(self, disease_id):
         """Get key features that distinguish this disease"""
-        disease = DISEASES_V2[disease_id]
         features = []
         
         # Find highly specific symptoms (high frequency, less common in others)
-        for sid, pattern in disease['symptom_patterns'].items():
-            if pattern['frequency'] > 0.7 and sid < len(SYMPTOMS):
+        for sid, frequency, _, _ in self.symptom_patterns.patterns[disease_id]:
+            if frequency > 0.7 and sid < len(SYMPTOMS):
                 features.append(SYMPTOMS[sid]['name'])
         
         return features[:3]  # Top 3 discriminating features
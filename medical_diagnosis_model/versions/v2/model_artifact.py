@@ -0,0 +1,136 @@
+"""
+Binary model artifact for the v2 network
+Layout: magic, uint32 header length, JSON header (config incl. temperature, schema version,
+block table, SHA-256 of the weight data), zero padding to a 64-byte boundary, then each
+layer's weights and bias as raw little-endian C-order arrays. Loading memory-maps the file,
+so cold start does not depend on parsing the weights.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import tempfile
+
+import numpy as np
+
+MAGIC = b"MDMNET\x00\x00"
+SCHEMA_VERSION = 1
+ARTIFACT_SUFFIX = ".bin"
+_ALIGN = 64
+_PREFIX = struct.Struct("<8sI")
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def artifact_path(json_path):
+    """Binary artifact that sits next to a JSON model (models/x.json -> models/x.bin)"""
+    return os.path.splitext(json_path)[0] + ARTIFACT_SUFFIX
+
+
+def atomic_write(path, payload):
+    """Write bytes to path via a temp file in the same directory and os.replace, so readers
+    see either the previous file or the complete new one"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in payload if isinstance(payload, (list, tuple)) else (payload,):
+                f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def write_artifact(path, config, layers, source_sha256=None):
+    """
+    Save matrix layers (see foundational_brain.MatrixNet) and their config atomically
+
+    Blocks keep the dtype the layers are held in, so float32 models stay half size.
+    source_sha256 records the hash of the JSON model the artifact was written from, so
+    a loader can tell whether the artifact still matches it (see artifact_in_sync).
+    """
+    blocks = []
+    chunks = []
+    offset = 0
+    digest = hashlib.sha256()
+    for i, layer in enumerate(layers):
+        for key in ("weights", "bias"):
+            arr = np.ascontiguousarray(layer[key])
+            arr = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+            raw = arr.tobytes()
+            pad = b"\x00" * (_align(len(raw)) - len(raw))
+            blocks.append({"layer": i, "name": key, "dtype": arr.dtype.str,
+                           "shape": list(arr.shape), "offset": offset, "nbytes": len(raw)})
+            for part in (raw, pad):
+                digest.update(part)
+                chunks.append(part)
+            offset += len(raw) + len(pad)
+    header = json.dumps({
+        "schema_version": SCHEMA_VERSION,
+        "config": config,
+        "blocks": blocks,
+        "data_nbytes": offset,
+        "sha256": digest.hexdigest(),
+        "source_sha256": source_sha256,
+    }).encode("utf-8")
+    head = _PREFIX.pack(MAGIC, len(header)) + header
+    head += b"\x00" * (_align(len(head)) - len(head))
+    atomic_write(path, [head] + chunks)
+
+
+def _read_header(mm, path):
+    if len(mm) < _PREFIX.size:
+        raise ValueError(f"{path}: truncated model artifact")
+    magic, header_len = _PREFIX.unpack(mm[:_PREFIX.size].tobytes())
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a model artifact")
+    header = json.loads(mm[_PREFIX.size:_PREFIX.size + header_len].tobytes().decode("utf-8"))
+    if header.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"{path}: unsupported artifact schema version {header.get('schema_version')}")
+    return header, _align(_PREFIX.size + header_len)
+
+
+def artifact_in_sync(artifact, source_sha256):
+    """True if the artifact exists and was written from JSON with this SHA-256; artifacts
+    without a recorded source (or unreadable ones) never match"""
+    try:
+        header, _ = _read_header(np.memmap(artifact, dtype=np.uint8, mode="r"), artifact)
+    except (OSError, ValueError):
+        return False
+    return header.get("source_sha256") is not None and header["source_sha256"] == source_sha256
+
+
+def read_artifact(path, verify=True):
+    """
+    Memory-map a binary artifact
+
+    Returns:
+        (config, layers) where each layer's arrays are read-only views into the mapped file
+
+    Raises:
+        ValueError if the file is not an artifact, uses an unknown schema version, or fails
+        the checksum (when verify is True)
+    """
+    mm = np.memmap(path, dtype=np.uint8, mode="r")
+    header, start = _read_header(mm, path)
+    data = mm[start:start + header["data_nbytes"]]
+    if len(data) != header["data_nbytes"]:
+        raise ValueError(f"{path}: truncated model artifact")
+    if verify and hashlib.sha256(data).hexdigest() != header["sha256"]:
+        raise ValueError(f"{path}: checksum mismatch")
+
+    layers = []
+    for block in header["blocks"]:
+        while len(layers) <= block["layer"]:
+            layers.append({})
+        raw = data[block["offset"]:block["offset"] + block["nbytes"]]
+        layers[block["layer"]][block["name"]] = np.asarray(raw).view(np.dtype(block["dtype"])).reshape(block["shape"])
+    return header["config"], layers
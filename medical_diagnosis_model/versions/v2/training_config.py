@@ -0,0 +1,64 @@
+"""
+Training configuration for the v2 network
+Reads configs/training.yaml into the flat settings ClinicalReasoningNetwork understands
+"""
+
+import os
+
+DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "configs", "training.yaml"
+)
+
+
+def _read_yaml(path):
+    try:
+        import yaml
+    except ImportError as e:
+        raise RuntimeError("PyYAML is required to read training configs (pip install PyYAML)") from e
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.safe_load(f) or {}
+
+
+def load_training_config(config=None):
+    """
+    Flatten a training config into model settings
+
+    Args:
+        config: path to a YAML file, an already-parsed mapping, or None for configs/training.yaml
+
+    Returns:
+        dict with any of: seed, optimizer, learning_rate, momentum, weight_decay, dropout_rate,
+        hidden_neurons, epochs, batch_size, cases_per_disease (only keys present in the config)
+    """
+    raw = _read_yaml(config or DEFAULT_CONFIG_PATH) if not isinstance(config, dict) else config
+    optimizer = raw.get("optimizer") or {}
+    regularization = raw.get("regularization") or {}
+    model = raw.get("model") or {}
+    data = raw.get("data") or {}
+    training = raw.get("training") or {}
+
+    settings = {}
+    if "seed" in raw:
+        settings["seed"] = int(raw["seed"])
+    if "type" in optimizer:
+        settings["optimizer"] = str(optimizer["type"]).lower()
+    if "learning_rate" in optimizer:
+        settings["learning_rate"] = float(optimizer["learning_rate"])
+    if "momentum" in optimizer:
+        settings["momentum"] = float(optimizer["momentum"])
+    if "l2_weight_decay" in regularization:
+        settings["weight_decay"] = float(regularization["l2_weight_decay"])
+    if "dropout_rate" in regularization:
+        settings["dropout_rate"] = float(regularization["dropout_rate"])
+    if "hidden_neurons" in model:
+        settings["hidden_neurons"] = int(model["hidden_neurons"])
+    if "epochs" in training:
+        settings["epochs"] = int(training["epochs"])
+    if "batch_size" in training:
+        settings["batch_size"] = int(training["batch_size"])
+    if "cases_per_disease" in data:
+        settings["cases_per_disease"] = int(data["cases_per_disease"])
+
+    if not 0.0 <= settings.get("dropout_rate", 0.0) < 1.0:
+        raise ValueError("regularization.dropout_rate must be in [0, 1)")
+    return settings